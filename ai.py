@@ -0,0 +1,252 @@
+from setting import *  # Imports SCORE_DATA, PREVIEW_COUNT and the grid size
+from collections import OrderedDict  # Keeps table entries in least-recently-used order
+from multiprocessing import Pool
+from time import perf_counter
+
+
+# --- Heuristic ---
+# Weights of the board features (negative = bad). Line clears are rewarded
+# with the points they score (SCORE_DATA) times the 'clears' weight.
+WEIGHTS = {
+    'height': -0.51,     # Sum of all column heights
+    'holes': -0.36,      # Empty cells with a block somewhere above them
+    'bumpiness': -0.18,  # Sum of height differences between neighbouring columns
+    'clears': 0.02,      # Per point of SCORE_DATA the placement scores
+}
+LOSS = float('-inf')  # Value of a board where the next piece cannot spawn
+
+
+def evaluate(board, weights=WEIGHTS):
+    """Static value of a board (without the line clear reward)."""
+    # The board keeps its heights and hole count up to date on every lock
+    return (weights['height'] * board.aggregate_height + weights['holes'] * board.holes
+            + weights['bumpiness'] * board.bumpiness)
+
+
+# --- Transposition Table ---
+# Values depend on every remaining shape of the fixed piece sequence, so a
+# board almost never comes back with the same shapes left (about 4 hits in
+# 3000 lookups). The best placements of one piece on one board do come back:
+# the next move searches the boards of the last move's second ply again.
+class TranspositionTable:
+    """Bounded LRU cache of expanded positions keyed by (board rows, shape, start)."""
+
+    def __init__(self, max_size=2000):
+        self.max_size = max_size  # Oldest entries are evicted past this size
+        self.values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns the cached entry of a position, or None."""
+        value = self.values.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.values.move_to_end(key)  # Mark as most recently used
+        return value
+
+    def put(self, key, value):
+        """Stores an entry, evicting the least recently used one when full."""
+        self.values[key] = value
+        if len(self.values) > self.max_size:
+            self.values.popitem(last=False)
+
+
+# --- Search ---
+class Search:
+    """Depth-first search over the placements of a known piece sequence.
+
+    Every ply keeps only the `beam` best placements (by static value), and
+    the placements of a piece on a board are looked up in the transposition
+    table before they are enumerated again.
+    """
+
+    def __init__(self, weights=WEIGHTS, beam=6, table_size=2000):
+        self.weights = weights
+        self.beam = beam
+        self.table = TranspositionTable(table_size)
+        self.nodes = 0  # Placements evaluated so far
+
+    def children(self, board, shape, start=None):
+        """Returns (static value, clear reward, board, placement) of the best placements."""
+        if start == (0, board.spawn_x, board.spawn_y):
+            start = None  # A piece that has not moved yet: same entry as in value()
+        key = (tuple(board.row_bits), shape, start)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+        weights = self.weights
+        result = []
+        for placement in board.placements(shape, *(start or ())):
+            rotation, x, y, path = placement
+            child = board.copy()
+            child.lock(shape, rotation, x, y)
+            lines = len(child.clear_rows())
+            if child.topped_out:
+                continue  # Part of the piece would stay above the board
+            reward = weights['clears'] * SCORE_DATA[lines] if lines else 0
+            result.append((reward + evaluate(child, weights), reward, child, placement))
+        self.nodes += len(result)
+        result.sort(key=lambda item: item[0], reverse=True)
+        result = result[:self.beam]  # The child boards are never changed, so they can be shared
+        self.table.put(key, result)
+        return result
+
+    def value(self, board, shapes):
+        """Best value reachable by placing `shapes` in order onto `board`."""
+        children = self.children(board, shapes[0])
+        if not children:
+            return LOSS
+        if len(shapes) == 1:
+            return children[0][0]
+        return max(reward + self.value(child, shapes[1:])
+                   for static, reward, child, placement in children)
+
+    def best(self, board, shapes, start=None, pool=None):
+        """Returns the best placement (rotation, x, y, path) of shapes[0], or None.
+
+        `start` is the (rotation, x, y) of a piece that already moved, and a
+        process pool searches the subtrees of the first ply in parallel.
+        """
+        children = self.children(board, shapes[0], start)
+        if not children:
+            return None
+        if len(shapes) == 1:
+            return children[0][3]
+        rest = shapes[1:]
+        if pool:
+            jobs = [(child, rest, self.weights, self.beam)
+                    for static, reward, child, placement in children]
+            results = pool.map(search_subtree, jobs)
+            values = [value for value, nodes in results]
+            self.nodes += sum(nodes for value, nodes in results)
+        else:
+            values = [self.value(child, rest) for static, reward, child, placement in children]
+        totals = [reward + value for (static, reward, child, placement), value in zip(children, values)]
+        return children[totals.index(max(totals))][3]
+
+
+# One Search per worker process, so its table survives between moves
+WORKER_SEARCH = None
+
+
+def search_subtree(job):
+    """Worker entry point: returns (value, nodes searched) of one first-ply position."""
+    global WORKER_SEARCH
+    board, shapes, weights, beam = job
+    if WORKER_SEARCH is None or (WORKER_SEARCH.weights, WORKER_SEARCH.beam) != (weights, beam):
+        WORKER_SEARCH = Search(weights, beam)
+    nodes = WORKER_SEARCH.nodes
+    value = WORKER_SEARCH.value(board, shapes)
+    return value, WORKER_SEARCH.nodes - nodes
+
+
+# --- Player ---
+class AIPlayer:
+    """Plays a Game by searching the placements of the current piece and the preview.
+
+    Call update() once per frame. The chosen path is applied through the
+    piece's own move methods (same collision rules as the keys, but without
+    the key repeat delays), `moves_per_frame` steps per frame.
+    """
+
+    def __init__(self, depth=2, weights=WEIGHTS, beam=6, workers=1, moves_per_frame=1):
+        self.depth = min(depth, 1 + PREVIEW_COUNT)  # Current piece + visible preview
+        self.search = Search(weights, beam)
+        self.pool = Pool(workers) if workers > 1 else None
+        self.moves_per_frame = moves_per_frame
+
+        self.piece = None     # Tetrimono the current plan belongs to
+        self.target = None    # (rotation, x, y) where the piece should rest
+        self.path = []        # Remaining actions to get there
+        self.expected = None  # (rotation, x, y) the piece should be at now
+        self.seconds = 0.0    # Time spent searching
+
+    @property
+    def nodes_per_sec(self):
+        """Placements evaluated per second of search."""
+        return self.search.nodes / self.seconds if self.seconds else 0.0
+
+    def plan(self, game, next_shapes):
+        """Searches a new target and path for the game's current piece."""
+        piece = game.tetromino
+        shapes = (piece.shape,) + tuple(next_shapes[:self.depth - 1])
+        start = perf_counter()
+        placement = self.search.best(game.board, shapes, (piece.rotation, piece.x, piece.y), self.pool)
+        self.seconds += perf_counter() - start
+        self.target = placement[:3] if placement else None
+        self.path = list(placement[3]) if placement else []
+        self.expected = (piece.rotation, piece.x, piece.y)
+
+    def replan_path(self, game):
+        """Finds a new path to the same target after the piece was moved (e.g. by gravity)."""
+        piece = game.tetromino
+        # Same search as the plan, from where the piece is now
+        for rotation, x, y, path in game.board.placements(piece.shape, piece.rotation, piece.x, piece.y):
+            if (rotation, x, y) == self.target:
+                self.path = list(path)
+                self.expected = (piece.rotation, piece.x, piece.y)
+                return True
+        return False
+
+    def update(self, game, next_shapes):
+        """Plans for every new piece and applies the next moves of the plan."""
+        if not game.game_active:
+            return
+        piece = game.tetromino
+        if piece is not self.piece:
+            self.piece = piece
+            self.plan(game, next_shapes)
+        elif (piece.rotation, piece.x, piece.y) != self.expected and not self.replan_path(game):
+            self.plan(game, next_shapes)
+
+        for i in range(self.moves_per_frame):
+            if not self.path:
+                piece.move_down()  # At the target: lock now (or just fall if there is none)
+                break
+            action = self.path.pop(0)
+            if action == LEFT:
+                piece.move_horizontal(-1)
+            elif action == RIGHT:
+                piece.move_horizontal(1)
+            elif action == ROTATE:
+                piece.rotate()
+            elif action == DOWN:
+                piece.move_down()
+            self.expected = (piece.rotation, piece.x, piece.y)
+
+    def close(self):
+        """Stops the worker processes."""
+        if self.pool:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+if __name__ == "__main__":
+    # Headless self-check: let the AI play a few games and report its speed
+    import argparse
+    from headless import Simulation
+
+    parser = argparse.ArgumentParser(description='Let the AI play headless games.')
+    parser.add_argument('games', type=int, nargs='?', default=3)
+    parser.add_argument('--depth', type=int, default=2, help='pieces searched (current + preview)')
+    parser.add_argument('--beam', type=int, default=6, help='placements kept per ply')
+    parser.add_argument('--workers', type=int, default=1, help='search processes')
+    parser.add_argument('--pieces', type=int, default=500, help='stop a game after this many pieces')
+    args = parser.parse_args()
+
+    ai = AIPlayer(args.depth, beam=args.beam, workers=args.workers, moves_per_frame=4)
+    for seed in range(args.games):
+        simulation = Simulation(seed)
+        while simulation.game.game_active and simulation.pieces <= args.pieces:
+            ai.update(simulation.game, simulation.next_shapes)
+            simulation.step(())
+        print(f'seed {seed}: {simulation.pieces - 1} pieces, score {simulation.score}, '
+              f'lines {simulation.lines}, level {simulation.level}')
+    table = ai.search.table
+    print(f'{ai.nodes_per_sec:,.0f} nodes/sec, table {len(table.values)} entries, '
+          f'{table.hits} hits / {table.misses} misses')
+    ai.close()
@@ -0,0 +1,123 @@
+import pygame
+import os
+import struct  # Header of the cached image files
+from collections import deque
+from text_cache import get_font
+
+
+# --- Asset Locations ---
+# Assets ship next to the modules, so paths never depend on the working directory
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+# Decoded images are cached here as raw RGBA pixels (PNG decoding is skipped on reload)
+CACHE_DIR = os.path.join(ASSET_DIR, '.asset_cache')
+# Cache file header: magic, width, height, source size and source mtime (ns)
+CACHE_HEADER = struct.Struct('<4sIIQQ')
+CACHE_MAGIC = b'TIMG'
+
+
+def asset_path(name):
+    """Returns the absolute path of a bundled asset file."""
+    return os.path.join(ASSET_DIR, name)
+
+
+# --- Images ---
+# Every image is decoded once per run and then shared
+IMAGES = {}
+
+
+def read_cached_pixels(name, source):
+    """Returns (size, RGBA bytes) from the disk cache, or None when missing or stale."""
+    try:
+        with open(os.path.join(CACHE_DIR, name + '.rgba'), 'rb') as file:
+            data = file.read()
+    except OSError:
+        return None
+    if len(data) < CACHE_HEADER.size:
+        return None
+    magic, width, height, size, mtime = CACHE_HEADER.unpack_from(data)
+    stat = os.stat(source)
+    if (magic, size, mtime) != (CACHE_MAGIC, stat.st_size, stat.st_mtime_ns):
+        return None  # The source image changed since it was cached
+    pixels = data[CACHE_HEADER.size:]
+    if len(pixels) != width * height * 4:
+        return None  # Truncated file
+    return (width, height), pixels
+
+
+def write_cached_pixels(name, source, surface):
+    """Stores the decoded pixels of an image in the disk cache (best effort)."""
+    stat = os.stat(source)
+    width, height = surface.get_size()
+    header = CACHE_HEADER.pack(CACHE_MAGIC, width, height, stat.st_size, stat.st_mtime_ns)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        temp = os.path.join(CACHE_DIR, name + '.tmp')
+        with open(temp, 'wb') as file:
+            file.write(header + pygame.image.tobytes(surface, 'RGBA'))
+        os.replace(temp, os.path.join(CACHE_DIR, name + '.rgba'))  # Never leaves a half-written file
+    except OSError:
+        pass  # Read-only install: simply decode the PNG next time again
+
+
+def load_image(name):
+    """Returns a display-converted image, decoded once and cached on disk."""
+    image = IMAGES.get(name)
+    if image is None:
+        source = asset_path(name)
+        cached = read_cached_pixels(name, source)
+        if cached:
+            size, pixels = cached
+            image = pygame.image.frombuffer(pixels, size, 'RGBA').convert_alpha()
+        else:
+            surface = pygame.image.load(source)
+            write_cached_pixels(name, source, surface)
+            image = surface.convert_alpha()
+        IMAGES[name] = image
+    return image
+
+
+# Images resized for a scale, keyed by (name, pixel size)
+SCALED_IMAGES = {}
+
+
+def load_scaled_image(name, scale):
+    """Returns an image resized by `scale`, resampled only once per size."""
+    image = load_image(name)
+    if scale == 1:
+        return image
+    size = (max(1, round(image.get_width() * scale)), max(1, round(image.get_height() * scale)))
+    scaled = SCALED_IMAGES.get((name, size))
+    if scaled is None:
+        scaled = SCALED_IMAGES[(name, size)] = pygame.transform.smoothscale(image, size)
+    return scaled
+
+
+def load_font(name, size):
+    """Returns a bundled font, loaded once per size (see text_cache.get_font)."""
+    return get_font(asset_path(name), size)
+
+
+# --- Deferred Loading ---
+# Non-critical assets (only needed later, like the game over fonts) are queued
+# here and loaded one per frame once the first frame is on screen
+DEFERRED = deque()
+
+
+def defer(func, *args):
+    """Queues a loader call to run after the first frame."""
+    DEFERRED.append((func, args))
+
+
+def load_deferred(count=1):
+    """Runs up to `count` queued loader calls, returns True while some are left."""
+    for i in range(min(count, len(DEFERRED))):
+        func, args = DEFERRED.popleft()
+        func(*args)
+    return bool(DEFERRED)
+
+
+def clear_cache():
+    """Deletes the on-disk image cache (the next start decodes the PNGs again)."""
+    if os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            os.remove(os.path.join(CACHE_DIR, name))
@@ -0,0 +1,186 @@
+import numpy as np  # Vectorized math over every board at once
+from setting import *  # Imports grid size, actions and SCORE_DATA
+from board import PIECES, SHAPE_IDS, KICKS
+
+
+# --- Batch Actions ---
+# One integer per board and step (index into this tuple)
+BATCH_ACTIONS = (None, LEFT, RIGHT, ROTATE, DOWN)
+NOOP, MOVE_LEFT, MOVE_RIGHT, MOVE_ROTATE, MOVE_DOWN = range(len(BATCH_ACTIONS))
+
+# --- Piece Tables ---
+# CELLS[shape, rotation] holds the 4 (dx, dy) offsets of a piece. Shapes are
+# indexed in TETROMINOS order, and the O piece repeats its single orientation
+# so `(rotation + 1) % 4` works the same for every shape.
+SHAPES = list(TETROMINOS.keys())
+CELLS = np.array([[PIECES[shape][r % len(PIECES[shape])].cells for r in range(4)]
+                  for shape in SHAPES], dtype=np.int64)
+# KICK_OFFSETS[shape, rotation] holds the clockwise wall kicks tried in order
+# (the O piece only ever tries its own position)
+KICK_OFFSETS = np.array([[KICKS[shape][r][1] if shape in KICKS else [(0, 0)] * 5 for r in range(4)]
+                         for shape in SHAPES], dtype=np.int64)
+# Value written into the board for each shape (same ids as Board.colors)
+SHAPE_VALUES = np.array([SHAPE_IDS[shape] for shape in SHAPES], dtype=np.uint8)
+# Points per number of cleared lines, 0 lines = 0 points
+SCORE_TABLE = np.array([0] + [SCORE_DATA[lines] for lines in range(1, 5)], dtype=np.int64)
+
+
+class BatchEnv:
+    """Steps N independent boards at once with NumPy array operations."""
+
+    def __init__(self, num_boards, seed=None, columns=COLUMNS, rows=ROWS):
+        # --- Geometry ---
+        self.num_boards = num_boards
+        self.columns = columns
+        self.rows = rows
+        self.spawn_x = columns // 2
+        self.spawn_y = int(BLOCK_OFFSET.y)
+        self.random = np.random.default_rng(seed)  # Seeded piece generator
+
+        # --- Board State ---
+        # Shape ids of locked cells, 0 = empty
+        self.boards = np.zeros((num_boards, rows, columns), dtype=np.uint8)
+        # Active piece of every board: shape index, orientation and pivot position
+        self.shape = np.zeros(num_boards, dtype=np.int64)
+        self.rotation = np.zeros(num_boards, dtype=np.int64)
+        self.x = np.zeros(num_boards, dtype=np.int64)
+        self.y = np.zeros(num_boards, dtype=np.int64)
+
+        # --- Stats ---
+        self.score = np.zeros(num_boards, dtype=np.int64)
+        self.lines = np.zeros(num_boards, dtype=np.int64)
+        self.level = np.ones(num_boards, dtype=np.int64)
+        self.done = np.zeros(num_boards, dtype=bool)
+
+        self.reset()
+
+    def reset(self, indices=None):
+        """Clears the selected boards (all by default) and returns observations."""
+        if indices is None:
+            indices = np.arange(self.num_boards)
+        self.boards[indices] = 0
+        self.score[indices] = 0
+        self.lines[indices] = 0
+        self.level[indices] = 1
+        self.done[indices] = False
+        self.spawn(np.asarray(indices))
+        return self.observe()
+
+    def spawn(self, indices):
+        """Gives the selected boards a new random piece at the spawn point."""
+        self.shape[indices] = self.random.integers(0, len(SHAPES), len(indices))
+        self.rotation[indices] = 0
+        self.x[indices] = self.spawn_x
+        self.y[indices] = self.spawn_y
+        # Game Over: the new piece cannot take its first step down
+        blocked = self.collides(indices, self.rotation[indices],
+                                self.x[indices], self.y[indices] + 1)
+        self.done[indices[blocked]] = True
+
+    def piece_cells(self, indices, rotation, x, y):
+        """Returns the (column, row) arrays of every piece cell, shape (n, 4)."""
+        cells = CELLS[self.shape[indices], rotation]
+        return x[:, None] + cells[..., 0], y[:, None] + cells[..., 1]
+
+    def collides(self, indices, rotation, x, y):
+        """Checks walls, floor and locked cells for the given boards and positions."""
+        cx, cy = self.piece_cells(indices, rotation, x, y)
+        outside = (cx < 0) | (cx >= self.columns) | (cy >= self.rows)
+        # Cells above the board never hit anything; clip so indexing stays valid
+        occupied = self.boards[indices[:, None],
+                               np.clip(cy, 0, self.rows - 1),
+                               np.clip(cx, 0, self.columns - 1)] != 0
+        return (outside | (occupied & (cy >= 0))).any(axis=1)
+
+    def try_move(self, indices, rotation, x, y):
+        """Moves the pieces of `indices` to the new positions that do not collide."""
+        ok = ~self.collides(indices, rotation, x, y)
+        moved = indices[ok]
+        self.rotation[moved] = rotation[ok]
+        self.x[moved] = x[ok]
+        self.y[moved] = y[ok]
+        return ok
+
+    def step(self, actions):
+        """Applies one action per board plus one gravity tick.
+
+        Returns (observations, rewards, done). Finished boards ignore their
+        action until they are reset.
+        """
+        actions = np.asarray(actions)
+        live = ~self.done
+        rewards = np.zeros(self.num_boards, dtype=np.int64)
+
+        # 1. Horizontal moves
+        for action, amount in ((MOVE_LEFT, -1), (MOVE_RIGHT, 1)):
+            i = np.flatnonzero(live & (actions == action))
+            self.try_move(i, self.rotation[i], self.x[i] + amount, self.y[i])
+
+        # 2. Rotation (clockwise with wall kicks, like Tetrimono.rotate):
+        # every kick is tried on the boards that have not turned yet
+        i = np.flatnonzero(live & (actions == MOVE_ROTATE))
+        kicks = KICK_OFFSETS[self.shape[i], self.rotation[i]]
+        rotation = (self.rotation[i] + 1) % 4
+        for kick in range(kicks.shape[1]):
+            ok = self.try_move(i, rotation, self.x[i] + kicks[:, kick, 0], self.y[i] + kicks[:, kick, 1])
+            i, kicks, rotation = i[~ok], kicks[~ok], rotation[~ok]
+
+        # 3. Gravity: one row per step, soft drop falls one extra row
+        falling = np.flatnonzero(live)
+        landed = np.zeros(self.num_boards, dtype=bool)
+        for extra in (False, True):
+            if extra:
+                falling = falling[(actions[falling] == MOVE_DOWN) & ~landed[falling]]
+            ok = self.try_move(falling, self.rotation[falling],
+                               self.x[falling], self.y[falling] + 1)
+            landed[falling[~ok]] = True
+
+        # 4. Lock, clear and spawn for every board whose piece landed
+        locked = np.flatnonzero(landed)
+        if len(locked):
+            rewards[locked] = self.lock(locked)
+            self.spawn(locked[~self.done[locked]])
+
+        return self.observe(), rewards, self.done.copy()
+
+    def lock(self, indices):
+        """Writes landed pieces into their boards, clears lines and scores them."""
+        cx, cy = self.piece_cells(indices, self.rotation[indices],
+                                  self.x[indices], self.y[indices])
+        # A piece locking above the visible field ends that game
+        self.done[indices[(cy < 0).any(axis=1)]] = True
+
+        visible = cy >= 0
+        rows = np.broadcast_to(indices[:, None], cy.shape)
+        values = np.broadcast_to(SHAPE_VALUES[self.shape[indices]][:, None], cy.shape)
+        self.boards[rows[visible], cy[visible], cx[visible]] = values[visible]
+
+        # Line clears: move full rows to the top (stable sort keeps the order
+        # of the surviving rows) and then empty them
+        boards = self.boards[indices]
+        full = (boards != 0).all(axis=2)
+        cleared = full.sum(axis=1)
+        cleared_any = cleared > 0
+        if cleared_any.any():
+            order = np.argsort(~full[cleared_any], axis=1, kind='stable')
+            compacted = np.take_along_axis(boards[cleared_any], order[:, :, None], axis=1)
+            compacted[np.arange(self.rows)[None, :] < cleared[cleared_any][:, None]] = 0
+            self.boards[indices[cleared_any]] = compacted
+
+        # Scoring and leveling, same rules as Game.calculate_scores
+        reward = SCORE_TABLE[cleared] * self.level[indices]
+        self.score[indices] += reward
+        self.lines[indices] += cleared
+        self.level[indices] += self.lines[indices] // 10 >= self.level[indices]
+        return reward
+
+    def observe(self):
+        """Returns a copy of every board with the active piece drawn in."""
+        observation = self.boards.copy()
+        live = np.flatnonzero(~self.done)
+        cx, cy = self.piece_cells(live, self.rotation[live], self.x[live], self.y[live])
+        visible = cy >= 0
+        rows = np.broadcast_to(live[:, None], cy.shape)
+        values = np.broadcast_to(SHAPE_VALUES[self.shape[live]][:, None], cy.shape)
+        observation[rows[visible], cy[visible], cx[visible]] = values[visible]
+        return observation
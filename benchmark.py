@@ -0,0 +1,823 @@
+from time import perf_counter  # High resolution clock for timing
+from setting import *  # Imports the action names used by the scalar loops
+from board import Board, PIECES
+
+
+# --- Benchmark Registry ---
+# Every benchmark is a function returning a list of (name, value, unit) results
+BENCHMARKS = {}
+
+# Units whose value should go down (times, memory) or up (throughput); results
+# in any other unit (counts, property checks) are reported but never compared
+LOWER_IS_BETTER = {'us', 'ms', 'KiB', 'allocs'}
+HIGHER_IS_BETTER = {'ops/s', 'boards/s', 'nodes/s', 'frames/s', 'pieces/s', 'events/s', 'sessions/s'}
+BASELINE_PATH = 'benchmark_baseline.json'
+TOLERANCE = 0.25  # A result more than 25% worse than the baseline is a regression
+NOISE_FLOOR_US = 1.0  # Timings below this are never compared
+
+
+def benchmark(name):
+    """Decorator that registers a benchmark function under a name."""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def measure(func, number):
+    """Runs a function `number` times and returns the average seconds per call."""
+    start = perf_counter()
+    for i in range(number):
+        func()
+    return (perf_counter() - start) / number
+
+
+def fill_stack(board, height, open_column=0):
+    """Fills the bottom `height` rows of a board, leaving one column open."""
+    columns = board.columns
+    for row in range(board.rows - height, board.rows):
+        for x in range(columns):
+            if x != open_column:
+                board.row_bits[row] |= 1 << x
+                board.colors[row * columns + x] = 1
+    board.recompute_features()
+
+
+def snapshot(board):
+    """Copies the mutable board state so a benchmark can restore it."""
+    return (board.row_bits[:], board.row_counts[:], board.colors[:],
+            board.heights[:], board.column_counts[:], board.filled)
+
+
+def restore(board, state):
+    """Puts a board back into a state saved with snapshot()."""
+    board.row_bits[:] = state[0]
+    board.row_counts[:] = state[1]
+    board.colors[:] = state[2]
+    board.heights[:] = state[3]
+    board.column_counts[:] = state[4]
+    board.filled = state[5]
+
+
+@benchmark('lock')
+def bench_lock(number=20000):
+    """Per-lock cost (lock + line clear) for growing stack heights."""
+    results = []
+    for height in (4, 8, 12, 16, 19):
+        board = Board()
+        fill_stack(board, height)
+        state = snapshot(board)
+
+        # Vertical I piece dropped into the open column clears the bottom 4 rows
+        def lock_and_clear():
+            restore(board, state)
+            board.lock('I', 0, 0, board.rows - 2)
+            board.clear_rows()
+
+        # A piece resting on top of the stack that clears nothing
+        def lock_only():
+            restore(board, state)
+            board.lock('O', 0, 4, board.rows - height - 1)
+            board.clear_rows()
+
+        base = measure(lambda: restore(board, state), number)
+        results.append((f'lock_clear_4_rows_h{height}',
+                        (measure(lock_and_clear, number) - base) * 1e6, 'us'))
+        results.append((f'lock_no_clear_h{height}',
+                        (measure(lock_only, number) - base) * 1e6, 'us'))
+
+        # Same clear through Game.checked_finsihed_rows (adds scoring and redraw bookkeeping)
+        game = headless_game()
+        fill_stack(game.board, height)
+        game_state = snapshot(game.board)
+
+        def game_lock_and_clear():
+            restore(game.board, game_state)
+            game.current_lines = 0  # Stay on level 1, so every call does the same work
+            game.board.lock('I', 0, 0, game.board.rows - 2)
+            game.checked_finsihed_rows()
+
+        game_base = measure(lambda: restore(game.board, game_state), number)
+        results.append((f'game_lock_clear_4_rows_h{height}',
+                        (measure(game_lock_and_clear, number) - game_base) * 1e6, 'us'))
+    return results
+
+
+def headless_game(seed=0):
+    """A headless Game fed by a seeded piece generator (its clock never moves)."""
+    from randomizer import PieceGenerator
+    from timer import VirtualClock
+    from game import Game
+    pieces = PieceGenerator(seed=seed)
+    return Game(pieces.next, lambda lines, score, level: None, headless=True, clock=VirtualClock())
+
+
+@benchmark('piece')
+def bench_piece(number=100000):
+    """Move, rotate and collision check throughput of a falling Tetrimono."""
+    game = headless_game()
+    piece = game.tetromino
+    piece.y += 5  # In open air, so every move and rotation succeeds
+
+    def move():
+        piece.move_horizontal(-1)
+        piece.move_horizontal(1)
+
+    def rotate():
+        for i in range(4):
+            piece.rotate()
+
+    def collide():
+        return piece.next_move_vertical_collide(1)
+
+    # Two moves and four rotations per call
+    return [('move_horizontal', 2 / measure(move, number), 'ops/s'),
+            ('rotate', 4 / measure(rotate, number // 2), 'ops/s'),
+            ('collide_check', 1 / measure(collide, number), 'ops/s')]
+
+
+@benchmark('batch')
+def bench_batch(steps=200):
+    """Boards stepped per second: NumPy BatchEnv vs looping the scalar engine."""
+    import numpy as np
+    from random import Random
+    from batch_env import BatchEnv, BATCH_ACTIONS
+    from headless import Simulation
+
+    results = []
+    rng = np.random.default_rng(0)
+
+    # Scalar reference: one headless game per board, same action + gravity per step
+    boards = 256
+    simulations = [Simulation(seed) for seed in range(boards)]
+    actions = rng.integers(0, len(BATCH_ACTIONS), (steps, boards))
+    start = perf_counter()
+    for step_actions in actions:
+        for simulation, action in zip(simulations, step_actions):
+            game = simulation.game
+            if not game.game_active:
+                game.reset()
+            action = BATCH_ACTIONS[action]
+            if action == LEFT:
+                game.tetromino.move_horizontal(-1)
+            elif action == RIGHT:
+                game.tetromino.move_horizontal(1)
+            elif action == ROTATE:
+                game.tetromino.rotate()
+            elif action == DOWN:
+                game.move_down()
+            if game.game_active:
+                game.move_down()  # Gravity tick
+    results.append(('scalar_loop', boards * steps / (perf_counter() - start), 'boards/s'))
+
+    for boards in (256, 4096, 16384):
+        env = BatchEnv(boards, seed=0)
+        actions = rng.integers(0, len(BATCH_ACTIONS), (steps, boards))
+        start = perf_counter()
+        for step_actions in actions:
+            observations, rewards, done = env.step(step_actions)
+            if done.any():
+                env.reset(np.flatnonzero(done))
+        results.append((f'batch_env_n{boards}', boards * steps / (perf_counter() - start), 'boards/s'))
+    return results
+
+
+def vector_rotate(positions, field_data):
+    """The old rotation path: pygame.Vector2.rotate(90) around the first block."""
+    import pygame
+    pivot = positions[0]
+    rotated = [pivot + (pos - pivot).rotate(90) for pos in positions]
+    for pos in rotated:
+        if pos.x < 0 or pos.x >= COLUMNS or pos.y >= ROWS:
+            return False
+        if field_data[int(pos.y)][int(pos.x)]:
+            return False
+    positions[:] = rotated
+    return True
+
+
+def check_rotations(boards=50, seed=0):
+    """Property check: every rotation result is an integer, non-colliding placement.
+
+    Tries every shape, orientation, direction and pivot position on random
+    boards and returns the number of rotations checked.
+    """
+    from random import Random
+    from board import KICKS
+
+    rng = Random(seed)
+    checked = 0
+    for i in range(boards):
+        board = Board()
+        fill_stack(board, rng.randrange(ROWS - 4), rng.randrange(COLUMNS))
+        for row in range(ROWS):
+            board.row_bits[row] &= rng.getrandbits(COLUMNS)  # Random holes
+        for shape in KICKS:
+            for rotation in range(len(PIECES[shape])):
+                for x in range(-2, COLUMNS + 2):
+                    for y in range(-2, ROWS + 2):
+                        if board.collides(shape, rotation, x, y):
+                            continue  # Only legal placements can be rotated
+                        for direction in (1, -1):
+                            turned = board.rotate(shape, rotation, x, y, direction)
+                            checked += 1
+                            if turned is None:
+                                continue
+                            new_rotation, new_x, new_y = turned
+                            assert all(type(value) is int for value in turned), turned
+                            assert new_rotation == (rotation + direction) % 4
+                            assert not board.collides(shape, new_rotation, new_x, new_y)
+                            cells = PIECES[shape][new_rotation].cells
+                            assert all(type(dx) is int and type(dy) is int for dx, dy in cells)
+    return checked
+
+
+# Known SRS turns on an empty board, in cells (x right, y down): shape, SRS
+# state (0, 1 = R, 2, 3 = L), cells before, direction, cells after
+FLOOR = ROWS - 1
+SRS_CASES = [
+    # In place: T turns around the center of its box, not around a block
+    ('T', 0, [(4, 10), (3, 11), (4, 11), (5, 11)], 1, [(4, 10), (4, 11), (5, 11), (4, 12)]),
+    # Floor kicks: J/L/T flat on the floor need test 3 (-1, +1) for 0 -> R
+    ('J', 0, [(3, FLOOR - 1), (3, FLOOR), (4, FLOOR), (5, FLOOR)], 1,
+     [(3, FLOOR - 2), (4, FLOOR - 2), (3, FLOOR - 1), (3, FLOOR)]),
+    ('L', 0, [(5, FLOOR - 1), (3, FLOOR), (4, FLOOR), (5, FLOOR)], 1,
+     [(3, FLOOR - 2), (3, FLOOR - 1), (3, FLOOR), (4, FLOOR)]),
+    ('T', 0, [(4, FLOOR - 1), (3, FLOOR), (4, FLOOR), (5, FLOOR)], 1,
+     [(3, FLOOR - 2), (3, FLOOR - 1), (4, FLOOR - 1), (3, FLOOR)]),
+    # ... and test 3 (+1, +1) for 0 -> L
+    ('J', 0, [(3, FLOOR - 1), (3, FLOOR), (4, FLOOR), (5, FLOOR)], -1,
+     [(5, FLOOR - 2), (5, FLOOR - 1), (5, FLOOR), (4, FLOOR)]),
+    # I flat on the floor: only test 5 (+1, +2) fits for 0 -> R
+    ('I', 0, [(3, FLOOR), (4, FLOOR), (5, FLOOR), (6, FLOOR)], 1,
+     [(6, FLOOR - 3), (6, FLOOR - 2), (6, FLOOR - 1), (6, FLOOR)]),
+    # I upright against the left wall: test 3 (+2, 0) for R -> 2
+    ('I', 1, [(0, 10), (0, 11), (0, 12), (0, 13)], 1, [(0, 12), (1, 12), (2, 12), (3, 12)]),
+    # J upright against the right wall: test 2 (-1, 0) for L -> 0
+    ('J', 3, [(COLUMNS - 1, 10), (COLUMNS - 1, 11), (COLUMNS - 1, 12), (COLUMNS - 2, 12)], 1,
+     [(COLUMNS - 3, 10), (COLUMNS - 3, 11), (COLUMNS - 2, 11), (COLUMNS - 1, 11)]),
+]
+
+
+def check_srs_kicks():
+    """Checks Board.rotate against known SRS turns, returns the number of cases."""
+    from board import SRS_STATES
+
+    def cells(shape, rotation, x, y):
+        return sorted((x + dx, y + dy) for dx, dy in PIECES[shape][rotation].cells)
+
+    board = Board()
+    for shape, state, before, direction, after in SRS_CASES:
+        # The orientation in that SRS state, at the pivot that covers `before`
+        rotation = [state for state, offset in SRS_STATES[shape]].index(state)
+        piece = PIECES[shape][rotation]
+        x = min(cx for cx, cy in before) - piece.left
+        y = min(cy for cx, cy in before) - min(dy for dx, dy in piece.cells)
+        assert cells(shape, rotation, x, y) == sorted(before), (shape, state)
+        turned = board.rotate(shape, rotation, x, y, direction)
+        assert turned and cells(shape, *turned) == sorted(after), (shape, state, direction, turned)
+    return len(SRS_CASES)
+
+
+@benchmark('rotate')
+def bench_rotate(number=100000):
+    """Cost of one rotation: old Vector2 path vs table lookup (+ wall kicks)."""
+    import pygame
+
+    board = Board()
+    fill_stack(board, 8)
+    field_data = [[board.colors[y * COLUMNS + x] for x in range(COLUMNS)] for y in range(ROWS)]
+    positions = [pygame.Vector2(pos) + (5, 5) for pos in TETROMINOS['T']['shape']]
+
+    turn = [0]
+
+    def table_rotate():
+        turn[0] = board.rotate('T', turn[0], 5, 5)[0]
+
+    # A vertical I piece flush against the right wall only turns with a kick
+    def kicked_rotate():
+        board.rotate('I', 0, COLUMNS - 1, 5)
+
+    results = [
+        ('vector2_rotate', measure(lambda: vector_rotate(positions, field_data), number) * 1e6, 'us'),
+        ('table_rotate', measure(table_rotate, number) * 1e6, 'us'),
+        ('table_rotate_wall_kick', measure(kicked_rotate, number) * 1e6, 'us'),
+    ]
+    results.append(('property_cases', check_rotations(), 'checked'))
+    results.append(('srs_cases', check_srs_kicks(), 'checked'))
+    return results
+
+
+def rough_stack(board, height, seed=0):
+    """Fills the bottom `height` rows with random cells (never a full row)."""
+    from random import Random
+    rng = Random(seed)
+    for row in range(board.rows - height, board.rows):
+        bits = rng.getrandbits(board.columns) & ~(1 << rng.randrange(board.columns))
+        board.row_bits[row] = bits
+        for x in range(board.columns):
+            if bits >> x & 1:
+                board.colors[row * board.columns + x] = 1
+    board.recompute_features()
+
+
+@benchmark('placements')
+def bench_placements(number=200):
+    """Time to enumerate every reachable placement of a piece (average over shapes)."""
+    results = []
+    for label, height in (('empty', 0), ('mid', 10), ('near_top', 17)):
+        board = Board()
+        rough_stack(board, height, seed=height)
+        shapes = list(TETROMINOS.keys())
+        count = sum(len(board.placements(shape)) for shape in shapes) / len(shapes)
+        seconds = measure(lambda: [board.placements(shape) for shape in shapes], number) / len(shapes)
+        results.append((f'placements_{label}', seconds * 1e3, 'ms'))
+        results.append((f'placements_{label}_count', count, 'per piece'))
+    return results
+
+
+@benchmark('features')
+def bench_features(number=20000):
+    """Reading heights/holes/wells from the incremental counters vs rescanning the board."""
+    board = Board()
+    rough_stack(board, 12, seed=1)
+
+    def incremental():
+        return board.aggregate_height, board.holes, board.bumpiness, board.well_depths
+
+    def rescan():
+        board.recompute_features()
+        return incremental()
+
+    return [('features_incremental', measure(incremental, number) * 1e6, 'us'),
+            ('features_rescan', measure(rescan, number) * 1e6, 'us')]
+
+
+@benchmark('ai')
+def bench_ai(pieces=100):
+    """Search speed and transposition table hit rate of the AI player, per lookahead depth."""
+    from ai import AIPlayer
+    from headless import Simulation
+
+    results = []
+    for depth in (1, 2, 3):
+        ai = AIPlayer(depth, moves_per_frame=4)
+        simulation = Simulation(0)
+        while simulation.game.game_active and simulation.pieces <= pieces:
+            ai.update(simulation.game, simulation.next_shapes)
+            simulation.step(())
+        results.append((f'nodes_per_sec_depth{depth}', ai.nodes_per_sec, 'nodes/s'))
+        results.append((f'ms_per_move_depth{depth}', ai.seconds / (simulation.pieces - 1) * 1e3, 'ms'))
+        table = ai.search.table
+        results.append((f'table_hit_rate_depth{depth}', 100 * table.hits / (table.hits + table.misses), '%'))
+    return results
+
+
+def offscreen_display():
+    """Opens the game window on SDL's dummy video driver (no real window)."""
+    import os
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    pygame.init()
+    return pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+
+
+@benchmark('tiles')
+def bench_tiles(pieces=10000):
+    """Surface allocations and Python memory growth over a 10,000-piece session."""
+    import tracemalloc
+    import pygame
+    from random import Random
+    from game import Game
+
+    offscreen_display()
+    rng = Random(0)
+    shapes = list(TETROMINOS.keys())
+    game = Game(lambda: rng.choice(shapes), lambda lines, score, level: None)
+    game.run()  # First frame builds the cached layers and the atlas
+
+    # Count every Surface created while pieces are played
+    allocations = 0
+    surface_class = pygame.Surface
+
+    class CountingSurface(surface_class):
+        def __init__(self, *args, **kwargs):
+            nonlocal allocations
+            allocations += 1
+            super().__init__(*args, **kwargs)
+
+    pygame.Surface = CountingSurface
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    try:
+        for i in range(pieces):
+            # Keep the stack low so the session never reaches game over
+            if game.board.row_counts[game.board.rows // 2]:
+                game.board.reset()
+                game.stack_stale = True
+            piece = game.tetromino
+            amount = rng.randrange(-4, 5)
+            for move in range(abs(amount)):
+                piece.move_horizontal(1 if amount > 0 else -1)
+            while game.tetromino is piece:
+                piece.move_down()
+            game.run()
+        end_memory = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+        pygame.Surface = surface_class
+
+    return [('surfaces_per_piece', allocations / pieces, 'allocs'),
+            ('python_memory_growth', (end_memory - start_memory) / 1024, 'KiB')]
+
+
+@benchmark('frame')
+def bench_frame(frames=2000):
+    """Game.run frame time on the dummy video driver for growing stack heights."""
+    from randomizer import PieceGenerator
+    from timer import VirtualClock
+    from game import Game
+
+    offscreen_display()
+    results = []
+    for height in (0, 8, 16):
+        pieces = PieceGenerator(seed=0)
+        # The virtual clock never moves: no gravity, the stack keeps its height
+        game = Game(pieces.next, lambda lines, score, level: None, clock=VirtualClock())
+        rough_stack(game.board, height, seed=height)
+        game.stack_stale = True
+        game.run(())  # First frame builds the stack layer
+        piece = game.tetromino
+        moves = [-1, 1]
+
+        def moving():
+            moves.reverse()
+            piece.move_horizontal(moves[0])  # Piece and ghost cells change every frame
+            game.run(())
+
+        def redraw():
+            game.redraw_all = True
+            game.run(())
+
+        results.append((f'frame_idle_h{height}', measure(lambda: game.run(()), frames) * 1e6, 'us'))
+        results.append((f'frame_moving_h{height}', measure(moving, frames) * 1e6, 'us'))
+        results.append((f'frame_full_redraw_h{height}', measure(redraw, frames // 4) * 1e6, 'us'))
+    return results
+
+
+@benchmark('scale')
+def bench_scale(frames=300, size=(3840, 2160)):
+    """Frame cost at 4K: native scaled rendering vs scaling a 1x frame up every frame."""
+    from main import Main
+    from layout import Layout
+    from timer import VirtualClock
+    import pygame
+
+    offscreen_display()
+    start = perf_counter()
+    main = Main(seed=0, window_size=size, game_clock=VirtualClock())  # No gravity: a steady frame
+    main.draw_frame(set())
+    results = [('first_frame_4k', (perf_counter() - start) * 1e3, 'ms')]
+
+    # Re-layout on a window resize: new tiles, grid layers, fonts and images, then cached
+    for label in ('cold', 'warm'):
+        start = perf_counter()
+        main.resize((2560, 1440))
+        main.resize(size)
+        results.append((f'resize_{label}', (perf_counter() - start) / 2 * 1e3, 'ms'))
+    main.draw_frame(set())
+
+    piece = main.game.tetromino
+    moves = [-1, 1]
+
+    def moving():
+        moves.reverse()
+        piece.move_horizontal(moves[0])
+        main.draw_frame(set())
+
+    def redraw():
+        main.game.redraw_all = True
+        main.score.drawn = None
+        main.preview.drawn_shapes = [None] * PREVIEW_COUNT
+        main.draw_frame(set())
+
+    results.append(('frame_moving_4k', measure(moving, frames) * 1e3, 'ms'))
+    results.append(('frame_full_redraw_4k', measure(redraw, frames // 10) * 1e3, 'ms'))
+
+    # The rejected approach: render at 1x, then scale the whole window every frame
+    small = pygame.Surface(Layout().window_size)
+    display = pygame.display.get_surface()
+
+    def naive():
+        pygame.transform.scale(small, size, display)
+        pygame.display.update()
+
+    results.append(('naive_scale_per_frame_4k', measure(naive, frames // 10) * 1e3, 'ms'))
+    results.append(('frame_budget', 1000 / FPS, 'budget ms'))  # For reading the numbers above
+    return results
+
+
+@benchmark('board_size')
+def bench_board_size(number=50, window=(1920, 1080)):
+    """Lock, clear and frame cost on the board variants, drawn into a 1080p window."""
+    from randomizer import PieceGenerator
+    from layout import fit_layout
+    from timer import VirtualClock
+    from game import Game
+
+    offscreen_display()
+    results = []
+    for name, (columns, rows) in BOARD_SIZES.items():
+        pieces = PieceGenerator(seed=0)
+        game = Game(pieces.next, lambda lines, score, level: None, clock=VirtualClock(),
+                    layout=fit_layout(window, columns, rows), columns=columns, rows=rows)
+        board = game.board
+        fill_stack(board, rows // 2)  # Half full, column 0 open
+        state = snapshot(board)
+        game.stack_stale = True
+        game.run(())
+        piece = game.tetromino
+        moves = [-1, 1]
+
+        def lock_and_clear():
+            restore(board, state)
+            board.lock('I', 0, 0, rows - 2)
+            board.clear_rows()
+
+        def moving():
+            moves.reverse()
+            piece.move_horizontal(moves[0])
+            game.run(())
+
+        # A full frame with a 4 line clear: lock, clear, scoring, stack layer and redraw
+        def clear_frame():
+            restore(board, state)
+            game.current_lines = 0
+            game.locked_cells = set()
+            board.lock('I', 0, 0, rows - 2)
+            game.checked_finsihed_rows()
+            game.run(())
+
+        base = measure(lambda: restore(board, state), number * 10)
+        results.append((f'lock_clear_{name}', (measure(lock_and_clear, number * 10) - base) * 1e6, 'us'))
+        results.append((f'frame_moving_{name}', measure(moving, number) * 1e3, 'ms'))
+        results.append((f'frame_clear_{name}', measure(clear_frame, number) * 1e3, 'ms'))
+    return results
+
+
+@benchmark('render')
+def bench_render(number=2000):
+    """Score.run and Preview.run cost, with and without a change to draw."""
+    from score import Score
+    from preview import Preview
+
+    offscreen_display()
+    score = Score()
+    preview = Preview()
+    score.run()
+    queues = [['I', 'O', 'T'], ['S', 'Z', 'L']]
+    preview.run(queues[0])
+
+    def score_changed():
+        score.score += 40  # New text every call
+        score.run()
+
+    def preview_changed():
+        queues.reverse()  # Every slot changes
+        preview.run(queues[0])
+
+    return [('score_changed', measure(score_changed, number) * 1e6, 'us'),
+            ('score_unchanged', measure(score.run, number) * 1e6, 'us'),
+            ('preview_changed', measure(preview_changed, number) * 1e6, 'us'),
+            ('preview_unchanged', measure(lambda: preview.run(queues[0]), number) * 1e6, 'us')]
+
+
+@benchmark('game')
+def bench_game(games=4, max_frames=20000):
+    """Full headless games with fixed seeds and the random self-play policy."""
+    from headless import Simulation
+    from selfplay import random_policy
+
+    frames = pieces = 0
+    start = perf_counter()
+    for seed in range(games):
+        simulation = Simulation(seed)
+        while simulation.game.game_active and simulation.frames < max_frames:
+            simulation.step(random_policy(simulation))
+        frames += simulation.frames
+        pieces += simulation.pieces
+    seconds = perf_counter() - start
+    return [('simulated_frames', frames / seconds, 'frames/s'),
+            ('simulated_pieces', pieces / seconds, 'pieces/s'),
+            ('frames_played', frames, 'frames')]  # Same for every run of the same code
+
+
+@benchmark('profiler')
+def bench_profiler(frames=20000):
+    """Per-frame cost of the profiler: all stage marks plus start/end of frame."""
+    from profiler import Profiler, STAGES
+
+    offscreen_display()  # The overlay needs pygame's font module
+    profiler = Profiler()
+
+    def frame():
+        profiler.start_frame()
+        for stage in STAGES:
+            profiler.mark(stage)
+        profiler.end_frame(16)
+
+    results = [('instrumented_frame', measure(frame, frames) * 1e6, 'us')]
+    start = perf_counter()
+    summary = profiler.summary()
+    results.append(('summary_full_ring', (perf_counter() - start) * 1e3, 'ms'))
+    start = perf_counter()
+    profiler.render_overlay()
+    results.append(('overlay_refresh', (perf_counter() - start) * 1e3, 'ms'))
+    return results
+
+
+@benchmark('telemetry')
+def bench_telemetry(sessions=1000, recorded=8):
+    """Game thread cost of the telemetry hooks, writer throughput and offline aggregation."""
+    import os
+    import shutil
+    import tempfile
+    from headless import Simulation
+    from selfplay import random_policy
+    from telemetry import Telemetry, summarize
+
+    directory = tempfile.mkdtemp()
+    try:
+        # Game thread: what every frame and every lock adds (the writer never flushes here)
+        game = headless_game()
+        telemetry = Telemetry(os.path.join(directory, 'hooks.tlog'), game, flush_interval=3600)
+        def frame():
+            telemetry.pressed()
+            telemetry.frame(16.0)
+
+        results = [('frame_hooks', measure(frame, 20000) * 1e6, 'us')]
+        results.append(('piece_event', measure(lambda: telemetry.placed('T', 1), 2000) * 1e6, 'us'))
+        # Writer thread: encoding and compressing the events buffered above
+        start = perf_counter()
+        events = len(telemetry.ring)
+        telemetry.close()
+        results.append(('writer', events / (perf_counter() - start), 'events/s'))
+
+        # Offline: a few recorded random games copied into many session logs
+        for seed in range(recorded):
+            simulation = Simulation(seed)
+            telemetry = Telemetry(os.path.join(directory, f'{seed}.tlog'), simulation.game, seed)
+            while simulation.game.game_active:
+                simulation.step(random_policy(simulation))
+            telemetry.close()
+        for i in range(recorded, sessions):
+            shutil.copy(os.path.join(directory, f'{i % recorded}.tlog'), os.path.join(directory, f'{i}.tlog'))
+        os.remove(os.path.join(directory, 'hooks.tlog'))
+        start = perf_counter()
+        summary = summarize([directory])
+        seconds = perf_counter() - start
+        results.append(('aggregate', summary.sessions / seconds, 'sessions/s'))
+        results.append(('aggregate_pieces', summary.pieces / seconds, 'pieces/s'))
+    finally:
+        shutil.rmtree(directory)
+    return results
+
+
+@benchmark('latency')
+def bench_latency(presses=60):
+    """Input to simulation and input to photon latency of injected key presses."""
+    offscreen_display()
+    from latency import measure_latency
+    results = []
+    for mode, poll in (('idle', False), ('poll', True)):
+        summary = measure_latency(presses, gap=(0.02, 0.08), poll=poll).summary()
+        for name, stats in summary.items():
+            for stat in ('p50', 'p95'):
+                results.append((f'{mode}_{name}_{stat}', stats[stat], 'ms'))
+    return results
+
+
+# Started in a fresh interpreter: imports, window, first frame drawn
+STARTUP_SCRIPT = """
+from time import perf_counter
+start = perf_counter()
+from main import Main
+main = Main(seed=0)
+main.draw_frame()
+print(perf_counter() - start)
+"""
+
+
+@benchmark('startup')
+def bench_startup(runs=5):
+    """Time to the first frame with a cold and a warm asset cache, plus image load cost."""
+    import os
+    import subprocess
+    import sys
+    import assets
+    import pygame
+
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy')
+
+    def first_frame():
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=assets.ASSET_DIR,
+                                env=env, capture_output=True, text=True, check=True).stdout
+        return float(output.split()[-1])  # pygame may print its banner first
+
+    cold = []
+    for i in range(runs):
+        assets.clear_cache()
+        cold.append(first_frame())
+    warm = [first_frame() for i in range(runs)]  # The last cold run filled the cache
+    results = [('first_frame_cold_cache', min(cold) * 1e3, 'ms'),
+               ('first_frame_warm_cache', min(warm) * 1e3, 'ms')]
+
+    # Only the seven preview images: PNG decoding vs the raw pixel cache
+    offscreen_display()
+    names = [f'{shape}.png' for shape in TETROMINOS]
+
+    # Both start from an empty IMAGES dict and are averaged over the same runs
+    def decode_all():
+        assets.IMAGES.clear()
+        for name in names:
+            pygame.image.load(assets.asset_path(name)).convert_alpha()
+
+    def load_all():
+        assets.IMAGES.clear()
+        for name in names:
+            assets.load_image(name)
+
+    results.append(('images_png_decode', measure(decode_all, 20) * 1e3, 'ms'))
+    load_all()  # Makes sure the cache is filled
+    results.append(('images_from_cache', measure(load_all, 20) * 1e3, 'ms'))
+    return results
+
+
+# --- Results & Baselines ---
+def run(names=None):
+    """Runs the selected benchmarks (all by default), prints and returns the results.
+
+    Results are keyed 'benchmark.result' and hold the value and its unit.
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        for result_name, value, unit in BENCHMARKS[name]():
+            print(f'{name:>10}  {result_name:<32} {value:10.3f} {unit}')
+            results[f'{name}.{result_name}'] = {'value': value, 'unit': unit}
+    return results
+
+
+def save(results, path):
+    """Writes results as JSON (also the format of a baseline)."""
+    import json
+    import platform
+    with open(path, 'w') as file:
+        json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                   'results': results}, file, indent=1)
+
+
+def compare(results, path, tolerance=TOLERANCE):
+    """Compares results with a saved baseline, returns the regressed result names."""
+    import json
+    with open(path) as file:
+        baseline = json.load(file)['results']
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        unit = result['unit']
+        if not old or old['unit'] != unit or not old['value']:
+            continue  # New result, or one that cannot be compared
+        if unit == 'us' and max(old['value'], result['value']) < NOISE_FLOOR_US:
+            continue  # Sub-microsecond timings mostly measure timer noise
+        change = result['value'] / old['value'] - 1
+        if unit in LOWER_IS_BETTER:
+            worse = change > tolerance
+        elif unit in HIGHER_IS_BETTER:
+            worse = change < -tolerance
+        else:
+            continue
+        if worse:
+            regressions.append(key)
+            print(f'REGRESSION {key}: {old["value"]:.3f} -> {result["value"]:.3f} {unit} ({change:+.0%})')
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+    parser = argparse.ArgumentParser(description='Run the benchmarks and compare them with a baseline.')
+    parser.add_argument('names', nargs='*', help=f'benchmarks to run (default: all of {", ".join(BENCHMARKS)})')
+    parser.add_argument('--json', help='write the results to this JSON file')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline compared against, if it exists')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='allowed slowdown, e.g. 0.25')
+    args = parser.parse_args()
+
+    results = run(args.names)
+    if args.json:
+        save(results, args.json)
+    if args.save_baseline:
+        save(results, args.baseline)
+    elif os.path.exists(args.baseline) and compare(results, args.baseline, args.tolerance):
+        sys.exit(1)  # Fails loudly, e.g. in CI
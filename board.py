@@ -0,0 +1,560 @@
+from setting import *  # Imports grid size, spawn offset, TETROMINOS and the actions
+from operator import sub
+
+
+# --- Shape Lookup Tables ---
+# Every shape gets a small integer id so the board can store colors in a
+# compact byte array (0 = empty cell, 1..7 = shape that locked there, 8 =
+# garbage row received in versus mode)
+GARBAGE = 'garbage'
+SHAPE_NAMES = [None] + list(TETROMINOS.keys()) + [GARBAGE]
+SHAPE_IDS = {shape: i for i, shape in enumerate(SHAPE_NAMES) if shape}
+SHAPE_COLORS = [None] + [TETROMINOS[shape]['color']
+                         for shape in SHAPE_NAMES[1:-1]] + [GARBAGE_COLOR]
+
+
+def rotate_offsets(offsets):
+    """Rotates (x, y) offsets by 90 degrees around the pivot (0, 0)."""
+    # Same result as pygame.Vector2.rotate(90), but in exact integers
+    return [(-y, x) for x, y in offsets]
+
+
+class PieceRotation:
+    """Precomputed cell offsets and row bitmasks for one shape orientation."""
+    __slots__ = ('cells', 'left', 'right', 'rows')
+
+    def __init__(self, cells):
+        self.cells = tuple(cells)  # (dx, dy) offsets from the pivot
+        self.left = min(dx for dx, dy in cells)   # Leftmost column offset
+        self.right = max(dx for dx, dy in cells)  # Rightmost column offset
+
+        # One bitmask per occupied row, with bit 0 = leftmost column of the piece
+        masks = {}
+        for dx, dy in cells:
+            masks[dy] = masks.get(dy, 0) | 1 << (dx - self.left)
+        self.rows = tuple(sorted(masks.items()))  # ((dy, mask), ...)
+
+
+def build_pieces():
+    """Builds the rotation tables for every shape once at import time."""
+    pieces = {}
+    for shape, data in TETROMINOS.items():
+        cells = list(data['shape'])
+        rotations = [PieceRotation(cells)]
+        # The O piece never rotates, every other piece has 4 orientations
+        if shape != 'O':
+            for i in range(3):
+                cells = rotate_offsets(cells)
+                rotations.append(PieceRotation(cells))
+        pieces[shape] = rotations
+    return pieces
+
+
+PIECES = build_pieces()
+
+
+# --- SRS Wall Kicks ---
+# Offsets tried in order when a rotation collides in place, written the way
+# the SRS guideline lists them (x right, y UP). The rows are indexed by SRS
+# state: 0 is the guideline spawn orientation and every +1 is a clockwise
+# quarter turn (0 -> R -> 2 -> L).
+SRS_KICKS = {
+    (0, 1): [(0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)],
+    (1, 0): [(0, 0), (1, 0), (1, -1), (0, 2), (1, 2)],
+    (1, 2): [(0, 0), (1, 0), (1, -1), (0, 2), (1, 2)],
+    (2, 1): [(0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)],
+    (2, 3): [(0, 0), (1, 0), (1, 1), (0, -2), (1, -2)],
+    (3, 2): [(0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)],
+    (3, 0): [(0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)],
+    (0, 3): [(0, 0), (1, 0), (1, 1), (0, -2), (1, -2)],
+}
+SRS_KICKS_I = {
+    (0, 1): [(0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)],
+    (1, 0): [(0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)],
+    (1, 2): [(0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)],
+    (2, 1): [(0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)],
+    (2, 3): [(0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)],
+    (3, 2): [(0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)],
+    (3, 0): [(0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)],
+    (0, 3): [(0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)],
+}
+
+
+# Cells of every shape in SRS state 0 inside its bounding box (x right, y
+# down like the board). SRS turns a piece around the center of that box.
+SRS_SPAWN = {
+    'T': [(1, 0), (0, 1), (1, 1), (2, 1)],
+    'J': [(0, 0), (0, 1), (1, 1), (2, 1)],
+    'L': [(2, 0), (0, 1), (1, 1), (2, 1)],
+    'S': [(1, 0), (2, 0), (0, 1), (1, 1)],
+    'Z': [(0, 0), (1, 0), (1, 1), (2, 1)],
+    'I': [(0, 1), (1, 1), (2, 1), (3, 1)],
+}
+
+
+def srs_boxes(shape):
+    """Returns the box cells of the four SRS states of a shape (0, R, 2, L)."""
+    size = 4 if shape == 'I' else 3
+    cells = SRS_SPAWN[shape]
+    states = []
+    for state in range(4):
+        states.append(set(cells))
+        cells = [(size - 1 - y, x) for x, y in cells]  # Clockwise around the box center
+    return states
+
+
+def box_offset(cells, box):
+    """Returns the (dx, dy) that moves pivot offsets onto box cells, None if the shapes differ."""
+    dx = min(x for x, y in box) - min(x for x, y in cells)
+    dy = min(y for x, y in box) - min(y for x, y in cells)
+    return (dx, dy) if {(x + dx, y + dy) for x, y in cells} == box else None
+
+
+def build_srs_states():
+    """Finds the SRS state of every orientation and where its pivot sits in the SRS box.
+
+    The spawn orientations here are not all SRS state 0 (J spawns as state
+    L, L as R, T upside down as 2), and pieces turn around a block instead
+    of the box center. Returns SRS_STATES[shape] = [(state, (dx, dy)), ...]
+    per orientation. S, Z and I look the same in two states: the first
+    match in 0, R, 2, L order is used.
+    """
+    states = {}
+    for shape, rotations in PIECES.items():
+        if len(rotations) == 1:
+            continue  # The O piece has one orientation and never kicks
+        boxes = srs_boxes(shape)
+        spawn = next(state for state in range(4) if box_offset(rotations[0].cells, boxes[state]))
+        states[shape] = []
+        for rotation, piece in enumerate(rotations):
+            state = (spawn + rotation) % 4  # Both turn clockwise with +1
+            states[shape].append((state, box_offset(piece.cells, boxes[state])))
+    return states
+
+
+SRS_STATES = build_srs_states()
+
+
+def build_kicks():
+    """Builds KICKS[shape][rotation][direction] once at import time.
+
+    A piece at pivot (x, y) sits in the SRS box at (x, y) - offset. SRS
+    turns it around the box center and then tries the kicks, so the pivot
+    moves by kick + new offset - old offset, which is what the table holds.
+    """
+    kicks = {}
+    for shape, states in SRS_STATES.items():
+        table = SRS_KICKS_I if shape == 'I' else SRS_KICKS
+        kicks[shape] = []
+        for rotation, (state, (x, y)) in enumerate(states):
+            turns = {}
+            for direction in (1, -1):  # Clockwise, counter-clockwise
+                target, (target_x, target_y) = states[(rotation + direction) % 4]
+                # Flip y: the board's rows grow downwards
+                turns[direction] = tuple((dx + target_x - x, -dy + target_y - y)
+                                         for dx, dy in table[state, target])
+            kicks[shape].append(turns)
+    return kicks
+
+
+KICKS = build_kicks()
+
+# Placement search looks at pivot rows from SEARCH_TOP rows above the board
+SEARCH_TOP = 4
+# Actions of one search step (shared tuples, nothing is allocated per step)
+LEFT_STEP, RIGHT_STEP, ROTATE_STEP, DOWN_STEP = (LEFT,), (RIGHT,), (ROTATE,), (DOWN,)
+
+
+class Board:
+    """Headless playfield: one integer bitmask per row plus a color array."""
+
+    def __init__(self, columns=COLUMNS, rows=ROWS):
+        # --- Geometry ---
+        self.columns = columns
+        self.rows = rows
+        self.full_row = (1 << columns) - 1  # Bitmask of a completely filled row
+
+        # Spawn position of the pivot block (centered X, just above the board)
+        self.spawn_x = columns // 2
+        self.spawn_y = int(BLOCK_OFFSET.y)
+
+        self.reset()
+
+    def reset(self):
+        """Empties every row of the board."""
+        # Row Bits: bit x of row_bits[y] is set when cell (x, y) is occupied
+        self.row_bits = [0] * self.rows
+        # Row Counts: number of filled cells per row, a row is full at `columns`
+        self.row_counts = [0] * self.rows
+        # Colors: shape id per cell, only needed for rendering
+        self.colors = bytearray(self.columns * self.rows)
+        self.touched_rows = []  # Rows written by the last lock, the only ones that can fill up
+        self.topped_out = False  # Set when a piece locks above the visible field
+
+        # Column Features: kept up to date by lock() and clear_rows(), so
+        # heuristics never rescan the cells
+        self.heights = [0] * self.columns        # Height of the highest block per column
+        self.column_counts = [0] * self.columns  # Filled cells per column
+        self.filled = 0                          # Filled cells on the whole board
+
+    def copy(self):
+        """Returns an independent copy of the board (for searches and lookahead)."""
+        board = Board.__new__(Board)
+        board.__dict__.update(self.__dict__)
+        board.row_bits = self.row_bits[:]
+        board.row_counts = self.row_counts[:]
+        board.colors = self.colors[:]
+        board.touched_rows = self.touched_rows[:]
+        board.heights = self.heights[:]
+        board.column_counts = self.column_counts[:]
+        return board
+
+    def recompute_features(self):
+        """Rebuilds row counts and column features from row_bits (after direct edits)."""
+        columns = self.columns
+        self.row_counts = [bin(bits).count('1') for bits in self.row_bits]
+        self.heights = [0] * columns
+        self.column_counts = [0] * columns
+        for y, bits in enumerate(self.row_bits):
+            for x in range(columns):
+                if bits >> x & 1:
+                    self.column_counts[x] += 1
+                    if not self.heights[x]:
+                        self.heights[x] = self.rows - y
+        self.filled = sum(self.row_counts)
+
+    # --- Board Features (read-only, derived from the incremental counters) ---
+    @property
+    def aggregate_height(self):
+        """Sum of all column heights."""
+        return sum(self.heights)
+
+    @property
+    def holes(self):
+        """Empty cells with a block somewhere above them in the same column."""
+        return sum(self.heights) - self.filled
+
+    def column_holes(self, x):
+        """Number of holes in column x."""
+        return self.heights[x] - self.column_counts[x]
+
+    @property
+    def bumpiness(self):
+        """Sum of the height differences between neighbouring columns."""
+        heights = self.heights
+        return sum(map(abs, map(sub, heights, heights[1:])))
+
+    @property
+    def well_depths(self):
+        """Per column: how far it lies below its lower neighbour (walls count as full)."""
+        padded = [self.rows] + self.heights + [self.rows]
+        return [max(0, min(left, right) - height)
+                for left, height, right in zip(padded, padded[1:], padded[2:])]
+
+    def collides(self, shape, rotation, x, y):
+        """Checks walls, floor and locked cells for a piece at pivot (x, y)."""
+        piece = PIECES[shape][rotation]
+        left = x + piece.left
+        if left < 0 or x + piece.right >= self.columns:
+            return True  # Hits a side wall
+
+        row_bits = self.row_bits
+        for dy, mask in piece.rows:
+            row = y + dy
+            if row >= self.rows:
+                return True  # Hits the floor
+            if row >= 0 and row_bits[row] & mask << left:
+                return True  # Hits an existing block
+        return False
+
+    def drop_y(self, shape, rotation, x, y):
+        """Returns the lowest pivot row the piece can fall to from (x, y)."""
+        while not self.collides(shape, rotation, x, y + 1):
+            y += 1
+        return y
+
+    def rotate(self, shape, rotation, x, y, direction=1):
+        """Tries to turn a piece, testing the wall kicks in order.
+
+        Returns the new (rotation, x, y), or None if every kick collides.
+        """
+        turns = KICKS.get(shape)
+        if turns is None:
+            return None  # The O piece never rotates
+        new_rotation = (rotation + direction) % len(turns)
+        for dx, dy in turns[rotation][direction]:
+            if not self.collides(shape, new_rotation, x + dx, y + dy):
+                return new_rotation, x + dx, y + dy
+        return None
+
+    def spawn_blocked(self, shape):
+        """Checks if a new piece has no room to enter the board."""
+        # The piece needs room for its first step down from the spawn point
+        return self.collides(shape, 0, self.spawn_x, self.spawn_y + 1)
+
+    # --- Placement Search ---
+    def fit_masks(self, shape):
+        """Returns fits[rotation][x], a bitmask over pivot rows where the piece fits.
+
+        Bit (y + SEARCH_TOP) is set when the piece at pivot (x, y) passes the
+        same wall, floor and stack tests as collides(), so the search below
+        tests a position with one shift and AND.
+        """
+        columns = self.columns
+        # Column bitmasks of blocked cells: bit (y + SEARCH_TOP) per row, plus the floor
+        floor = 0b1111 << (self.rows + SEARCH_TOP)
+        cols = [floor] * columns
+        for y, bits in enumerate(self.row_bits):
+            bit = 1 << (y + SEARCH_TOP)
+            while bits:
+                low = bits & -bits  # Lowest occupied column of the row
+                cols[low.bit_length() - 1] |= bit
+                bits ^= low
+        inside = (1 << (self.rows + SEARCH_TOP)) - 1  # Pivot rows -SEARCH_TOP .. rows - 1
+
+        fits = []
+        for piece in PIECES[shape]:
+            # The pivot is always one of the cells, so pivot x stays on the board
+            fit = [0] * columns
+            for x in range(-piece.left, columns - piece.right):
+                blocked = 0
+                for dx, dy in piece.cells:
+                    # Shift the column so bit (y + SEARCH_TOP) holds cell (x + dx, y + dy)
+                    blocked |= cols[x + dx] >> dy if dy >= 0 else cols[x + dx] << -dy
+                fit[x] = ~blocked & inside
+            fits.append(fit)
+        return fits
+
+    def placements(self, shape, rotation=0, x=None, y=None):
+        """Enumerates every resting placement the piece can reach from the spawn point.
+
+        Breadth-first search over (rotation, x, y) using LEFT, RIGHT, ROTATE
+        (with wall kicks) and DOWN, so tucks under overhangs and kicked spins
+        are found too. Returns a list of (rotation, x, y, path) with one entry
+        per distinct set of cells, where path is the shortest action sequence
+        leading there (the piece locks on the next step down; a drop through
+        the free zone above the stack counts one DOWN per row).
+        """
+        x = self.spawn_x if x is None else x
+        y = self.spawn_y if y is None else y
+        fits = self.fit_masks(shape)
+        if not fits[rotation][x] >> (y + SEARCH_TOP) & 1:
+            return []
+
+        turns = KICKS.get(shape)  # None for the O piece
+        orientations = len(fits)
+        columns = self.columns
+
+        # Above the stack every orientation fits at every column, so moving
+        # down there changes nothing but the row: a piece in that free zone
+        # drops straight to its lowest row in one search step (which still
+        # costs one action per row)
+        stack_top = next((row for row, bits in enumerate(self.row_bits) if bits), self.rows)
+        lowest = max(dy for piece in PIECES[shape] for dx, dy in piece.cells)
+        free_row = stack_top - 1 - lowest + SEARCH_TOP
+        # States are packed into one int: (y + SEARCH_TOP, x, rotation)
+        stride = columns * 4
+        start = (y + SEARCH_TOP) * stride + x * 4 + rotation
+        parents = {start: None}  # state -> (previous state, actions taken)
+        costs = {start: 0}       # state -> fewest actions found so far
+        # Bucket queue: buckets[n] holds the states reached with n actions, so
+        # states are expanded in order of path length even though a drop
+        # through the free zone is several actions in one step
+        buckets = [[start]]
+        resting = []
+
+        for cost, bucket in enumerate(buckets):
+            for state in bucket:
+                if costs[state] != cost:
+                    continue  # Reached with fewer actions after it was queued
+                row, rest = divmod(state, stride)
+                x, rotation = divmod(rest, 4)
+                fit = fits[rotation]
+
+                # DOWN: one row lower (or to the bottom of the free zone), or the piece rests here
+                if row < free_row:
+                    moves = [(state + (free_row - row) * stride, (DOWN,) * (free_row - row))]
+                elif fit[x] >> (row + 1) & 1:
+                    moves = [(state + stride, DOWN_STEP)]
+                else:
+                    resting.append(state)
+                    moves = []
+                # LEFT / RIGHT
+                if x and fit[x - 1] >> row & 1:
+                    moves.append((state - 4, LEFT_STEP))
+                if x + 1 < columns and fit[x + 1] >> row & 1:
+                    moves.append((state + 4, RIGHT_STEP))
+                # ROTATE: first kick that fits, like Board.rotate
+                if turns:
+                    target = (rotation + 1) % orientations
+                    target_fit = fits[target]
+                    for dx, dy in turns[rotation][1]:
+                        kick_x, kick_row = x + dx, row + dy
+                        if 0 <= kick_x < columns and kick_row >= 0 and target_fit[kick_x] >> kick_row & 1:
+                            moves.append((kick_row * stride + kick_x * 4 + target, ROTATE_STEP))
+                            break
+
+                for move, actions in moves:
+                    moved = cost + len(actions)
+                    if moved < costs.get(move, moved + 1):
+                        costs[move] = moved
+                        parents[move] = (state, actions)
+                        while len(buckets) <= moved:
+                            buckets.append([])
+                        buckets[moved].append(move)
+
+        # One placement per set of cells (e.g. the two flat S orientations), first found = shortest
+        results = []
+        seen = set()
+        for state in resting:
+            row, rest = divmod(state, stride)
+            x, rotation = divmod(rest, 4)
+            y = row - SEARCH_TOP
+            cells = frozenset((x + dx, y + dy) for dx, dy in PIECES[shape][rotation].cells)
+            if cells in seen:
+                continue
+            seen.add(cells)
+            path = []
+            step = parents[state]
+            while step:
+                state, actions = step
+                path.extend(actions)
+                step = parents[state]
+            results.append((rotation, x, y, path[::-1]))
+        return results
+
+    def lock(self, shape, rotation, x, y):
+        """Writes a piece into the board at pivot (x, y)."""
+        piece = PIECES[shape][rotation]
+        left = x + piece.left
+        shape_id = SHAPE_IDS[shape]
+        columns = self.columns
+
+        self.touched_rows = []
+        for dy, mask in piece.rows:
+            row = y + dy
+            if row < 0:
+                self.topped_out = True  # Part of the piece is above the board
+                continue
+            self.row_bits[row] |= mask << left
+            self.touched_rows.append(row)
+
+        heights = self.heights
+        for dx, dy in piece.cells:
+            row = y + dy
+            if row >= 0:
+                column = x + dx
+                self.colors[row * columns + column] = shape_id
+                self.row_counts[row] += 1
+                self.column_counts[column] += 1
+                self.filled += 1
+                if self.rows - row > heights[column]:
+                    heights[column] = self.rows - row
+
+    def clear_rows(self):
+        """Removes full rows in a single compaction pass and returns their indices."""
+        columns = self.columns
+        counts = self.row_counts
+        # Only the rows touched by the last lock can have become full
+        cleared = [row for row in self.touched_rows if counts[row] == columns]
+        self.touched_rows = []
+        if not cleared:
+            return cleared
+
+        row_bits = self.row_bits
+        colors = self.colors
+
+        # Walk up from the lowest cleared row, copying each surviving row down
+        # to the next free slot. Rows below the lowest cleared row never move.
+        write = cleared[-1]
+        read = write - 1
+        while read >= 0 and counts[read]:  # Stop at the first empty row: all rows above it are empty too
+            if counts[read] != columns:
+                row_bits[write] = row_bits[read]
+                counts[write] = counts[read]
+                colors[write * columns:(write + 1) * columns] = colors[read * columns:(read + 1) * columns]
+                write -= 1
+            read -= 1
+
+        # Whatever is left between the old stack top and the write slot is now empty
+        for row in range(read + 1, write + 1):
+            row_bits[row] = 0
+            counts[row] = 0
+            colors[row * columns:(row + 1) * columns] = bytes(columns)
+
+        # Column features: a cleared row is full, so every column loses one
+        # cell per cleared row and its top is at or above the highest one
+        lines = len(cleared)
+        self.filled -= lines * columns
+        heights = self.heights
+        rows = self.rows
+        for x in range(columns):
+            self.column_counts[x] -= lines
+            if rows - heights[x] < cleared[0]:
+                heights[x] -= lines  # The top block survived and moved down
+            else:
+                # The top block was cleared: find the new top in this column only
+                bit = 1 << x
+                height = 0
+                for y in range(rows - heights[x] + lines, rows):
+                    if row_bits[y] & bit:
+                        height = rows - y
+                        break
+                heights[x] = height
+        return cleared
+
+    def add_garbage(self, lines, hole):
+        """Pushes the stack up and fills the bottom `lines` rows, except column `hole`.
+
+        Blocks pushed out of the top set topped_out, like a lock above the board.
+        """
+        columns = self.columns
+        lines = min(lines, self.rows)
+        if any(self.row_bits[:lines]):
+            self.topped_out = True
+        bits = self.full_row & ~(1 << hole)
+        row_colors = bytearray([SHAPE_IDS[GARBAGE]]) * columns
+        row_colors[hole] = 0
+
+        # Every row moves up by `lines`, the garbage rows come in at the bottom
+        self.row_bits[:] = self.row_bits[lines:] + [bits] * lines
+        self.row_counts[:] = self.row_counts[lines:] + [columns - 1] * lines
+        self.colors[:] = self.colors[lines * columns:] + row_colors * lines
+        self.touched_rows = [row - lines for row in self.touched_rows if row >= lines]
+
+        if self.topped_out:
+            self.recompute_features()  # Cells were lost at the top
+            return
+        # Column features: every column grows by `lines`, except the empty hole
+        # column, which keeps a height of 0 when nothing lies above the holes
+        heights = self.heights
+        for x in range(columns):
+            if x != hole:
+                self.column_counts[x] += lines
+                heights[x] += lines
+            elif heights[x]:
+                heights[x] += lines
+        self.filled += lines * (columns - 1)
+
+    def cell(self, x, y):
+        """Returns the shape name locked at (x, y), or None if empty."""
+        return SHAPE_NAMES[self.colors[y * self.columns + x]]
+
+    def snapshot(self):
+        """Returns the board state as plain data (lists, bytes and flags)."""
+        return {
+            'row_bits': self.row_bits[:],
+            'row_counts': self.row_counts[:],
+            'colors': bytes(self.colors),
+            'touched_rows': self.touched_rows[:],
+            'topped_out': self.topped_out,
+        }
+
+    def restore(self, state):
+        """Puts the board back into a state returned by snapshot()."""
+        self.row_bits = list(state['row_bits'])
+        self.row_counts = list(state['row_counts'])
+        self.colors = bytearray(state['colors'])
+        self.touched_rows = list(state['touched_rows'])
+        self.topped_out = state['topped_out']
+        self.recompute_features()
@@ -0,0 +1,236 @@
+from setting import *  # Imports the actions, KEY_BINDINGS and the DAS/ARR defaults
+from operator import itemgetter
+
+
+# --- Input Events ---
+# Input reaches the game as (time, action, pressed) events, time in game ms:
+#   - KEYDOWN/KEYUP events, stamped by Main with the ms they arrived
+#   - the edges between two held-action sets given to Game.step (headless
+#     players, batch environments), stamped with the frame time
+# Game.step applies them in time order, interleaved with gravity and auto
+# shift, so a tap between two frames acts at the moment it happened and a
+# press and release within one frame is never lost.
+
+
+class Controls:
+    """Applies input events to a Game: DAS/ARR shifting, soft drop and rotation buffering.
+
+    A direction moves the piece once when pressed, again after `das` ms held
+    and then every `arr` ms (`arr` 0 slides straight to the wall). The held
+    direction keeps its charge when the next piece spawns or the game
+    restarts. A rotation that is blocked is retried for `buffer_time` ms:
+    when the piece moves, and on the next piece if this one locks first.
+    """
+
+    def __init__(self, game, das=DAS, arr=ARR, buffer_time=INPUT_BUFFER):
+        self.game = game
+        self.das = das
+        self.arr = arr
+        self.buffer_time = buffer_time
+        self.allow_restart = True  # Versus leaves restarting to the server
+        self.keys = set()          # Bound keys down (arrows and WASD share actions)
+        self.queue = []            # (time, action, pressed) events not applied yet
+        self.time = game.clock()   # Game time the controls have been advanced to
+
+        self.held = {}               # Action -> time it was pressed
+        self.shift = None            # Direction that auto-shifts (the last pressed of LEFT/RIGHT)
+        self.shift_time = None       # Time of the next auto-shift move
+        self.charged = False         # The direction was held for longer than DAS
+        self.rotation_buffer = None  # Time of a blocked rotation that is still retried
+
+    # --- Queueing ---
+    def key(self, key, pressed, time):
+        """Queues the press or release of a key, returns False when the key is not bound.
+
+        An action is pressed with the first of its keys and released with the last.
+        """
+        action = KEY_BINDINGS.get(key)
+        if action is None:
+            return False
+        shared = any(KEY_BINDINGS[other] == action for other in self.keys if other != key)
+        if pressed:
+            self.keys.add(key)
+        else:
+            self.keys.discard(key)
+        if not shared:
+            self.queue.append((time, action, pressed))
+        return True
+
+    def release_all(self, time):
+        """Releases every key (the window lost focus, so their KEYUP never arrives)."""
+        for action in {KEY_BINDINGS[key] for key in self.keys}:
+            self.queue.append((time, action, False))
+        self.keys.clear()
+
+    def hold(self, actions, time):
+        """Queues the presses and releases that turn the held actions into `actions`."""
+        held = self.held
+        if not actions and not held:
+            return  # Nothing held before or now (most headless frames)
+        for action in held:
+            if action not in actions:
+                self.queue.append((time, action, False))
+        for action in ACTIONS:  # Fixed order: sets iterate differently from run to run
+            if action in actions and action not in held:
+                self.queue.append((time, action, True))
+
+    # --- Frame Update ---
+    def update(self, now):
+        """Applies the queued events in time order, with gravity and auto shift in between."""
+        queue = self.queue
+        if queue:
+            self.queue = []
+            if len(queue) > 1:
+                queue.sort(key=itemgetter(0))  # Stable: same-ms events keep their order
+            for time, action, pressed in queue:
+                if time > self.time:
+                    self.advance(min(time, now))
+                # Stamped before the last frame was simulated: applied as early as possible
+                self.apply(action, pressed, self.time)
+        self.game.clock.ticks = now  # The rest of the frame runs at the frame time
+
+    def advance(self, until):
+        """Runs gravity and auto-shift moves due up to `until`, in time order.
+
+        The game clock reads the time of each move while it runs, so pieces
+        spawned or timers started in between get sub-frame start times.
+        """
+        game = self.game
+        clock = game.clock
+        scheduler = game.scheduler
+        if self.shift_time is None and not (scheduler.heap and scheduler.heap[0][0] <= until):
+            clock.ticks = self.time = until  # Nothing due (most frames)
+            return
+        while game.game_active:
+            gravity = scheduler.next_deadline()
+            shift = self.shift_time
+            if shift is not None and shift <= until and (gravity is None or shift < gravity):
+                clock.ticks = shift
+                self.auto_shift(shift)
+            elif gravity is not None and gravity <= until:
+                clock.ticks = gravity
+                scheduler.run_due(until)  # Once per deadline, never a burst after a stall
+                self.piece_moved(gravity)
+            else:
+                break
+        clock.ticks = until
+        self.time = until
+
+    def next_deadline(self):
+        """Time of the next auto-shift move, None when no direction is repeating."""
+        return self.shift_time if self.game.game_active else None
+
+    # --- Actions ---
+    def apply(self, action, pressed, time):
+        """Applies one press or release at `time`."""
+        game = self.game
+        if pressed:
+            if action in self.held:
+                return  # Already down (another binding, or a repeated KEYDOWN)
+            self.held[action] = time
+            if game.telemetry:
+                game.telemetry.pressed()
+        elif self.held.pop(action, None) is None:
+            return
+
+        if action == DOWN:
+            self.soft_drop(pressed)
+        elif action == RESTART:
+            if pressed and not game.game_active and self.allow_restart:
+                game.reset()
+                self.rotation_buffer = None
+                if DOWN in self.held:
+                    self.soft_drop(True)  # Still held from the last game
+        elif action == ROTATE:
+            if pressed and game.game_active and not self.rotate():
+                self.rotation_buffer = time
+        elif pressed:
+            # Left or right: move now, auto-shift once DAS has passed (the
+            # direction is tracked on the game over screen too, for the restart)
+            self.shift = action
+            self.shift_time = time + self.das
+            self.charged = False
+            if game.game_active:
+                self.move(1)
+        elif action == self.shift:
+            # Released the shifting direction: the other one takes over if it is still held
+            other = RIGHT if action == LEFT else LEFT
+            self.shift = other if other in self.held else None
+            self.shift_time = time + self.das if self.shift else None
+            self.charged = False
+
+    def soft_drop(self, pressed):
+        """Switches gravity between normal and soft drop speed."""
+        game = self.game
+        game.down_pressed = pressed
+        game.timers['vertical move'].set_duration(game.down_speed_faster if pressed else game.down_speed)
+
+    def move(self, cells):
+        """Moves the piece up to `cells` cells in the shift direction, returns the cells moved."""
+        piece = self.game.tetromino
+        amount = -1 if self.shift == LEFT else 1
+        moved = 0
+        while moved < cells and not piece.next_move_horizontal_collide(amount):
+            piece.move_horizontal(amount)
+            moved += 1
+        return moved
+
+    def auto_shift(self, time):
+        """One auto-shift move: a cell every ARR ms, or to the wall with ARR 0."""
+        self.charged = True
+        if self.arr:
+            self.move(1)
+            self.shift_time = time + self.arr
+        else:
+            self.move(self.game.board.columns)
+            self.shift_time = None  # Slides again when the piece moved down or spawned
+        self.retry_rotation(time)
+
+    def rotate(self):
+        """Rotates the piece, returns False when it is blocked."""
+        piece = self.game.tetromino
+        rotation = piece.rotation
+        piece.rotate()
+        return piece.rotation != rotation
+
+    def retry_rotation(self, time):
+        """Retries a buffered rotation (dropped once it is older than the buffer time)."""
+        if self.rotation_buffer is not None:
+            if time - self.rotation_buffer > self.buffer_time or self.rotate():
+                self.rotation_buffer = None
+
+    def piece_moved(self, time):
+        """Called after gravity moved the piece or a new one spawned."""
+        if not self.game.game_active:
+            return  # The last piece topped out
+        if self.charged and not self.arr and self.shift:
+            self.move(self.game.board.columns)  # ARR 0 keeps the piece against the wall
+        self.retry_rotation(time)
+
+    def spawned(self):
+        """Called by Game.create_new_tetromino: the held charge and a buffered rotation carry over."""
+        self.piece_moved(self.game.clock())
+
+    # --- State ---
+    def snapshot(self, time_offset=0):
+        """Returns the held actions and repeat state (times shifted by `time_offset`)."""
+        def shifted(time):
+            return None if time is None else time + time_offset
+        return {
+            'held': [(action, time + time_offset) for action, time in self.held.items()],
+            'shift': self.shift,
+            'shift_time': shifted(self.shift_time),
+            'charged': self.charged,
+            'rotation_buffer': shifted(self.rotation_buffer),
+            'time': self.time + time_offset,
+        }
+
+    def restore(self, state):
+        """Puts the controls back into a state returned by snapshot()."""
+        self.held = dict(state['held'])
+        self.shift = state['shift']
+        self.shift_time = state['shift_time']
+        self.charged = state['charged']
+        self.rotation_buffer = state['rotation_buffer']
+        self.time = state['time']
+        self.queue = []
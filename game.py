@@ -1,38 +1,69 @@
 import pygame
 from setting import *
 from random import choice
-from timer import Timer
+from collections import deque
+from timer import Timer, FrameClock, Scheduler
 from sys import exit
+from board import Board, PIECES, SHAPE_IDS
+from tiles import get_atlas
+from text_cache import TEXT_CACHE, get_font
+from assets import defer
+from layout import Layout
+from controls import Controls
 
 
 class Game:
-    def __init__(self, get_next_shape, update_score):
+    def __init__(self, get_next_shape, update_score, headless=False, clock=None, layout=None,
+                 columns=COLUMNS, rows=ROWS):
         # General Setup
-        # Create the internal game surface
-        self.surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
-        # Get reference to the main window
-        self.display_surface = pygame.display.get_surface()
-        self.rect = self.surface.get_rect(
-            topleft=(PADDING, PADDING))  # Position the game area
-        # Group to manage all block sprites
-        self.sprites = pygame.sprite.Group()
+        # Headless mode runs only the game rules: no surfaces, sprites or keyboard
+        self.headless = headless
+        # Clock used by every timer, sampled once per frame (pygame's clock
+        # unless a VirtualClock is given)
+        self.clock = FrameClock(clock)
+        self.recorder = None  # Optional replay recorder fed with every frame's actions
+        self.profiler = None  # Optional frame profiler timing each stage
+        self.versus = None    # Optional versus client told about attacks and placements
+        self.telemetry = None  # Optional session statistics (telemetry.Telemetry)
+        # Timestamped key events and held-action sets become moves here (DAS/ARR, buffering)
+        self.controls = Controls(self)
+
+        # Board: bitboard engine holding locked cells (one bitmask per row).
+        # Its size is per game, so variants and stress boards run side by side.
+        self.board = Board(columns, rows)
+
+        # Group to manage all block sprites (None when headless)
+        self.sprites = None if headless else pygame.sprite.Group()
+        self.atlas = None  # Tile atlas of the current cell size (None when headless)
+        if not headless:
+            # Surfaces and fonts at the window's scale (1x by default)
+            self.set_layout(layout or Layout(1, columns, rows))
 
         # Connections to Main.py
         self.get_next_shape = get_next_shape  # Callback to get next piece from Main
         self.update_score = update_score     # Callback to update UI in Main
 
-        # Field Data: 2D list representing the grid (0 = empty, Block = occupied)
-        self.field_data = [[0 for x in range(COLUMNS)] for y in range(ROWS)]
-
         # Movement Timers & Initial State
         self.reset()  # Call reset to initialize all game variables
 
     def reset(self):
         """Wipes the board and resets all stats for a new game."""
         self.game_active = True             # Set game state to active
-        self.sprites.empty()                # Remove all existing block sprites
-        self.field_data = [[0 for x in range(COLUMNS)]
-                           for y in range(ROWS)]  # Clear grid data
+        if self.sprites:
+            self.sprites.empty()            # Remove all existing block sprites
+        self.board.reset()                  # Clear grid data
+
+        # Rendering state: which cells are on screen and what needs redrawing
+        self.redraw_all = True    # Full redraw on the next frame
+        self.stack_stale = True   # Locked stack layer must be rebuilt
+        self.scroll_rows = None   # Rows cleared since the last frame, scrolled out of the stack layer
+        self.drawn_active = True  # game_active as of the last drawn frame
+        self.drawn_cells = (set(), set())  # Falling piece and ghost cells drawn last frame
+        self.cleared_to = -1      # Lowest cleared row since the last frame (-1 = none)
+        self.locked_cells = set()  # Cells locked since the last frame
+        self.game_over_surface = None  # Cached game over screen, built when needed
+        self.tetromino = None
+        self.pending_garbage = deque()  # (lines, hole column) received, added on the next lock
 
         # Reset Score & Leveling
         self.current_level = 1
@@ -42,73 +73,67 @@ class Game:
         self.down_speed_faster = self.down_speed * 0.1
         self.down_pressed = False
 
-        # Reset Timers
+        # Reset Timers: the scheduler keeps their deadlines in a min-heap
+        # (sideways moves and rotations are timed by self.controls)
+        self.scheduler = Scheduler(self.clock)
         self.timers = {
-            'vertical move': Timer(self.down_speed, True, self.move_down),
-            'horizontal move': Timer(MOVE_WAIT_TIME),
-            'rotate': Timer(ROTATE_WAIT_TIME)
+            'vertical move': Timer(self.down_speed, True, self.move_down, self.clock, self.scheduler),
         }
         self.timers['vertical move'].activate()  # Start the gravity timer
 
         # Update the UI in Main.py back to zero
         self.update_score(0, 0, 1)
+        if self.telemetry:
+            self.telemetry.game_started()
 
         # Spawn the very first piece
         self.create_new_tetromino()
 
     def create_new_tetromino(self):
         """Logic to spawn the next piece or trigger Game Over."""
-        self.checked_finsihed_rows()  # Clear full lines before spawning next
+        if self.tetromino and not self.headless:
+            # The piece may have moved and locked within one frame, redraw where it ended up
+            self.locked_cells.update((x, y) for x, y in self.tetromino.cells() if y >= 0)
+        delete_rows = self.checked_finsihed_rows()  # Clear full lines before spawning next
+        if self.versus and self.tetromino:
+            # Waiting garbage rises under the stack, unless this piece cleared lines
+            garbage = [] if delete_rows else self.add_pending_garbage()
+            self.versus.placed(self.tetromino, garbage)
+        if self.telemetry and self.tetromino:
+            self.telemetry.placed(self.tetromino.shape, len(delete_rows))
         next_shape_type = self.get_next_shape()  # Get shape from Main's list
 
-        # Check for Game Over: If the spawn area is already occupied
-        for pos in TETROMINOS[next_shape_type]['shape']:
-            x = int(pos[0] + COLUMNS // 2)
-            y = int(pos[1])
-            if y >= 0 and self.field_data[y][x]:  # If grid cell is not 0
-                self.game_active = False  # End the game loop
-                return
+        # Check for Game Over: a piece locked above the board or the spawn area is occupied
+        if self.board.topped_out or self.board.spawn_blocked(next_shape_type):
+            self.game_active = False  # End the game loop
+            if self.telemetry:
+                self.telemetry.game_over()
+            return
 
         # If not game over, create the new piece
         self.tetromino = Tetrimono(
             next_shape_type,
             self.sprites,
             self.create_new_tetromino,
-            self.field_data
+            self.board,
+            self.atlas
         )
-
-    def input(self):
-        """Handles keyboard input for movement and restart."""
-        keys = pygame.key.get_pressed()
-
-        # RESTART LOGIC: Check this even if game_active is False
-        if not self.game_active:
-            if keys[pygame.K_r]:  # If 'R' is pressed during Game Over
-                self.reset()     # Re-initialize everything
-            return               # Skip movement logic if game is over
-
-        # Horizontal movement (Left/Right)
-        if not self.timers['horizontal move'].active:
-            if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-                self.tetromino.move_horizontal(-1)
-                self.timers['horizontal move'].activate()
-            if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-                self.tetromino.move_horizontal(1)
-                self.timers['horizontal move'].activate()
-
-        # Rotation movement (Up)
-        if not self.timers['rotate'].active:
-            if keys[pygame.K_UP] or keys[pygame.K_w]:
-                self.tetromino.rotate()
-                self.timers['rotate'].activate()
-
-        # Soft Drop (Down)
-        if not self.down_pressed and (keys[pygame.K_DOWN] or keys[pygame.K_s]):
-            self.down_pressed = True
-            self.timers['vertical move'].duration = self.down_speed_faster
-        if self.down_pressed and not (keys[pygame.K_DOWN] or keys[pygame.K_s]):
-            self.down_pressed = False
-            self.timers['vertical move'].duration = self.down_speed
+        self.controls.spawned()  # Held direction and buffered rotation carry over
+
+    def input(self, actions=None):
+        """Applies this frame's input: the queued key events, or the change to a held-action set.
+
+        Events are applied at the ms they happened, with the gravity steps
+        and auto-shift moves due before them in between.
+        """
+        now = self.clock()
+        controls = self.controls
+        if actions is not None:
+            controls.hold(actions, now)
+        if self.recorder:
+            self.recorder.record_frame(controls.queue)
+        if controls.queue:
+            controls.update(now)
 
     def calculate_scores(self, num_lines):
         """Calculates points and handles leveling up."""
@@ -119,188 +144,490 @@ class Game:
         if self.current_lines // 10 >= self.current_level:
             self.current_level += 1
             self.down_speed *= 0.75  # Increase speed
-            self.timers['vertical move'].duration = self.down_speed
+            self.timers['vertical move'].set_duration(self.down_speed)
+            if self.telemetry:
+                self.telemetry.level_up(self.current_level)
+
+        # Versus: an attack first cancels garbage waiting to come in, the rest is sent
+        attack = GARBAGE_LINES[num_lines]
+        while attack and self.pending_garbage:
+            lines, hole = self.pending_garbage.popleft()
+            if lines > attack:
+                self.pending_garbage.appendleft((lines - attack, hole))
+            attack = max(0, attack - lines)
+        if attack and self.versus:
+            self.versus.attack(attack)
 
         self.update_score(self.current_lines,
                           self.current_score, self.current_level)
 
     def checked_finsihed_rows(self):
         """Checks for full rows, deletes them, and shifts blocks down."""
-        delete_rows = []
-        for i, row in enumerate(self.field_data):
-            if all(row):  # If every cell in the row has a block
-                delete_rows.append(i)
+        delete_rows = self.board.clear_rows()  # Indices of the rows that were removed
 
         if delete_rows:
-            for delete_row in delete_rows:
-                for block in self.field_data[delete_row]:
-                    block.kill()  # Remove block from sprite group
-
-                for row in self.field_data:
-                    for block in row:
-                        if block and block.pos.y < delete_row:
-                            block.pos.y += 1  # Move blocks above down by 1
-
-            # Refresh field data grid
-            self.field_data = [
-                [0 for x in range(COLUMNS)] for y in range(ROWS)]
-            for block in self.sprites:
-                self.field_data[int(block.pos.y)][int(block.pos.x)] = block
-
+            self.cleared_to = max(self.cleared_to, delete_rows[-1])  # Rows to redraw
+            if not self.headless:
+                if self.scroll_rows:
+                    self.stack_stale = True  # Two clears in one frame: rebuild the layer instead
+                self.scroll_rows = delete_rows  # Rows moved, scroll them on the stack layer
+                # The piece that just locked moved down with its rows (cleared cells are gone)
+                self.locked_cells = {(x, y + sum(1 for row in delete_rows if row > y))
+                                     for x, y in self.locked_cells if y not in delete_rows}
             self.calculate_scores(len(delete_rows))
+        return delete_rows
+
+    def receive_garbage(self, lines, hole):
+        """Queues garbage rows from an opponent, added when the next piece locks."""
+        if self.game_active:
+            self.pending_garbage.append((lines, hole))
+
+    def add_pending_garbage(self):
+        """Pushes every queued garbage row under the stack, returns what was added."""
+        garbage = list(self.pending_garbage)
+        self.pending_garbage.clear()
+        for lines, hole in garbage:
+            self.board.add_garbage(lines, hole)
+        if garbage:
+            self.cleared_to = self.board.rows - 1  # Every row moved up
+            self.stack_stale = True
+        return garbage
 
     def display_game_over(self):
         """Draws the dark overlay, final stats, and restart instructions."""
-        # 1. Create a dark semi-transparent overlay surface
-        overlay = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
-        overlay.fill((0, 0, 0))
-        overlay.set_alpha(180)  # Semi-transparent black
-        self.surface.blit(overlay, (0, 0))
+        # The finished overlay is built once per game over and then reused
+        if self.game_over_surface is None:
+            self.game_over_surface = self.build_game_over()
+        self.surface.blit(self.game_over_surface, (0, 0))
+
+    def build_game_over(self):
+        """Renders the game over screen on top of the current game surface."""
+        surface = self.surface.copy()
 
-        # 2. Setup Fonts
-        font = pygame.font.SysFont('Arial', 40, bold=True)
-        small_font = pygame.font.SysFont('Arial', 25, bold=False)
+        # 1. Dark semi-transparent overlay (created once in build_layers)
+        surface.blit(self.overlay, (0, 0))
+
+        # 2. Setup Fonts (loaded only the first time per size)
+        layout = self.layout
+        font = get_font('Arial', layout.font_size(40), bold=True, sysfont=True)
+        small_font = get_font('Arial', layout.font_size(25), bold=False, sysfont=True)
 
         # 3. Render Text surfaces
-        title_surf = font.render('GAME OVER', True, 'white')
-        score_surf = small_font.render(
-            f'Final Score: {self.current_score}', True, 'white')
-        level_surf = small_font.render(
-            f'Final Level: {self.current_level}', True, 'white')
-        restart_surf = small_font.render('Press R to Restart', True, 'yellow')
+        title_surf = TEXT_CACHE.render(font, 'GAME OVER', 'white')
+        score_surf = TEXT_CACHE.render(
+            small_font, f'Final Score: {self.current_score}', 'white')
+        level_surf = TEXT_CACHE.render(
+            small_font, f'Final Level: {self.current_level}', 'white')
+        restart_surf = TEXT_CACHE.render(small_font, 'Press R to Restart', 'yellow')
 
         # 4. Draw text to the center of the game surface
         # We use a vertical stack to keep it organized
-        center_x = GAME_WIDTH / 2
-
-        self.surface.blit(
-            title_surf, (center_x - title_surf.get_width() / 2, 150))
-        self.surface.blit(
-            score_surf, (center_x - score_surf.get_width() / 2, 220))
-        self.surface.blit(
-            level_surf, (center_x - level_surf.get_width() / 2, 260))
-        self.surface.blit(
-            restart_surf, (center_x - restart_surf.get_width() / 2, 320))
+        center_x = layout.game_width / 2
+
+        surface.blit(
+            title_surf, (center_x - title_surf.get_width() / 2, layout.px(150)))
+        surface.blit(
+            score_surf, (center_x - score_surf.get_width() / 2, layout.px(220)))
+        surface.blit(
+            level_surf, (center_x - level_surf.get_width() / 2, layout.px(260)))
+        surface.blit(
+            restart_surf, (center_x - restart_surf.get_width() / 2, layout.px(320)))
+        return surface
 
     def timer_update(self):
-        for timer in self.timers.values():
-            timer.update()
+        """Fires the gravity and auto-shift moves due by the time read this frame."""
+        self.controls.advance(self.clock())
+
+    def next_deadline(self):
+        """Game time of the next timer deadline, None when nothing can happen on its own."""
+        if not self.game_active:
+            return None  # Game over: only input (R) changes anything
+        deadline = self.scheduler.next_deadline()
+        shift = self.controls.next_deadline()  # A held direction repeats on its own
+        return deadline if shift is None else shift if deadline is None else min(deadline, shift)
 
     def move_down(self):
         self.tetromino.move_down()
 
-    def draw_grid(self):
-        for col in range(1, COLUMNS):
-            x = col * CELL_SIZE
-            pygame.draw.line(self.surface, LINE_COLOR, (x, 0),
-                             (x, self.surface.get_height()), 1)
-        for row in range(1, ROWS):
-            y = row * CELL_SIZE
-            pygame.draw.line(self.surface, LINE_COLOR, (0, y),
-                             (self.surface.get_width(), y))
-
-    def run(self):
-        """The main update and draw call for the game component."""
-        self.surface.fill(GRAY)  # Clear game surface
-
-        self.input()  # Always check input (to catch 'R' key)
+    def snapshot(self, time_offset=0):
+        """Returns the complete rule state as plain data.
+
+        Timer start times are shifted by `time_offset` ms so a snapshot can be
+        restored on a clock with a different origin.
+        """
+        piece = self.tetromino
+        return {
+            'board': self.board.snapshot(),
+            'game_active': self.game_active,
+            'level': self.current_level,
+            'score': self.current_score,
+            'lines': self.current_lines,
+            'down_speed': self.down_speed,
+            'down_speed_faster': self.down_speed_faster,
+            'down_pressed': self.down_pressed,
+            'piece': (piece.shape, piece.x, piece.y, piece.rotation) if piece else None,
+            'timers': {name: (timer.active, timer.start_time + time_offset if timer.active else 0,
+                              timer.duration) for name, timer in self.timers.items()},
+            'controls': self.controls.snapshot(time_offset),
+        }
 
+    def restore(self, state):
+        """Puts the game back into a state returned by snapshot()."""
+        self.board.restore(state['board'])
+        self.game_active = state['game_active']
+        self.current_level = state['level']
+        self.current_score = state['score']
+        self.current_lines = state['lines']
+        self.down_speed = state['down_speed']
+        self.down_speed_faster = state['down_speed_faster']
+        self.down_pressed = state['down_pressed']
+        for name, (active, start_time, duration) in state['timers'].items():
+            timer = self.timers[name]
+            timer.duration = duration
+            if active:
+                timer.activate(start_time)  # Reschedules the deadline
+            else:
+                timer.deactivate()
+        self.controls.restore(state['controls'])
+
+        if self.sprites:
+            self.sprites.empty()
+        self.tetromino = None
+        if state['piece']:
+            shape, x, y, rotation = state['piece']
+            self.tetromino = Tetrimono(shape, self.sprites, self.create_new_tetromino, self.board, self.atlas)
+            self.tetromino.x, self.tetromino.y, self.tetromino.rotation = x, y, rotation
+            self.tetromino.update_blocks()
+
+        # Everything on screen is out of date
+        self.redraw_all = True
+        self.stack_stale = True
+        self.locked_cells = set()
+        self.cleared_to = -1
+        self.game_over_surface = None
+        self.update_score(self.current_lines, self.current_score, self.current_level)
+
+    def step(self, actions=None):
+        """Advances the game rules by one frame without drawing anything."""
+        profiler = self.profiler
+        self.clock.tick()  # One clock read per frame, shared by every timer
+        self.input(actions)  # Always check input (to catch 'R' key)
+        if profiler:
+            profiler.mark('input')
         if self.game_active:
             self.timer_update()  # Update timers
-            self.sprites.update()  # Update block positions
-            self.sprites.draw(self.surface)  # Draw blocks
-            self.draw_grid()  # Draw the grid lines
+        if profiler:
+            profiler.mark('timers')
+
+    # --- Rendering Layers ---
+    # background:     gray fill + grid lines, built once
+    # grid_overlay:   grid lines only (black is transparent), drawn over blocks
+    # stack_surface:  background + locked blocks, updated only on lock/clear
+    # surface:        stack + ghost + falling piece, composited per dirty cell
+
+    def set_layout(self, layout):
+        """Rebuilds every surface of the game area for a new scale (once per window resize)."""
+        self.layout = layout
+        self.cell_size = layout.cell_size
+        # Create the internal game surface
+        self.surface = pygame.Surface(layout.game_rect.size)
+        # Get reference to the main window
+        self.display_surface = pygame.display.get_surface()
+        self.rect = layout.game_rect.copy()  # Position the game area
+        self.build_layers()  # Cached background, grid and locked stack surfaces
+        # The game over fonts are only needed later: load them after the first frame
+        defer(get_font, 'Arial', layout.font_size(40), True, True)
+        defer(get_font, 'Arial', layout.font_size(25), False, True)
+
+        # Blocks of the falling piece switch to the tile of the new size
+        if self.sprites:
+            tile = self.atlas.tile(SHAPE_IDS[self.tetromino.shape])
+            for block in self.sprites:
+                block.set_tile(tile)
+        # Everything on screen is out of date
+        self.redraw_all = True
+        self.stack_stale = True
+        self.game_over_surface = None
+
+    def build_layers(self):
+        """Creates the cached static layers of the game area."""
+        size = self.layout.game_rect.size
+        self.background = pygame.Surface(size)
+        self.background.fill(GRAY)
+        self.draw_grid(self.background)
+
+        self.grid_overlay = pygame.Surface(size)
+        self.grid_overlay.set_colorkey((0, 0, 0))
+        self.draw_grid(self.grid_overlay)
+
+        self.stack_surface = self.background.copy()
+
+        # Shared tile atlas: every block is drawn from a pre-rendered tile (one atlas per cell size)
+        self.atlas = get_atlas(self.cell_size)
+
+        # Dark semi-transparent overlay for the game over screen
+        self.overlay = pygame.Surface(size)
+        self.overlay.fill((0, 0, 0))
+        self.overlay.set_alpha(180)  # Semi-transparent black
+
+    def cell_rect(self, x, y):
+        """Returns the pixel area of grid cell (x, y)."""
+        size = self.cell_size
+        return pygame.Rect(x * size, y * size, size, size)
+
+    def draw_locked(self, cells):
+        """Draws the given locked cells (with their grid lines) onto the stack layer."""
+        colors = self.board.colors
+        columns = self.board.columns
+        cells = [(x, y) for x, y in cells if colors[y * columns + x]]
+        self.stack_surface.blits(self.atlas.blits_for(
+            cells, [colors[y * columns + x] for x, y in cells]), False)
+        rects = [self.cell_rect(x, y) for x, y in cells]
+        self.stack_surface.blits([(self.grid_overlay, rect, rect) for rect in rects], False)
+
+    def render_stack(self):
+        """Rebuilds the whole locked stack layer from the board's color array."""
+        self.stack_surface.blit(self.background, (0, 0))
+        board = self.board
+        columns = board.columns
+        colors = board.colors
+        cells, shape_ids = [], []
+        for y, count in enumerate(board.row_counts):
+            if count:  # Empty rows (everything above the stack) are skipped whole
+                for x in range(columns):
+                    shape_id = colors[y * columns + x]
+                    if shape_id:
+                        cells.append((x, y))
+                        shape_ids.append(shape_id)
+        self.stack_surface.blits(self.atlas.blits_for(cells, shape_ids), False)  # One batched call
+        self.stack_surface.blit(self.grid_overlay, (0, 0))
+
+    def scroll_stack(self, cleared):
+        """Moves the rows above the cleared rows down on the stack layer.
+
+        Every gap between two cleared rows is one Surface.scroll (a block
+        copy of its pixels), so a clear costs no per-cell drawing at all.
+        """
+        size = self.cell_size
+        width = self.layout.game_width
+        surface = self.stack_surface
+        lines = len(cleared)
+        # Rows above the old stack top are empty and never need to move
+        top = max(0, self.board.rows - max(self.board.heights) - lines)
+        for shift, row in enumerate(reversed(cleared), 1):
+            # The gap above each cleared row moves down by the rows cleared below it
+            start = max(top, cleared[lines - shift - 1] + 1 if shift < lines else top)
+            if start < row:
+                surface.set_clip(pygame.Rect(0, start * size, width, (row - start + shift) * size))
+                surface.scroll(0, shift * size)
+        surface.set_clip(None)
+        # The rows the stack moved away from are empty now
+        vacated = pygame.Rect(0, top * size, width, lines * size)
+        surface.blit(self.background, vacated, vacated)
+
+    def update_stack(self):
+        """Brings the stack layer up to date after locks and clears."""
+        if self.stack_stale:
+            self.stack_stale = False
+            self.scroll_rows = None
+            self.render_stack()
+            return
+        if self.scroll_rows:
+            self.scroll_stack(self.scroll_rows)
+            self.scroll_rows = None
+        if self.locked_cells:
+            self.draw_locked(self.locked_cells)  # Only the piece that just locked
+
+    def draw_grid(self, surface):
+        size = self.cell_size
+        width = self.layout.line_width
+        for col in range(1, self.layout.columns):
+            x = col * size
+            pygame.draw.line(surface, LINE_COLOR, (x, 0),
+                             (x, surface.get_height()), width)
+        for row in range(1, self.layout.rows):
+            y = row * size
+            pygame.draw.line(surface, LINE_COLOR, (0, y),
+                             (surface.get_width(), y), width)
+
+    def ghost_cells(self):
+        """Returns the cells where the falling piece would land."""
+        piece = self.tetromino
+        y = self.board.drop_y(piece.shape, piece.rotation, piece.x, piece.y)
+        return [(x, cell_y + y - piece.y) for x, cell_y in piece.cells() if cell_y + y - piece.y >= 0]
+
+    def draw_piece(self, ghost):
+        """Draws the dynamic layer: ghost outline, falling piece and its grid lines."""
+        shape_id = SHAPE_IDS[self.tetromino.shape]
+        self.surface.blits(self.atlas.blits_for(ghost, [shape_id] * len(ghost), 'ghost'), False)
+        self.sprites.draw(self.surface)  # Group.draw batches the block tiles into one blits call
+        self.surface.blits([(self.grid_overlay, block.rect, block.rect) for block in self.sprites], False)
+
+    def draw_all(self, ghost):
+        """Redraws the whole game surface from the cached layers."""
+        self.surface.blit(self.stack_surface, (0, 0))
+        if self.game_active:
+            self.draw_piece(ghost)
         else:
-            self.sprites.draw(self.surface)  # Draw frozen blocks
-            self.draw_grid()  # Draw frozen grid
+            self.sprites.draw(self.surface)
             self.display_game_over()  # Draw restart menu
 
-        # Final blit: Send the game surface to the main display
-        self.display_surface.blit(self.surface, (PADDING, PADDING))
-        pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, 2, 2)
+    def draw_cells(self, cells, ghost):
+        """Redraws only the given cells: copy the stack layer, then the piece on top."""
+        for x, y in cells:
+            rect = self.cell_rect(x, y)
+            self.surface.blit(self.stack_surface, rect, rect)
+        self.draw_piece(ghost)  # The piece and ghost are always part of the dirty cells
+
+    def dirty_cells(self, ghost):
+        """Works out which cells changed since the last frame."""
+        piece = set()
+        if self.game_active:
+            piece = {(x, y) for x, y in self.tetromino.cells() if y >= 0}
+        # The piece and its ghost can cover the same cells while looking different
+        drawn = (piece, set(ghost))
+
+        dirty = self.locked_cells
+        self.locked_cells = set()
+        if drawn != self.drawn_cells:
+            dirty.update(*drawn, *self.drawn_cells)  # Old and new piece and ghost cells
+        if dirty or self.cleared_to >= 0:
+            dirty.update(*drawn)  # The piece is redrawn whole, so keep its cells too
+        self.drawn_cells = drawn
+        return dirty
+
+    def cleared_band(self):
+        """Returns the area of the rows moved by clears since the last frame (or None)."""
+        if self.cleared_to < 0:
+            return None
+        # Cleared rows and every row above them moved down: one area instead of cells
+        band = pygame.Rect(0, 0, self.layout.game_width, (self.cleared_to + 1) * self.cell_size)
+        self.cleared_to = -1
+        return band
+
+    def run(self, actions=None):
+        """The main update and draw call, returns the screen areas that changed."""
+        self.step(actions)  # Input and timers, driven by the queued key events by default
+        profiler = self.profiler
+        self.sprites.update()  # Update block positions
+        if profiler:
+            profiler.mark('sprites')
+        self.update_stack()  # Locked blocks only change on lock and clear
+        if profiler:
+            profiler.mark('stack')
+        ghost = self.ghost_cells() if self.game_active else []
+
+        # Everything changes on restart and when the game over menu appears
+        if self.redraw_all or self.game_active != self.drawn_active:
+            self.redraw_all = False
+            self.drawn_active = self.game_active
+            self.dirty_cells(ghost)  # Remember the current piece cells
+            self.cleared_band()      # Moved rows are part of the full redraw
+            self.draw_all(ghost)
+            dirty_rects = [self.surface.get_rect()]
+        else:
+            cells = self.dirty_cells(ghost)
+            band = self.cleared_band()
+            if not cells and not band:
+                if profiler:
+                    profiler.mark('draw')
+                return []  # Nothing moved: no drawing and no screen update
+            dirty_rects = []
+            if band:
+                self.surface.blit(self.stack_surface, band, band)
+                dirty_rects.append(band)
+                cells = [(x, y) for x, y in cells if (y + 1) * self.cell_size > band.bottom]
+            self.draw_cells(cells, ghost)
+            dirty_rects += [self.cell_rect(x, y) for x, y in cells]
+
+        # Final blit: Send only the changed parts of the game surface to the main display
+        left, top = self.rect.topleft
+        dirty_rects = [rect.move(left, top) for rect in dirty_rects]
+        for rect in dirty_rects:
+            self.display_surface.blit(self.surface, rect, rect.move(-left, -top))
+        pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, self.layout.border_width, 2)
+        if profiler:
+            profiler.mark('draw')
+        return dirty_rects
 
 # --- TETROMINO CLASS ---
 
 
 class Tetrimono:
-    def __init__(self, shape, group, create_new_tetromino, field_data):
+    def __init__(self, shape, group, create_new_tetromino, board, atlas=None):
         self.shape = shape
-        self.block_positions = TETROMINOS[shape]['shape']
+        self.rotations = PIECES[shape]  # Precomputed masks for every orientation
         self.color = TETROMINOS[shape]['color']
         self.create_new_tetromino = create_new_tetromino
-        self.field_data = field_data
-        self.blocks = [Block(group, pos, self.color)
-                       for pos in self.block_positions]
+        self.board = board
 
-    def next_move_horizontal_collide(self, blocks, amount):
-        return any(block.horizontal_collide(int(block.pos.x + amount), self.field_data) for block in self.blocks)
+        # Integer grid position of the pivot block and the current orientation
+        self.x = board.spawn_x
+        self.y = board.spawn_y
+        self.rotation = 0
 
-    def next_move_vertical_collide(self, blocks, amount):
-        return any(block.vertical_collide(int(block.pos.y + amount), self.field_data) for block in self.blocks)
+        # Sprites are only used for drawing, the board handles all collisions
+        # (a headless game passes no group and gets no sprites at all)
+        self.blocks = []
+        if group is not None:
+            tile = (atlas or get_atlas()).tile(SHAPE_IDS[shape])  # Shared, nothing is allocated per piece
+            self.blocks = [Block(group, pos, tile) for pos in self.cells()]
+
+    def cells(self):
+        """Returns the grid positions of the 4 blocks of the piece."""
+        return [(self.x + dx, self.y + dy) for dx, dy in self.rotations[self.rotation].cells]
+
+    def update_blocks(self):
+        """Moves the block sprites to the current piece position."""
+        for block, pos in zip(self.blocks, self.cells()):
+            block.pos = pos
+
+    def next_move_horizontal_collide(self, amount):
+        return self.board.collides(self.shape, self.rotation, self.x + amount, self.y)
+
+    def next_move_vertical_collide(self, amount):
+        return self.board.collides(self.shape, self.rotation, self.x, self.y + amount)
 
     def move_horizontal(self, amount):
-        if not self.next_move_horizontal_collide(self.blocks, amount):
-            for block in self.blocks:
-                block.pos.x += amount
+        if not self.next_move_horizontal_collide(amount):
+            self.x += amount
+            self.update_blocks()
 
     def move_down(self):
-        if not self.next_move_vertical_collide(self.blocks, 1):
-            for block in self.blocks:
-                block.pos.y += 1
+        if not self.next_move_vertical_collide(1):
+            self.y += 1
+            self.update_blocks()
         else:
+            self.board.lock(self.shape, self.rotation, self.x, self.y)
             for block in self.blocks:
-                self.field_data[int(block.pos.y)][int(block.pos.x)] = block
+                block.kill()  # Locked cells are drawn from the board instead
             self.create_new_tetromino()
 
-    def rotate(self):
-        if self.shape != 'O':
-            pivot_pos = self.blocks[0].pos
-            new_block_positions = [block.rotate(
-                pivot_pos) for block in self.blocks]
-            for pos in new_block_positions:
-                if pos.x < 0 or pos.x >= COLUMNS:
-                    return
-                if pos.y >= ROWS:
-                    return
-                if self.field_data[int(pos.y)][int(pos.x)]:
-                    return
-            for i, block in enumerate(self.blocks):
-                block.pos = new_block_positions[i]
+    def rotate(self, direction=1):
+        # Table lookup plus SRS wall kicks (None when the piece cannot turn)
+        turned = self.board.rotate(self.shape, self.rotation, self.x, self.y, direction)
+        if turned:
+            self.rotation, self.x, self.y = turned
+            self.update_blocks()
 
 
 # --- BLOCK CLASS ---
 
 class Block(pygame.sprite.Sprite):
-    def __init__(self, group, pos, color):
+    def __init__(self, group, pos, tile):
         super().__init__(group)
-        self.image = pygame.Surface(
-            (CELL_SIZE, CELL_SIZE))  # Size of 1 grid cell
-        self.image.fill(color)
         # Position is grid-based (e.g., x=5, y=2) rather than pixel-based
-        self.pos = pygame.Vector2(pos) + BLOCK_OFFSET
-        # Convert grid position to actual screen pixels for drawing
-        self.rect = self.image.get_rect(topleft=self.pos * CELL_SIZE)
-
-    def rotate(self, pivot_pos):
-        """Calculates rotation around a pivot using Pygame's vector rotate."""
-        return pivot_pos + (self.pos - pivot_pos).rotate(90)
-
-    def horizontal_collide(self, x, field_data):
-        """Checks horizontal boundaries and grid data."""
-        if not 0 <= x < COLUMNS:
-            return True  # Hits side walls
-        if field_data[int(self.pos.y)][x]:
-            return True  # Hits existing block
-        return False
-
-    def vertical_collide(self, y, field_data):
-        """Checks vertical floor and grid data."""
-        if y >= ROWS:
-            return True  # Hits floor
-        if y >= 0 and field_data[y][int(self.pos.x)]:
-            return True  # Hits existing block
-        return False
+        self.pos = pos
+        self.set_tile(tile)
+
+    def set_tile(self, tile):
+        """Uses a pre-rendered tile shared through the atlas (its size is the cell size)."""
+        self.image = tile
+        self.rect = tile.get_rect()
+        self.update()
 
     def update(self):
         """Updates the visual rectangle to match the current grid position."""
-        self.rect.topleft = self.pos * CELL_SIZE
+        # Convert grid position to actual screen pixels for drawing
+        size = self.rect.width
+        self.rect.topleft = (self.pos[0] * size, self.pos[1] * size)
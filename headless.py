@@ -0,0 +1,99 @@
+from setting import *  # Imports FPS and the randomizer settings
+from random import Random  # Private random generator, so runs can be seeded
+from randomizer import PieceGenerator
+from timer import VirtualClock
+from game import Game
+
+
+class Simulation:
+    """Runs the game rules without a window, driven by an action stream."""
+
+    def __init__(self, seed=None, frame_time=1000 // FPS, randomizer=RANDOMIZER,
+                 columns=COLUMNS, rows=ROWS):
+        # Virtual time: every step moves the clock forward by one frame (whole
+        # milliseconds, like pygame's clock, so replays reproduce exactly)
+        self.clock = VirtualClock()
+        self.frame_time = frame_time
+        self.frames = 0
+
+        # Shape Management (same seeded piece generator as Main)
+        self.randomizer = randomizer
+        self.seed = seed
+        self.generator = PieceGenerator(randomizer, seed)
+        self.pieces = 0  # Number of pieces handed to the game so far
+        self.random = Random(seed)  # Spare generator for policies driving the game
+
+        # Stats reported back by the game through update_score
+        self.lines = 0
+        self.score = 0
+        self.level = 1
+
+        self.game = Game(self.get_next_shape, self.update_score,
+                         headless=True, clock=self.clock, columns=columns, rows=rows)
+
+    def update_score(self, lines, score, level):
+        """Receives the new stats from the Game logic."""
+        self.lines = lines
+        self.score = score
+        self.level = level
+
+    @property
+    def next_shapes(self):
+        """The upcoming shapes a player would see in the preview."""
+        return self.generator.peek()
+
+    def get_next_shape(self):
+        """Deals the next shape from the piece generator."""
+        self.pieces += 1
+        return self.generator.next()
+
+    def step(self, actions=()):
+        """Advances the virtual clock by one frame and applies the held actions."""
+        self.clock.advance(self.frame_time)
+        self.frames += 1
+        self.game.step(actions)
+        return self.game.game_active
+
+    def snapshot(self):
+        """Returns the full simulation state (game, clock and piece sequence position)."""
+        return {
+            'game': self.game.snapshot(),
+            'ticks': self.clock.ticks,
+            'frames': self.frames,
+            'pieces': self.pieces,
+        }
+
+    def restore(self, state):
+        """Puts the simulation back into a state returned by snapshot()."""
+        self.clock.ticks = state['ticks']
+        self.frames = state['frames']
+        # Replay the seeded piece sequence up to the same position
+        self.generator = PieceGenerator(self.randomizer, self.seed)
+        self.generator.skip(state['pieces'])
+        self.pieces = state['pieces']
+        self.game.restore(state['game'])
+
+    def run(self, action_stream, max_frames=None):
+        """Steps through an iterable of per-frame action sets until the game ends."""
+        for actions in action_stream:
+            if not self.step(actions) or self.frames == max_frames:
+                break
+        return self.frames
+
+
+if __name__ == "__main__":
+    # Quick self-check: let a random player run a few games at full speed
+    from time import perf_counter
+
+    def random_actions(rng):
+        while True:
+            yield {action for action in (LEFT, RIGHT, ROTATE, DOWN) if rng.random() < 0.2}
+
+    start = perf_counter()
+    frames = 0
+    for seed in range(20):
+        simulation = Simulation(seed)
+        frames += simulation.run(random_actions(Random(seed)))
+        print(f'seed {seed:2}: {simulation.frames:6} frames, score {simulation.score}, '
+              f'lines {simulation.lines}, level {simulation.level}')
+    print(f'{frames / (perf_counter() - start):,.0f} frames/sec')
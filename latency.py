@@ -0,0 +1,113 @@
+import pygame
+from setting import *  # Imports FPS and the DAS/ARR defaults
+import threading  # The injector posts key events from its own thread, like a real keyboard
+from random import Random
+from time import perf_counter, sleep
+
+
+PERCENTILES = (50, 95, 99)
+
+
+# --- Probe ---
+class LatencyProbe:
+    """Measures how long a key press takes to reach the simulation and the screen.
+
+    Main calls input() for every key press (with the time it arrived, or was
+    sent for injected events), simulated() after the game step and
+    displayed() after pygame.display.update:
+      input to simulation: until the step that applied the press finished
+      input to photon:     until the frame showing it was handed to the display
+                           (the monitor's own scan-out is not included)
+    """
+
+    def __init__(self):
+        self.waiting = []     # perf_counter times of presses not simulated yet
+        self.shown = []       # ... simulated but not displayed yet
+        self.simulation = []  # Latencies in ms
+        self.photon = []
+
+    def input(self, time):
+        """A key press arrived at `time` (perf_counter seconds)."""
+        self.waiting.append(time)
+
+    def simulated(self):
+        """The game step applied every press received so far."""
+        if self.waiting:
+            now = perf_counter()
+            self.simulation += [(now - time) * 1000 for time in self.waiting]
+            self.shown += self.waiting
+            self.waiting = []
+
+    def displayed(self):
+        """The frame showing every simulated press was handed to the display."""
+        if self.shown:
+            now = perf_counter()
+            self.photon += [(now - time) * 1000 for time in self.shown]
+            self.shown = []
+
+    def summary(self):
+        """Returns mean and p50/p95/p99 in ms of both latencies."""
+        result = {}
+        for name, values in (('input_to_simulation', self.simulation), ('input_to_photon', self.photon)):
+            count = len(values)
+            if not count:
+                continue
+            values = sorted(values)
+            stats = {'mean': sum(values) / count}
+            for p in PERCENTILES:
+                stats[f'p{p}'] = values[min(count - 1, count * p // 100)]  # Nearest rank
+            result[name] = stats
+        return result
+
+    def print_report(self):
+        """Prints the summary as a table."""
+        print(f'{"latency (ms)":20} {"mean":>6} ' + ' '.join(f'{"p" + str(p):>6}' for p in PERCENTILES)
+              + f'   ({len(self.photon)} presses)')
+        for name, stats in self.summary().items():
+            print(f'{name:20} {stats["mean"]:6.2f} ' + ' '.join(f'{stats[f"p{p}"]:6.2f}' for p in PERCENTILES))
+
+
+# --- Harness ---
+def inject_keys(presses, seed=0, gap=(0.05, 0.2), hold=(0.01, 0.08)):
+    """Posts presses and releases of the move and rotate keys at random times.
+
+    Runs on its own thread, so the events arrive at any point of a frame,
+    including while Main is drawing or sleeping.
+    """
+    rng = Random(seed)
+    keys = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP)
+    for i in range(presses):
+        sleep(rng.uniform(*gap))
+        key = rng.choice(keys)
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, sent=perf_counter()))
+        sleep(rng.uniform(*hold))
+        pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key, sent=perf_counter()))
+
+
+def measure_latency(presses=100, seed=0, poll=False, gap=(0.05, 0.2), das=DAS, arr=ARR):
+    """Plays a real Main loop while key events are injected, returns the LatencyProbe.
+
+    `poll` runs every frame at FPS instead of sleeping until input or a deadline.
+    """
+    from main import Main
+    main = Main(seed, das=das, arr=arr)
+    main.idle_sleep = not poll
+    main.latency = probe = LatencyProbe()
+    injector = threading.Thread(target=inject_keys, args=(presses, seed, gap), daemon=True)
+    injector.start()
+    while injector.is_alive() or probe.waiting or probe.shown:
+        main.run_frame()
+    return probe
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Measure input latency with injected key presses.')
+    parser.add_argument('--presses', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--poll', action='store_true', help='run every frame at 60 fps instead of sleeping while idle')
+    parser.add_argument('--das', type=int, default=DAS)
+    parser.add_argument('--arr', type=int, default=ARR)
+    args = parser.parse_args()
+
+    measure_latency(args.presses, args.seed, args.poll, das=args.das, arr=args.arr).print_report()
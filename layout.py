@@ -0,0 +1,57 @@
+import pygame
+from setting import *  # Imports the 1x sizes (CELL_SIZE, PADDING, SIDEBAR_WIDTH, ...)
+
+
+# --- Scaled Layout ---
+# setting.py describes the window at scale 1. A Layout multiplies every size
+# by one factor, so each component renders natively at the window's resolution
+# instead of scaling a 1x frame up every frame.
+class Layout:
+    """Pixel geometry of the window and all components at one scale."""
+
+    def __init__(self, scale=1, columns=COLUMNS, rows=ROWS, window_size=None):
+        self.scale = scale
+        self.columns = columns
+        self.rows = rows
+
+        # Sizes (whole pixels rounded down, so tiles line up with the grid and
+        # a fitted layout never overflows its window)
+        self.cell_size = max(1, self.px(CELL_SIZE))
+        self.padding = self.px(PADDING)
+        self.sidebar_width = self.px(SIDEBAR_WIDTH)
+        self.game_width = columns * self.cell_size
+        self.game_height = rows * self.cell_size
+        self.line_width = max(1, round(scale))    # Grid lines
+        self.border_width = max(2, round(2 * scale))  # Component borders
+
+        # Window: exactly the content, or the given size with the content centered
+        content = (self.game_width + self.sidebar_width + self.padding * 3,
+                   self.game_height + self.padding * 2)
+        self.window_size = window_size or content
+        left = (self.window_size[0] - content[0]) // 2
+        top = (self.window_size[1] - content[1]) // 2
+
+        # Component areas on the window
+        self.game_rect = pygame.Rect(left + self.padding, top + self.padding,
+                                     self.game_width, self.game_height)
+        sidebar_x = self.game_rect.right + self.padding
+        self.preview_rect = pygame.Rect(sidebar_x, self.game_rect.top, self.sidebar_width,
+                                        round(self.game_height * PREVIEW_HEIGHT_FRACTION))
+        score_height = round(self.game_height * SCORE_HEIGHT_FRACTION) - self.padding
+        self.score_rect = pygame.Rect(sidebar_x, self.game_rect.bottom - score_height,
+                                      self.sidebar_width, score_height)
+
+    def font_size(self, size):
+        """Scales a 1x font size."""
+        return max(1, round(size * self.scale))
+
+    def px(self, value):
+        """Scales a 1x pixel distance (rounded down)."""
+        return int(value * self.scale + 1e-9)
+
+
+def fit_layout(window_size, columns=COLUMNS, rows=ROWS):
+    """Returns the largest layout that fits into a window of the given size."""
+    base = Layout(1, columns, rows)
+    scale = min(window_size[0] / base.window_size[0], window_size[1] / base.window_size[1])
+    return Layout(scale, columns, rows, window_size)
@@ -1,40 +1,96 @@
 import pygame
 from setting import *  # Imports constants (WINDOW_WIDTH, COLORS, TETROMINOS)
 from sys import exit         # Required to close the window without errors
+from math import ceil        # Rounds sleep timeouts up to whole milliseconds
+from time import perf_counter  # Arrival times of input events for the latency probe
 
 # Internal components of the Tetris project
 from game import Game        # Handles the grid, falling blocks, and collisions
 from score import Score      # Handles the UI for points, lines, and level
 from preview import Preview  # Handles the UI showing the upcoming shapes
 
-from random import choice    # Used to pick a random shape from the dictionary keys
+from randomizer import PieceGenerator  # Seeded 7-bag / classic / history piece source
+from random import Random              # Picks a seed when none is given
+from replay import Recorder            # Optional recording of the session
+from profiler import Profiler          # Optional frame-time instrumentation
+from telemetry import Telemetry, session_path  # Optional session statistics log
+from assets import DEFERRED, load_deferred  # Non-critical assets loaded after the first frame
+from layout import Layout, fit_layout  # Pixel geometry at the window's scale
+
+# Window events Main reacts to (others are dropped while it waits for input)
+HANDLED_EVENTS = {pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.VIDEORESIZE, pygame.WINDOWFOCUSLOST}
 
 
 class Main:
-    def __init__(self):
+    def __init__(self, seed=None, randomizer=RANDOMIZER, game_clock=None, record=None,
+                 profile=False, window_size=None, fullscreen=False, columns=COLUMNS, rows=ROWS,
+                 telemetry=None, das=DAS, arr=ARR):
         """Initializes the game engine, window, and game components."""
 
         # 1. Pygame Setup
         pygame.init()
+        # The layout is scaled to the window (1x without a size, the desktop in
+        # fullscreen or when a large board would not fit at 1x)
+        self.columns, self.rows = columns, rows
+        desktop = pygame.display.get_desktop_sizes()[0]
+        if fullscreen:
+            window_size = desktop
+        self.layout = Layout(1, columns, rows)
+        if window_size or self.layout.window_size[0] > desktop[0] or self.layout.window_size[1] > desktop[1]:
+            self.layout = fit_layout(window_size or desktop, columns, rows)
         self.display_surface = pygame.display.set_mode(
-            (WINDOW_WIDTH, WINDOW_HEIGHT))
+            self.layout.window_size, pygame.FULLSCREEN if fullscreen else pygame.RESIZABLE)
         pygame.display.set_caption('Tetris')
         self.clock = pygame.time.Clock()  # Controls the game's frame rate (FPS)
 
-        # 2. Shape Management
-        self.next_shapes = [choice(list(TETROMINOS.keys()))
-                            for shape in range(3)]
+        # 2. Shape Management (a fixed seed replays the same piece sequence)
+        # A seed is always chosen so that recordings can rebuild the sequence
+        self.seed = Random().getrandbits(32) if seed is None else seed
+        self.randomizer = randomizer
+        self.pieces = PieceGenerator(randomizer, self.seed)
 
         # 3. Component Initialization
         # --- IMPORTANT: Create Score and Preview BEFORE Game ---
-        self.score = Score()
-        self.preview = Preview()
+        self.score = Score(self.layout)
+        self.preview = Preview(self.layout)
 
         # Now that self.score exists, we can safely create the Game
         # because the Game's reset() function will try to talk to self.score
-        self.game = Game(self.get_next_shape, self.update_score)
-        self.score = Score()
-        self.preview = Preview()
+        # `game_clock` replaces the real clock for game time (replays drive it)
+        self.game = Game(self.get_next_shape, self.update_score, clock=game_clock, layout=self.layout,
+                         columns=columns, rows=rows)
+        self.game.controls.das, self.game.controls.arr = das, arr  # Key repeat timing
+
+        # Visual Background: drawn once, components then only redraw their own areas
+        self.display_surface.fill(GRAY)
+        pygame.display.update()
+
+        # 4. Optional recording of every frame to a replay file
+        self.recorder = None
+        if record:
+            self.recorder = Recorder(record, self.game, self.pieces, self.seed, randomizer)
+
+        # 5. Optional frame profiler (F3 toggles its overlay)
+        self.profiler = Profiler() if profile else None
+        self.game.profiler = self.profiler
+        self.trace_path = None  # Where to dump the profiler trace on exit
+
+        # 6. Optional session statistics, written by a background thread
+        self.telemetry = None
+        if telemetry:
+            self.telemetry = Telemetry(session_path(telemetry, self.seed), self.game, self.seed, randomizer)
+
+        # 7. Sleep between timer deadlines instead of polling at a fixed 60 fps
+        self.idle_sleep = True
+
+        # 8. Optional AI player (ai.AIPlayer) moving the pieces instead of the keyboard
+        self.ai = None
+
+        # 9. Input: events stamped the moment they arrive, applied by the game at
+        # that time (keys are ignored while a replay drives the game)
+        self.events = []      # (ms, perf_counter, event) collected while waiting
+        self.keyboard = True
+        self.latency = None   # Optional latency.LatencyProbe
 
     def update_score(self, lines, score, level):
         """Updates the Score object with new data coming from the Game logic."""
@@ -42,39 +98,202 @@ class Main:
         self.score.score = score
         self.score.level = level
 
+    @property
+    def next_shapes(self):
+        """The upcoming shapes shown in the preview."""
+        return self.pieces.peek()
+
     def get_next_shape(self):
-        """Pops the first shape from the preview list and adds a new random one."""
-        next_shape = self.next_shapes.pop(0)
-        self.next_shapes.append(choice(list(TETROMINOS.keys())))
-        return next_shape
+        """Deals the next shape from the piece generator."""
+        return self.pieces.next()
+
+    def restore(self, state):
+        """Loads a replay snapshot (see replay.Recorder.snapshot)."""
+        self.pieces = PieceGenerator(self.randomizer, self.seed)
+        self.pieces.skip(state['pieces'])
+        self.game.clock.source.ticks = state['ticks']
+        self.game.restore(state['game'])
+
+    def resize(self, size):
+        """Lays every component out for a new window size.
+
+        Tiles, grid layers, fonts and preview images are rebuilt here once
+        (and cached per size), so frames are drawn natively at the new scale.
+        """
+        self.layout = fit_layout(size, self.columns, self.rows)
+        self.display_surface = pygame.display.get_surface()
+        self.game.set_layout(self.layout)
+        self.score.set_layout(self.layout)
+        self.preview.set_layout(self.layout)
+        self.display_surface.fill(GRAY)
+        pygame.display.update()
+
+    def collect_events(self, deadline=None):
+        """Sleeps until `deadline` (ms, None = forever) or the next input, stamping events on arrival.
+
+        Returns on the first event Main handles, so a key press is shown right
+        away instead of after the rest of the frame cap.
+        """
+        while True:
+            if deadline is None:
+                event = pygame.event.wait()
+            else:
+                timeout = ceil(deadline - pygame.time.get_ticks())
+                if timeout <= 0:
+                    return
+                event = pygame.event.wait(timeout)
+            if event.type == pygame.NOEVENT:
+                return
+            if event.type in HANDLED_EVENTS:
+                self.events.append((pygame.time.get_ticks(), perf_counter(), event))
+                return
+
+    def handle_events(self):
+        """Processes window events; closing the window ends the program.
+
+        Key presses and releases are queued on the game's controls with the
+        time they arrived, the game applies them at that time in its next step.
+        """
+        events = self.events
+        self.events = []
+        now = pygame.time.get_ticks()
+        arrived = perf_counter()
+        events += [(now, arrived, event) for event in pygame.event.get()]
+        controls = self.game.controls
+        for ticks, arrived, event in events:
+            if event.type in (pygame.KEYDOWN, pygame.KEYUP) and self.keyboard:
+                pressed = event.type == pygame.KEYDOWN
+                if controls.key(event.key, pressed, ticks) and pressed and self.latency:
+                    self.latency.input(getattr(event, 'sent', arrived))  # Injected events carry their send time
+            if event.type == pygame.WINDOWFOCUSLOST:
+                controls.release_all(ticks)  # Their KEYUP events go to another window
+            if event.type == pygame.QUIT:
+                if self.recorder:
+                    self.recorder.close()
+                if self.telemetry:
+                    self.telemetry.close()
+                if self.profiler and self.trace_path:
+                    self.profiler.dump(self.trace_path)
+                if self.latency:
+                    self.latency.print_report()
+                pygame.quit()
+                exit()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and self.profiler:
+                self.profiler.show_overlay = not self.profiler.show_overlay
+                self.game.redraw_all = True  # Uncover the area under the overlay
+            if event.type == pygame.VIDEORESIZE:
+                self.resize(event.size)
+        if self.profiler:
+            self.profiler.mark('events')
+
+    def draw_frame(self, actions=None):
+        """Runs one game frame with the given actions (live keys if None) and draws it."""
+        # The Game class handles its own internal "Game Over" state
+        # and listens for the 'R' key to call its own reset() method.
+        # Every component only redraws what changed and returns those areas.
+        profiler = self.profiler
+        dirty_rects = self.game.run(actions)
+        if self.latency:
+            self.latency.simulated()
+        dirty_rects += self.score.run()
+        if profiler:
+            profiler.mark('score')
+        dirty_rects += self.preview.run(self.next_shapes)
+        if profiler:
+            profiler.mark('preview')
+            dirty_rects += profiler.draw(self.display_surface, self.layout.game_rect.topleft)
+            profiler.mark('overlay')
+
+        # Push only the changed areas to the window
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+        if self.latency:
+            self.latency.displayed()
+        if profiler:
+            profiler.mark('display')
+
+    def wait_for_work(self):
+        """Sleeps until the next timer deadline or input event, returns the ms slept.
+
+        Nothing changes on screen between deadlines unless the player does
+        something, so an idle game (and the game over screen) uses no CPU.
+        """
+        if (self.ai and self.game.game_active) or DEFERRED or self.events:
+            return 0  # AI moves, pending assets and unhandled input need the next frame
+        # Held directions repeat through the game's deadlines (None: sleep until input)
+        start = pygame.time.get_ticks()
+        self.collect_events(self.game.next_deadline())
+        return pygame.time.get_ticks() - start
 
     def run(self):
         """The Main Game Loop that runs indefinitely while the game is open."""
         while True:
-            # 1. Event Loop
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
+            self.run_frame()
 
-            # 2. Visual Background
-            self.display_surface.fill(GRAY)
+    def run_frame(self):
+        """Sleeps until there is something to do, then runs and draws one frame."""
+        # 0. Sleep while idle (the frame cap below still applies when busy)
+        idle_ms = self.wait_for_work() if self.idle_sleep else 0
+        frame_start = pygame.time.get_ticks()
 
-            # 3. Component Execution
-            # The Game class now handles its own internal "Game Over" state
-            # and listens for the 'R' key to call its own reset() method.
-            self.game.run()
-            self.score.run()
-            self.preview.run(self.next_shapes)
+        if self.profiler:
+            self.profiler.start_frame()
 
-            # 4. Refresh Screen
-            pygame.display.update()
+        # 1. Event Loop
+        self.handle_events()
 
-            # Use a fixed FPS (e.g., 60) to prevent the game from running too fast
-            self.clock.tick(60)
+        # 2. Component Execution and Screen Refresh
+        if self.ai:
+            self.ai.update(self.game, self.next_shapes)
+        self.draw_frame()
+        if DEFERRED:
+            load_deferred()  # One deferred asset per frame once the game is visible
+
+        # Cap the frame rate at FPS, but wake up for input to show it sooner
+        # (the returned frame time shows dropped frames in the profiler)
+        self.collect_events(frame_start + 1000 / FPS)
+        frame_ms = self.clock.tick()
+        if self.profiler:
+            self.profiler.mark('tick')
+            self.profiler.end_frame(frame_ms - idle_ms)  # Time asleep is not a dropped frame
+        if self.telemetry:
+            self.telemetry.frame(frame_ms - idle_ms)
 
 
 # This ensures the game only starts if this specific file is executed
 if __name__ == "__main__":
-    main = Main()
+    import argparse
+    parser = argparse.ArgumentParser(description='Play Tetris.')
+    parser.add_argument('--seed', type=int, help='seed of the piece sequence')
+    parser.add_argument('--record', metavar='PATH', help='record the session to a replay file')
+    parser.add_argument('--profile', action='store_true', help='time every frame stage (F3 toggles the overlay)')
+    parser.add_argument('--trace', metavar='PATH', help='with --profile, write the frame trace (.csv or .json) on exit')
+    parser.add_argument('--telemetry', metavar='PATH',
+                        help='log session statistics to this file (or a new file in this directory)')
+    parser.add_argument('--das', type=int, default=DAS, help=f'ms before a held direction repeats (default {DAS})')
+    parser.add_argument('--arr', type=int, default=ARR, help=f'ms between repeats, 0 = to the wall (default {ARR})')
+    parser.add_argument('--latency', action='store_true', help='print input-to-screen latency on exit')
+    parser.add_argument('--ai', type=int, metavar='DEPTH', help='let the AI play, searching DEPTH pieces (1-4)')
+    parser.add_argument('--poll', action='store_true', help='run every frame at 60 fps instead of sleeping while idle')
+    parser.add_argument('--size', metavar='WxH', help='window size, the game is scaled to fit (e.g. 1920x1080)')
+    parser.add_argument('--fullscreen', action='store_true', help='scale the game to the whole screen')
+    parser.add_argument('--board', default='classic',
+                        help=f'board size: {", ".join(BOARD_SIZES)} or COLUMNSxROWS (e.g. 20x40)')
+    args = parser.parse_args()
+    if args.ai and args.record:
+        parser.error('AI moves bypass the recorded input, --ai cannot be recorded')
+
+    window_size = tuple(int(n) for n in args.size.split('x')) if args.size else None
+    columns, rows = BOARD_SIZES.get(args.board) or (int(n) for n in args.board.split('x'))
+    main = Main(args.seed, record=args.record, profile=args.profile or bool(args.trace),
+                window_size=window_size, fullscreen=args.fullscreen, columns=columns, rows=rows,
+                telemetry=args.telemetry, das=args.das, arr=args.arr)
+    main.trace_path = args.trace
+    if args.latency:
+        from latency import LatencyProbe
+        main.latency = LatencyProbe()
+    main.idle_sleep = not args.poll
+    if args.ai:
+        from ai import AIPlayer
+        main.ai = AIPlayer(args.ai)
     main.run()
@@ -1,43 +1,63 @@
 from setting import *  # Import game constants (colors, sizes, etc.)
-from pygame.image import load       # Import the function to load image files
-from os import path   # Import path to handle folder/file directories safely
+from assets import load_scaled_image  # Loads each image once per scale, from the disk cache when possible
+from layout import Layout
 
 
 class Preview:
-    def __init__(self):
+    def __init__(self, layout=None):
+        # Surfaces and images at the window's scale (1x by default)
+        self.set_layout(layout or Layout())
+
+    def set_layout(self, layout):
+        """Rebuilds the preview box for a new scale (once per window resize)."""
+        self.layout = layout
 
         # --- General Setup ---
         # Get a reference to the main window surface
         self.display_surface = pygame.display.get_surface()
 
-        # Create the preview surface based on sidebar width and a fraction of game height
-        self.surface = pygame.Surface(
-            (SIDEBAR_WIDTH, GAME_HEIGHT * PREVIEW_HEIGHT_FRACTION))
-
-        # Create a rectangle to position the preview box at the top-right of the window
-        self.rect = self.surface.get_rect(
-            topright=(WINDOW_WIDTH - PADDING, PADDING))
+        # Create the preview surface, positioned at the top of the sidebar
+        self.rect = layout.preview_rect.copy()
+        self.surface = pygame.Surface(self.rect.size)
 
         # --- Shapes Setup ---
-        # Dictionary comprehension: Load and convert the .png image for every Tetromino type
-        # It looks in the 'Shapes' folder for files like 'I.png', 'O.png', etc.
-        self.shape_surfaces = {shape: load(path.join(
-            'Shapes', f'{shape}.png')).convert_alpha() for shape in TETROMINOS.keys()}
+        # Dictionary comprehension: the converted .png image of every Tetromino type
+        # (files like 'I.png', 'O.png', etc. next to the game's modules), resized once per scale
+        self.shape_surfaces = {shape: load_scaled_image(f'{shape}.png', layout.scale)
+                               for shape in TETROMINOS.keys()}
 
         # --- Image Position Data ---
-        # Divide the preview surface height by 3 to create slots for the 3 upcoming pieces
-        self.increment_height = self.surface.get_height() / 3
+        # Divide the preview surface height to create one slot per upcoming piece
+        self.increment_height = self.surface.get_height() / PREVIEW_COUNT
+
+        # Shapes currently drawn in each slot (None = slot never drawn)
+        self.drawn_shapes = [None] * PREVIEW_COUNT
+
+    def slot_rect(self, i):
+        """Returns the area of preview slot i on the preview surface."""
+        return pygame.Rect(0, round(i * self.increment_height),
+                           self.surface.get_width(), round(self.increment_height))
 
     def display_pieces(self, shapes):
-        """Draws the upcoming shapes onto the preview surface."""
+        """Draws the upcoming shapes that changed onto the preview surface."""
+        changed = []
         for i, shape in enumerate(shapes):
+            if self.drawn_shapes[i] == shape:
+                continue  # This slot already shows the right piece
+            self.drawn_shapes[i] = shape
+            changed.append(i)
+
+            # Clear just this slot with the gray background
+            slot = self.slot_rect(i)
+            self.surface.fill(GRAY, slot)
+
             # Pick the correct image from our pre-loaded dictionary
             shape_surface = self.shape_surfaces[shape]
 
             # Calculate the horizontal center of the preview box
             x = self.surface.get_width() / 2
 
-            # Calculate the vertical center for each slot (i=0, 1, or 2)
+            # Calculate the vertical center for each slot (i=0, 1, 2, ...)
             y = self.increment_height / 2 + i * self.increment_height
 
             # Create a rect for the image and center it at our calculated x, y
@@ -45,17 +65,22 @@ class Preview:
 
             # Draw (blit) the piece image onto the preview surface
             self.surface.blit(shape_surface, rect)
+        return changed
 
     def run(self, next_shapes):
-        """The main method to update and draw the preview UI."""
-        # Fill the background of the preview box with gray
-        self.surface.fill(GRAY)
-
-        # Draw the images of the next shapes
-        self.display_pieces(next_shapes)
-
-        # Draw the preview surface onto the main display window
-        self.display_surface.blit(self.surface, self.rect)
+        """Redraws the preview slots that changed, returns the changed screen areas."""
+        changed = self.display_pieces(next_shapes)
+        if not changed:
+            return []
+
+        # Copy the changed slots onto the main display window
+        dirty_rects = []
+        for i in changed:
+            slot = self.slot_rect(i)
+            rect = slot.move(self.rect.topleft)
+            self.display_surface.blit(self.surface, rect, slot)
+            dirty_rects.append(rect)
 
         # Draw a border around the preview box
-        pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, 2, 2)
+        pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, self.layout.border_width, 2)
+        return dirty_rects
@@ -0,0 +1,147 @@
+import pygame
+from setting import *  # Imports FPS and the colors
+from array import array  # Compact fixed-size sample storage
+from time import perf_counter  # High resolution clock for stage timings
+from text_cache import get_font
+import json
+
+
+# --- Frame Stages ---
+# Stages in the order they run inside one frame of Main.run. Each sample is
+# the time in ms since the previous mark, so the stages add up to the frame.
+STAGES = (
+    'events',   # Main.handle_events: stamping key events and queueing them on Controls
+    'input',    # Game.input: Controls.update applies the queued events in time order
+    'timers',   # Game.timer_update: Controls.advance runs the scheduler (gravity) and DAS/ARR shifts
+    'sprites',  # sprites.update
+    'stack',    # Locked stack layer update after locks and clears
+    'draw',     # Dirty cells, ghost and piece drawn onto the game surface
+    'score',    # Score.run
+    'preview',  # Preview.run
+    'overlay',  # This profiler's own overlay
+    'display',  # pygame.display.update
+    'tick',     # clock.tick: mostly the sleep until the next frame
+)
+FRAME = 'frame'            # Frame interval returned by clock.tick (ms)
+PERCENTILES = (50, 95, 99)
+DROP_FACTOR = 1.5          # Frames longer than 1.5x the frame budget count as dropped
+OVERLAY_REFRESH = 30       # Frames between two renders of the overlay text
+OVERLAY_WINDOW = 600       # The overlay shows percentiles of the last 10 s only
+
+
+class Profiler:
+    """Times every stage of the frame loop into a fixed-size ring buffer.
+
+    Disabled profiling costs nothing: the game and Main only call mark() when
+    a profiler is attached (`self.profiler` is None otherwise).
+    """
+
+    def __init__(self, size=3600):
+        self.size = size  # Frames kept (one minute at 60 fps by default)
+        # samples[stage][i] = ms spent in that stage during ring slot i
+        self.samples = {stage: array('d', bytes(8 * size)) for stage in STAGES + (FRAME,)}
+        self.index = 0    # Ring slot of the frame being measured
+        self.count = 0    # Number of completed frames in the ring (at most size)
+        self.frames = 0   # Total completed frames
+        self.last = perf_counter()
+
+        # Overlay state
+        self.show_overlay = True
+        self.overlay_surface = None
+
+    def start_frame(self):
+        """Clears the ring slot of the new frame and starts its first stage."""
+        for samples in self.samples.values():
+            samples[self.index] = 0.0
+        self.last = perf_counter()
+
+    def mark(self, stage):
+        """Ends `stage`: adds the time since the previous mark to it."""
+        now = perf_counter()
+        self.samples[stage][self.index] += (now - self.last) * 1000
+        self.last = now
+
+    def end_frame(self, frame_ms):
+        """Stores the clock.tick result and moves to the next ring slot."""
+        self.samples[FRAME][self.index] = frame_ms
+        self.index = (self.index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self.frames += 1
+
+    def ordered(self, stage):
+        """Returns the samples of a stage from the oldest to the newest frame."""
+        samples = self.samples[stage]
+        if self.count < self.size:
+            return samples[:self.count].tolist()
+        return samples[self.index:].tolist() + samples[:self.index].tolist()
+
+    def summary(self, last=None):
+        """Returns mean and p50/p95/p99 in ms per stage, plus the dropped frame count.
+
+        Covers the whole ring, or only the `last` frames when given.
+        """
+        result = {}
+        count = min(last or self.count, self.count)
+        if not count:
+            return result
+        for stage in STAGES + (FRAME,):
+            values = self.ordered(stage)[-count:]
+            if stage == FRAME:
+                budget = 1000 / FPS
+                result['dropped'] = sum(1 for ms in values if ms > budget * DROP_FACTOR)
+            values.sort()
+            stats = {'mean': sum(values) / count}
+            for p in PERCENTILES:
+                # Nearest-rank percentile
+                stats[f'p{p}'] = values[min(count - 1, count * p // 100)]
+            result[stage] = stats
+        return result
+
+    # --- Trace Export ---
+    def dump(self, path):
+        """Writes the buffered frames to a CSV file, or JSON when the path ends in .json."""
+        columns = STAGES + (FRAME,)
+        rows = list(zip(*(self.ordered(stage) for stage in columns)))
+        first = self.frames - self.count  # Number of the oldest frame in the ring
+        if path.endswith('.json'):
+            trace = {
+                'fps': FPS,
+                'stages': columns,
+                'first_frame': first,
+                'frames': [[round(ms, 4) for ms in row] for row in rows],
+                'summary': self.summary(),
+            }
+            with open(path, 'w') as file:
+                json.dump(trace, file)
+        else:
+            with open(path, 'w') as file:
+                file.write(','.join(('frame',) + columns) + '\n')
+                for i, row in enumerate(rows):
+                    file.write(f'{first + i},' + ','.join(f'{ms:.4f}' for ms in row) + '\n')
+
+    # --- Overlay ---
+    def render_overlay(self):
+        """Renders the percentile table into the cached overlay surface."""
+        font = get_font(None, 18)
+        summary = self.summary(OVERLAY_WINDOW)
+        lines = [f'{"stage":8} {"p50":>6} {"p95":>6} {"p99":>6}']
+        for stage in STAGES + (FRAME,):
+            stats = summary.get(stage)
+            if stats:
+                lines.append(f'{stage:8} ' + ' '.join(f'{stats[f"p{p}"]:6.2f}' for p in PERCENTILES))
+        lines.append(f'dropped {summary.get("dropped", 0)} / {min(self.count, OVERLAY_WINDOW)}')
+
+        height = font.get_linesize()
+        width = max(font.size(line)[0] for line in lines) + 8
+        self.overlay_surface = pygame.Surface((width, height * len(lines) + 8))
+        self.overlay_surface.fill((0, 0, 0))
+        for i, line in enumerate(lines):
+            self.overlay_surface.blit(font.render(line, True, 'white'), (4, 4 + i * height))
+
+    def draw(self, surface, pos=(PADDING, PADDING)):
+        """Draws the overlay every frame (text refreshed every few frames), returns its area."""
+        if not self.show_overlay:
+            return []
+        if self.overlay_surface is None or self.frames % OVERLAY_REFRESH == 0:
+            self.render_overlay()
+        return [surface.blit(self.overlay_surface, pos)]
@@ -0,0 +1,80 @@
+from setting import *  # Imports TETROMINOS and the default randomizer settings
+from collections import deque  # O(1) pops from the front of the queue
+from itertools import islice
+from random import Random  # Private generator per game, so sequences can be seeded
+
+
+SHAPES = list(TETROMINOS.keys())
+
+
+# --- Randomizers ---
+# A randomizer is a function taking a Random instance and returning an endless
+# iterator of shape names. New ones can be added to RANDOMIZERS.
+
+def uniform_randomizer(rng):
+    """Classic mode: every piece is an independent uniform pick."""
+    while True:
+        yield rng.choice(SHAPES)
+
+
+def bag_randomizer(rng):
+    """7-bag: deals all seven shapes in a shuffled order, then refills the bag."""
+    bag = SHAPES[:]
+    while True:
+        rng.shuffle(bag)
+        yield from bag
+
+
+def history_randomizer(rng, history_size=4, rolls=6):
+    """History mode: rerolls a few times to avoid the most recent shapes."""
+    # Start from a history of S/Z so the first piece is never an S, Z or O
+    history = deque(['Z', 'S', 'Z', 'S'][:history_size], maxlen=history_size)
+    shape = rng.choice(['I', 'J', 'L', 'T'])
+    while True:
+        history.append(shape)
+        yield shape
+        for roll in range(rolls):
+            shape = rng.choice(SHAPES)
+            if shape not in history:
+                break
+
+
+RANDOMIZERS = {
+    'uniform': uniform_randomizer,
+    'bag': bag_randomizer,
+    'history': history_randomizer,
+}
+
+
+class PieceGenerator:
+    """Seeded source of shapes with a lookahead queue for the preview."""
+
+    def __init__(self, mode=RANDOMIZER, seed=None, preview=PREVIEW_COUNT):
+        self.seed = seed
+        self.random = Random(seed)
+        # `mode` is a RANDOMIZERS key or any randomizer function
+        randomizer = RANDOMIZERS[mode] if isinstance(mode, str) else mode
+        self.shapes = randomizer(self.random)
+
+        self.preview = preview  # Number of shapes always kept in the queue
+        self.queue = deque(islice(self.shapes, preview))
+        self.dealt = 0  # Number of shapes handed out so far
+
+    def next(self):
+        """Returns the next shape and tops the queue back up."""
+        if len(self.queue) <= self.preview:
+            self.queue.append(next(self.shapes))
+        self.dealt += 1
+        return self.queue.popleft()
+
+    def peek(self, count=None):
+        """Returns the next `count` shapes (the preview by default) without dealing them."""
+        count = self.preview if count is None else count
+        if count > len(self.queue):
+            self.queue.extend(islice(self.shapes, count - len(self.queue)))
+        return list(islice(self.queue, count))
+
+    def skip(self, count):
+        """Jumps ahead by dealing and discarding `count` shapes."""
+        for i in range(count):
+            self.next()
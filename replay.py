@@ -0,0 +1,314 @@
+from setting import *  # Imports ACTIONS, FPS and the randomizer settings
+import json
+import zlib  # Compresses frame chunks and snapshots
+from headless import Simulation
+from timer import VirtualClock
+
+
+# --- File Format ---
+# A replay is a stream of chunks, each written (and flushed) as soon as it is
+# complete, so a file is readable while the game is still being recorded:
+#
+#   chunk   = type (1 byte) + varint first_frame + varint tick + varint length + payload
+#   'H'     = header: JSON with version, seed, randomizer, board size and DAS/ARR
+#   'S'     = snapshot: zlib(JSON) of the full state before `first_frame`
+#   'F'     = frames: zlib of one record per frame, starting at `first_frame`
+#
+# A frame record is a varint holding the number of input events applied in
+# the frame (times 2, plus 1 if the frame's tick delta differs from the
+# previous frame, in which case the delta follows as a varint). Each event is
+# one byte (index in ACTIONS, bit 7 set for a press) and a varint of how many
+# ms before the frame's tick it happened. Ticks are ms since the recording
+# started, and most frames take a single zero byte.
+VERSION = 2
+CHUNK_FRAMES = 600        # Frames per compressed chunk (10 s at 60 fps)
+SNAPSHOT_FRAMES = 3600    # A seek snapshot every minute of play (multiple of CHUNK_FRAMES)
+DELTA_FOLLOWS = 1
+PRESSED = 0x80
+ACTION_IDS = {action: i for i, action in enumerate(ACTIONS)}
+
+
+def write_varint(out, value):
+    """Appends an unsigned integer using 7 bits per byte."""
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    """Reads a varint from `data` at `pos`, returns (value, new position)."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_state(state):
+    """Compresses a snapshot (board colors are stored as hex text in the JSON)."""
+    state = dict(state, game=dict(state['game']))
+    state['game']['board'] = dict(state['game']['board'], colors=state['game']['board']['colors'].hex())
+    return zlib.compress(json.dumps(state).encode())
+
+
+def decode_state(payload):
+    """Inverse of encode_state()."""
+    state = json.loads(zlib.decompress(payload))
+    board = state['game']['board']
+    board['colors'] = bytes.fromhex(board['colors'])
+    return state
+
+
+class Recorder:
+    """Streams the per-frame actions of a Game (plus periodic snapshots) to a file.
+
+    Attach it right after the game was created or reset, so the game's first
+    frame is also the first frame of the recording.
+    """
+
+    def __init__(self, path, game, generator, seed, randomizer=RANDOMIZER):
+        self.file = open(path, 'wb')
+        self.game = game
+        self.generator = generator  # Needed to store the piece sequence position
+        self.start = game.clock()   # Game time at which the recording starts
+        self.last_tick = 0
+        self.last_delta = None
+        self.frames = 0
+        self.buffer = bytearray()
+        self.chunk_frame = 0        # First frame of the chunk being buffered
+        self.chunk_tick = 0         # Tick before that first frame
+
+        controls = game.controls
+        header = {'version': VERSION, 'seed': seed, 'randomizer': randomizer,
+                  'columns': game.board.columns, 'rows': game.board.rows,
+                  'das': controls.das, 'arr': controls.arr, 'buffer_time': controls.buffer_time}
+        self.write_chunk(b'H', json.dumps(header).encode())
+        self.write_chunk(b'S', encode_state(self.snapshot()))
+        game.recorder = self
+
+    def snapshot(self):
+        """Returns the state before the next frame, with times relative to the start."""
+        return {
+            'game': self.game.snapshot(time_offset=-self.start),
+            'ticks': self.last_tick,
+            'frames': self.frames,
+            'pieces': self.generator.dealt,
+        }
+
+    def write_chunk(self, kind, payload, frame=None, tick=None):
+        """Writes one chunk and flushes it so readers can follow the stream."""
+        head = bytearray(kind)
+        write_varint(head, self.frames if frame is None else frame)
+        write_varint(head, self.last_tick if tick is None else tick)
+        write_varint(head, len(payload))
+        self.file.write(head + payload)
+        self.file.flush()
+
+    def flush_frames(self):
+        """Compresses the buffered frame records into an 'F' chunk."""
+        if self.buffer:
+            self.write_chunk(b'F', zlib.compress(self.buffer), self.chunk_frame, self.chunk_tick)
+            self.buffer = bytearray()
+        self.chunk_frame = self.frames
+        self.chunk_tick = self.last_tick
+        self.last_delta = None  # Every chunk starts with an explicit delta
+
+    def record_frame(self, events):
+        """Called by Game.input at the start of every frame with the events about to be applied."""
+        if self.frames and self.frames % CHUNK_FRAMES == 0:
+            self.flush_frames()
+            if self.frames % SNAPSHOT_FRAMES == 0:
+                self.write_chunk(b'S', encode_state(self.snapshot()))
+
+        now = self.game.clock()
+        tick = int(now - self.start)
+        delta = tick - self.last_tick
+        buffer = self.buffer
+        if delta == self.last_delta:
+            write_varint(buffer, len(events) << 1)
+        else:
+            write_varint(buffer, len(events) << 1 | DELTA_FOLLOWS)
+            write_varint(buffer, delta)
+            self.last_delta = delta
+        for time, action, pressed in events:
+            buffer.append(ACTION_IDS[action] | (PRESSED if pressed else 0))
+            write_varint(buffer, max(0, now - time))  # Events are never applied after the frame's tick
+        self.last_tick = tick
+        self.frames += 1
+
+    def close(self):
+        """Writes the last frames and closes the file."""
+        self.flush_frames()
+        self.file.close()
+        self.game.recorder = None
+
+
+def scan_chunks(data):
+    """Returns (kind, first_frame, tick, payload) for every complete chunk."""
+    chunks = []
+    pos = 0
+    try:
+        while pos < len(data):
+            kind = data[pos:pos + 1]
+            frame, pos = read_varint(data, pos + 1)
+            tick, pos = read_varint(data, pos)
+            length, pos = read_varint(data, pos)
+            if pos + length > len(data):
+                break  # Chunk still being written
+            chunks.append((kind, frame, tick, data[pos:pos + length]))
+            pos += length
+    except IndexError:
+        pass  # Truncated chunk header at the end of a live stream
+    return chunks
+
+
+def decode_frames(payload, frame, tick):
+    """Yields (frame, tick, events) for every record of an 'F' chunk.
+
+    Events are (time, action, pressed) with times in replay ticks.
+    """
+    data = zlib.decompress(payload)
+    pos = 0
+    delta = 0
+    while pos < len(data):
+        head = data[pos]
+        if head == 0:  # No events, same delta: the common case
+            pos += 1
+            events = ()
+        else:
+            head, pos = read_varint(data, pos)
+            if head & DELTA_FOLLOWS:
+                delta, pos = read_varint(data, pos)
+            events = []
+            for i in range(head >> 1):
+                byte = data[pos]
+                ago, pos = read_varint(data, pos + 1)
+                events.append((tick + delta - ago, ACTIONS[byte & ~PRESSED], bool(byte & PRESSED)))
+        tick += delta
+        yield frame, tick, events
+        frame += 1
+
+
+class Player:
+    """Re-simulates a replay on a target (a headless Simulation by default).
+
+    The target needs a `game` whose clock source is a VirtualClock and a
+    `restore(state)` method, like Simulation and Main.
+    """
+
+    def __init__(self, path, target=None):
+        with open(path, 'rb') as file:
+            self.chunks = scan_chunks(file.read())
+        self.header = json.loads(self.chunks[0][3])
+        if self.header['version'] != VERSION:
+            raise ValueError(f'{path}: replay format {self.header["version"]}, this version plays {VERSION}')
+        self.snapshots = [chunk for chunk in self.chunks if chunk[0] == b'S']
+        self.target = target or Simulation(self.header['seed'], randomizer=self.header['randomizer'],
+                                           columns=self.header.get('columns', COLUMNS),
+                                           rows=self.header.get('rows', ROWS))
+        self.game = self.target.game
+        controls = self.game.controls
+        controls.das, controls.arr = self.header['das'], self.header['arr']
+        controls.buffer_time = self.header['buffer_time']
+        self.restore_snapshot(self.snapshots[0])
+
+    def restore_snapshot(self, chunk):
+        """Puts the target into the state stored in a snapshot chunk."""
+        kind, frame, tick, payload = chunk
+        self.target.restore(decode_state(payload))
+        self.frame = frame  # Next frame to be played
+        self.tick = tick    # Tick of the last played frame
+
+    def frames(self):
+        """Yields the remaining (frame, tick, events) records from the current position."""
+        for kind, frame, tick, payload in self.chunks:
+            if kind != b'F' or frame + CHUNK_FRAMES <= self.frame:
+                continue  # Skipped without decompressing
+            for record in decode_frames(payload, frame, tick):
+                if record[0] >= self.frame:
+                    yield record
+
+    def play_frame(self, frame, tick, events, draw=None):
+        """Applies one recorded frame (through `draw` instead of Game.step if given)."""
+        self.game.clock.source.ticks = tick
+        self.game.controls.queue.extend(events)
+        (draw or self.game.step)()
+        if hasattr(self.target, 'frames'):
+            self.target.frames = frame + 1  # Simulation.step is bypassed, so its counter follows the record
+        self.frame = frame + 1
+        self.tick = tick
+
+    def seek(self, frame):
+        """Jumps to `frame`: restores the closest snapshot, then re-simulates the rest."""
+        snapshot = [chunk for chunk in self.snapshots if chunk[1] <= frame][-1]
+        # Moving forward within the same snapshot interval needs no restore
+        if not snapshot[1] <= self.frame <= frame:
+            self.restore_snapshot(snapshot)
+        self.run(until=frame)
+
+    def seek_time(self, ms):
+        """Jumps to the first frame recorded at or after `ms` milliseconds."""
+        snapshot = [chunk for chunk in self.snapshots if chunk[2] <= ms][-1]
+        if not (snapshot[1] <= self.frame and self.tick <= ms):
+            self.restore_snapshot(snapshot)
+        for frame, tick, events in self.frames():
+            if tick >= ms:
+                break
+            self.play_frame(frame, tick, events)
+
+    def run(self, until=None):
+        """Re-simulates at full speed up to frame `until` (or the end of the recording)."""
+        for frame, tick, events in self.frames():
+            if until is not None and frame >= until:
+                break
+            self.play_frame(frame, tick, events)
+        return self.target
+
+
+def watch(path, speed=1, start_ms=0):
+    """Plays a replay in a window at `speed` times real time through Game.run."""
+    from main import Main
+    header = json.loads(scan_chunks(open(path, 'rb').read())[0][3])
+    main = Main(header['seed'], header['randomizer'], game_clock=VirtualClock(),
+                columns=header.get('columns', COLUMNS), rows=header.get('rows', ROWS))
+    main.keyboard = False  # Keys would change what the recording does
+    player = Player(path, main)
+    if start_ms:
+        player.seek_time(start_ms)
+
+    frames = player.frames()
+    record = next(frames, None)
+    real_start = pygame.time.get_ticks()
+    replay_start = player.tick
+    while record:
+        main.handle_events()
+        # Play every recorded frame due by now; only the last one is drawn
+        due = replay_start + (pygame.time.get_ticks() - real_start) * speed
+        while record and record[1] <= due:
+            upcoming = next(frames, None)
+            if upcoming and upcoming[1] <= due:
+                player.play_frame(*record)
+            else:
+                player.play_frame(*record, draw=main.draw_frame)
+            record = upcoming
+        main.clock.tick(FPS)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Replay a recorded Tetris session.')
+    parser.add_argument('path')
+    parser.add_argument('--speed', type=float, default=1, help='playback speed, e.g. 1, 4 or 16')
+    parser.add_argument('--start', type=float, default=0, help='start at this many seconds')
+    parser.add_argument('--headless', action='store_true', help='re-simulate at full speed and print the result')
+    args = parser.parse_args()
+
+    if args.headless:
+        simulation = Player(args.path).run()
+        print(f'score {simulation.score}, lines {simulation.lines}, level {simulation.level}')
+    else:
+        watch(args.path, args.speed, int(args.start * 1000))
@@ -1,40 +1,48 @@
 from setting import *  # Import game-wide variables like COLORS and dimensions
-from os.path import join  # Used to combine folder and file names for the font path
+from text_cache import TEXT_CACHE
+from assets import load_font  # Resolves bundled fonts next to the game's modules
+from layout import Layout
 
 
 class Score:
-    def __init__(self):
+    def __init__(self, layout=None):
 
-        # --- General Setup ---
-        # Create the surface for the score box based on settings
-        self.surface = pygame.Surface(
-            (SIDEBAR_WIDTH, GAME_HEIGHT * SCORE_HEIGHT_FRACTION - PADDING))
+        # --- Game Data ---
+        # Initialize the starting values for the display
+        self.score = 0
+        self.level = 1
+        self.lines = 0
+        self.drawn = None  # (score, level, lines) currently on screen, None = never drawn
+
+        # Surfaces and font at the window's scale (1x by default)
+        self.set_layout(layout or Layout())
+
+    def set_layout(self, layout):
+        """Rebuilds the score box for a new scale (once per window resize)."""
+        self.layout = layout
 
-        # Position the score box at the bottom-right corner of the window
-        self.rect = self.surface.get_rect(bottomright=(
-            WINDOW_WIDTH - PADDING, WINDOW_HEIGHT - PADDING))
+        # --- General Setup ---
+        # Create the surface for the score box, positioned at the bottom of the sidebar
+        self.rect = layout.score_rect.copy()
+        self.surface = pygame.Surface(self.rect.size)
 
         # Get a reference to the main game window to draw onto
         self.display_surface = pygame.display.get_surface()
 
         # --- Font Setup ---
-        # Load the custom font from the 'Shapes' folder at size 30
-        self.font = pygame.font.Font(join('Shapes', 'Russo_One.ttf'), 30)
+        # Load the custom font at size 30 scaled (once per size, shared)
+        self.font = load_font('Russo_One.ttf', layout.font_size(30))
 
         # --- Layout Logic ---
         # Divide the surface into 3 equal vertical sections for Score, Level, and Lines
         self.increment_height = self.surface.get_height() / 3
-
-        # --- Game Data ---
-        # Initialize the starting values for the display
-        self.score = 0
-        self.level = 1
-        self.lines = 0
+        self.drawn = None  # Redraw at the new size
 
     def display_text(self, pos, text):
         """Converts raw data into a text image and draws it."""
         # Create a text surface (render) with the format "Label:Value" in white
-        text_surface = self.font.render(f'{text[0]}: {text[1]}', True, 'white')
+        # (served from the text cache when this exact text was rendered before)
+        text_surface = TEXT_CACHE.render(self.font, f'{text[0]}: {text[1]}', 'white')
 
         # Create a rectangle for the text and center it at the provided position
         text_rect = text_surface.get_rect(center=pos)
@@ -43,7 +51,13 @@ class Score:
         self.surface.blit(text_surface, text_rect)
 
     def run(self):
-        """Updates and draws the score UI every frame."""
+        """Redraws the score UI when a value changed, returns the changed screen areas."""
+        # Skip the whole render while score, level and lines are unchanged
+        values = (self.score, self.level, self.lines)
+        if values == self.drawn:
+            return []
+        self.drawn = values
+
         # Clear the score box with a gray background
         self.surface.fill(GRAY)
 
@@ -61,4 +75,5 @@ class Score:
         self.display_surface.blit(self.surface, self.rect)
 
         # Draw a border around the score box for better visibility
-        pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, 2, 2)
+        pygame.draw.rect(self.display_surface, LINE_COLOR, self.rect, self.layout.border_width, 2)
+        return [self.rect]
@@ -0,0 +1,130 @@
+from setting import *  # Imports grid size and actions
+from multiprocessing import Pool, cpu_count
+from multiprocessing.shared_memory import SharedMemory
+from time import perf_counter
+from board import SHAPE_IDS
+from headless import Simulation
+
+
+# --- Shared Memory Layout ---
+# Per game: the final board colors, 4 stats and the upcoming piece queue
+BOARD_SIZE = COLUMNS * ROWS
+STATS = ('score', 'lines', 'level', 'pieces')
+QUEUE_SIZE = PREVIEW_COUNT
+
+
+def random_policy(simulation):
+    """Default policy: presses random keys every frame."""
+    rng = simulation.random
+    return {action for action in (LEFT, RIGHT, ROTATE, DOWN) if rng.random() < 0.2}
+
+
+class SharedBuffers:
+    """Shared-memory blocks for the boards, stats and queues of every game."""
+
+    def __init__(self, num_games, names=None):
+        sizes = (num_games * BOARD_SIZE, num_games * len(STATS) * 8, num_games * QUEUE_SIZE)
+        if names is None:  # Owner process: create the blocks
+            self.blocks = [SharedMemory(create=True, size=size) for size in sizes]
+        else:              # Worker process: attach to existing blocks by name
+            self.blocks = [SharedMemory(name=name) for name in names]
+        self.names = [block.name for block in self.blocks]
+
+        self.boards = self.blocks[0].buf
+        self.stats = self.blocks[1].buf.cast('q')  # Signed 64-bit integers
+        self.queues = self.blocks[2].buf
+
+    def write(self, index, simulation, pieces):
+        """Stores the final state of one game into its slots."""
+        board = simulation.game.board
+        self.boards[index * BOARD_SIZE:(index + 1) * BOARD_SIZE] = board.colors
+        stats = (simulation.score, simulation.lines, simulation.level, pieces)
+        for i, value in enumerate(stats):
+            self.stats[index * len(STATS) + i] = value
+        for i, shape in enumerate(simulation.next_shapes):
+            self.queues[index * QUEUE_SIZE + i] = SHAPE_IDS[shape]
+
+    def read_stats(self, index):
+        """Returns the stats of one game as a dict."""
+        start = index * len(STATS)
+        return dict(zip(STATS, self.stats[start:start + len(STATS)].tolist()))
+
+    def close(self, unlink=False):
+        """Releases the views and detaches (and deletes, for the owner) the blocks."""
+        self.stats.release()
+        self.boards = self.stats = self.queues = None
+        for block in self.blocks:
+            block.close()
+            if unlink:
+                block.unlink()
+
+
+def play_games(job):
+    """Worker entry point: plays a range of games and writes them to shared memory."""
+    names, num_games, first, last, policy, seed, max_frames = job
+    buffers = SharedBuffers(num_games, names)
+    for index in range(first, last):
+        simulation = Simulation(seed + index)
+        while simulation.step(policy(simulation)) and simulation.frames < max_frames:
+            pass
+        # Every placed piece was drawn once, plus the piece still falling (or blocked)
+        buffers.write(index, simulation, simulation.pieces - 1)
+    buffers.close()
+    return last - first
+
+
+def run_selfplay(num_games, policy=random_policy, workers=None, seed=0, max_frames=100_000):
+    """Plays `num_games` headless games across a process pool.
+
+    The policy is called once per frame with the Simulation and returns the
+    held actions; it must be a module-level function so it can be pickled.
+    Returns (per-game stats, games per second).
+    """
+    workers = workers or cpu_count()
+    buffers = SharedBuffers(num_games)
+    try:
+        # Split the games into one contiguous slice per chunk of work
+        chunk = max(1, num_games // (workers * 4))
+        jobs = [(buffers.names, num_games, first, min(first + chunk, num_games),
+                 policy, seed, max_frames) for first in range(0, num_games, chunk)]
+
+        start = perf_counter()
+        with Pool(workers) as pool:
+            for done in pool.imap_unordered(play_games, jobs):
+                pass
+        elapsed = perf_counter() - start
+
+        stats = [buffers.read_stats(index) for index in range(num_games)]
+    finally:
+        buffers.close(unlink=True)
+    return stats, num_games / elapsed
+
+
+def summarize(stats):
+    """Aggregates per-game stats into averages and maxima."""
+    count = len(stats)
+    return {
+        'games': count,
+        'avg_score': sum(game['score'] for game in stats) / count,
+        'max_score': max(game['score'] for game in stats),
+        'avg_lines': sum(game['lines'] for game in stats) / count,
+        'max_level': max(game['level'] for game in stats),
+        'avg_pieces': sum(game['pieces'] for game in stats) / count,
+    }
+
+
+def scaling(num_games=256, policy=random_policy, max_workers=None):
+    """Reports games/sec when running on 1, 2, 4, ... up to all cores."""
+    max_workers = max_workers or cpu_count()
+    counts = sorted({min(2 ** i, max_workers) for i in range(max_workers.bit_length() + 1)})
+    results = []
+    for workers in counts:
+        stats, games_per_sec = run_selfplay(num_games, policy, workers)
+        results.append((workers, games_per_sec))
+        print(f'{workers:3} workers: {games_per_sec:8.1f} games/sec  {summarize(stats)}')
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    scaling(int(sys.argv[1]) if len(sys.argv) > 1 else 256)
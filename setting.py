@@ -20,12 +20,41 @@ WINDOW_WIDTH = GAME_WIDTH + SIDEBAR_WIDTH + PADDING * 3
 WINDOW_HEIGHT = GAME_HEIGHT + PADDING * 2
 
 # --- Game Physics & Timing ---
+FPS = 60  # Frames per second of the main loop (and of one headless step)
 UPDATE_START_SPEED = 700  # Initial milliseconds between automatic downward moves
-MOVE_WAIT_TIME = 500     # Delay in ms before a held key moves the piece again
-ROTATE_WAIT_TIME = 200   # Delay in ms to prevent accidental double-rotations
+DAS = 167                 # ms a direction is held before the piece starts sliding (Delayed Auto Shift)
+ARR = 33                  # ms between two sliding moves after that (Auto Repeat Rate, 0 = to the wall)
+INPUT_BUFFER = 100        # ms a blocked rotation is retried (also on the next piece)
 # The starting coordinate for every new piece (Centered X, just above screen Y)
 BLOCK_OFFSET = pygame.Vector2(COLUMNS // 2, -1)
 
+# Board variants (columns, rows): the size is chosen per Game, COLUMNS and
+# ROWS are only the defaults
+BOARD_SIZES = {
+    'classic': (COLUMNS, ROWS),
+    'wide': (20, 40),
+    'mega': (100, 200),  # Stress test for collision, line clears and rendering
+}
+
+# --- Player Actions ---
+# The game logic only understands these actions, so the keyboard, bots and
+# headless simulations all feed the same input path
+LEFT = 'left'
+RIGHT = 'right'
+ROTATE = 'rotate'
+DOWN = 'down'
+RESTART = 'restart'
+ACTIONS = (LEFT, RIGHT, ROTATE, DOWN, RESTART)
+
+# Keyboard keys mapped to the action they trigger
+KEY_BINDINGS = {
+    pygame.K_LEFT: LEFT, pygame.K_a: LEFT,
+    pygame.K_RIGHT: RIGHT, pygame.K_d: RIGHT,
+    pygame.K_UP: ROTATE, pygame.K_w: ROTATE,
+    pygame.K_DOWN: DOWN, pygame.K_s: DOWN,
+    pygame.K_r: RESTART,
+}
+
 # --- Visual Identity (Colors) ---
 YELLOW = "#f1e60d"
 RED = "#e51b20"
@@ -51,7 +80,17 @@ TETROMINOS = {
     'S': {'shape': [(0, 0), (-1, 0), (0, -1), (1, -1)], 'color': RED},
 }
 
+# --- Piece Generation ---
+RANDOMIZER = 'bag'  # 'bag' (7-bag), 'uniform' (classic) or 'history' (reroll recent shapes)
+PREVIEW_COUNT = 3   # Number of upcoming shapes shown in the preview
+
 # --- Scoring System ---
 # Points awarded based on how many lines are cleared simultaneously
 # 1 line = 40, 2 = 100, 3 = 300, 4 = 1200 (The "Tetris")
 SCORE_DATA = {1: 40, 2: 100, 3: 300, 4: 1200}
+
+# --- Versus Mode ---
+# Garbage lines sent to an opponent per number of lines cleared at once
+GARBAGE_LINES = {1: 0, 2: 1, 3: 2, 4: 4}
+GARBAGE_COLOR = "#808080"  # Color of the garbage rows pushed under the stack
+VERSUS_PORT = 7777         # Default TCP port of the versus server
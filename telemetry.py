@@ -0,0 +1,425 @@
+from setting import *  # Imports SCORE_DATA, FPS and the randomizer settings
+import json
+import os
+import struct     # Length prefix of the compressed chunks
+import threading  # Background writer, so the game thread never touches the file
+import time
+import zlib       # Compresses event chunks
+from collections import Counter
+
+
+# --- File Format ---
+# A session log is the file magic followed by chunks, each written (and
+# flushed) by the background writer, so a log is readable while it grows:
+#
+#   chunk = length (4 bytes, little endian) + zlib(JSON events, one per line)
+#
+# Every event is a JSON array starting with its kind and the game time in ms
+# since the session started:
+#
+#   ['session', t, {version, seed, randomizer, columns, rows}]
+#   ['game', t]                                   A game started (first game or restart)
+#   ['piece', t, shape, decision_ms, keys, lines]  A piece locked: ms since it spawned,
+#                                                  new key presses, lines it cleared
+#   ['level', t, level, ms]                       Level reached, ms spent on the one before
+#   ['over', t, score, lines, level]              The game ended
+#   ['frames', t, count, dropped, histogram]      Frame times of up to FRAME_WINDOW frames,
+#                                                  histogram = [[whole ms, frames], ...]
+#   ['lost', t, events]                           Events dropped because the ring was full
+VERSION = 1
+MAGIC = b'TLOG1\n'
+CHUNK_HEADER = struct.Struct('<I')
+EXTENSION = '.tlog'
+RING_SIZE = 4096          # Events buffered between two flushes
+FLUSH_INTERVAL = 1.0      # Seconds between two wakeups of the writer
+FRAME_WINDOW = 600        # Frames per frame-time event (10 s at 60 fps)
+DROP_FACTOR = 1.5         # Frames longer than 1.5x the budget count as dropped (as in profiler.py)
+DECISION_BUCKET = 10      # Decision times are aggregated in 10 ms buckets
+CLEAR_NAMES = {1: 'single', 2: 'double', 3: 'triple', 4: 'tetris'}  # SCORE_DATA categories
+
+
+# --- Ring Buffer ---
+class EventRing:
+    """Fixed-size ring of events with one producer and one consumer thread.
+
+    Only the game thread writes slots and moves `head`, only the writer
+    thread moves `tail`, so neither side takes a lock. A full ring drops the
+    new event (and counts it) instead of making the game wait.
+    """
+
+    def __init__(self, size=RING_SIZE):
+        self.size = size
+        self.slots = [None] * size
+        self.head = 0     # Events pushed so far
+        self.tail = 0     # Events taken so far
+        self.dropped = 0  # Events lost to a full ring
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def push(self, event):
+        """Stores an event (game thread), returns False when the ring was full."""
+        head = self.head
+        if head - self.tail >= self.size:
+            self.dropped += 1
+            return False
+        self.slots[head % self.size] = event
+        self.head = head + 1  # Published only after the slot is written
+        return True
+
+    def take(self):
+        """Returns every event pushed since the last call, oldest first (writer thread)."""
+        head, tail = self.head, self.tail
+        if head == tail:
+            return []
+        start, end = tail % self.size, head % self.size
+        if start < end:
+            events = self.slots[start:end]
+        else:
+            events = self.slots[start:] + self.slots[:end]
+        self.tail = head
+        return events
+
+
+# --- Background Writer ---
+def frame_histogram(times):
+    """Turns a list of frame times (ms) into (count, dropped, [[whole ms, frames], ...])."""
+    budget = 1000 / FPS
+    histogram = Counter(int(ms) for ms in times)
+    dropped = sum(1 for ms in times if ms > budget * DROP_FACTOR)
+    return len(times), dropped, sorted(histogram.items())
+
+
+class LogWriter(threading.Thread):
+    """Drains an EventRing into compressed chunks, once per flush interval."""
+
+    def __init__(self, path, ring, interval=FLUSH_INTERVAL):
+        super().__init__(name='telemetry writer', daemon=True)
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.ring = ring
+        self.interval = interval
+        self.wake = threading.Event()  # Set to flush early (ring half full, or closing)
+        self.stopping = False
+        self.lost = 0     # Ring drops already reported in the log
+        self.chunks = 0
+        self.events = 0
+        self.start()
+
+    def run(self):
+        while not self.stopping:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            self.flush()
+        self.flush()  # Whatever was pushed before close()
+        self.file.close()
+
+    def encode(self, event):
+        """Returns the JSON text of an event (frame times become a histogram here)."""
+        if event[0] == 'frames':
+            event = ('frames', event[1]) + frame_histogram(event[2])
+        return json.dumps(event, separators=(',', ':'))
+
+    def flush(self):
+        """Writes the events waiting in the ring as one chunk."""
+        events = self.ring.take()
+        if not events:
+            return
+        lines = [self.encode(event) for event in events]
+        dropped = self.ring.dropped
+        if dropped != self.lost:
+            lines.append(json.dumps(['lost', events[-1][1], dropped - self.lost]))
+            self.lost = dropped
+        payload = zlib.compress('\n'.join(lines).encode())
+        self.file.write(CHUNK_HEADER.pack(len(payload)) + payload)
+        self.file.flush()
+        self.chunks += 1
+        self.events += len(events)
+
+    def stop(self):
+        """Writes the remaining events, closes the file and ends the thread."""
+        self.stopping = True
+        self.wake.set()
+        self.join()
+
+
+# --- Game Hook ---
+class Telemetry:
+    """Turns what happens in a Game into events for a session log.
+
+    Attach it right after the game was created (like the replay Recorder):
+    the game calls pressed() for every key press, placed() on every lock,
+    level_up() and game_over(); Main reports frame times through frame(). The game
+    thread only builds small tuples and pushes them into the ring, all
+    encoding, compression and file writes happen on the writer thread.
+    """
+
+    def __init__(self, path, game, seed=None, randomizer=RANDOMIZER, ring_size=RING_SIZE,
+                 flush_interval=FLUSH_INTERVAL):
+        self.game = game
+        self.start = game.clock()  # Game time at which the session starts
+        self.ring = EventRing(ring_size)
+        self.writer = LogWriter(path, self.ring, flush_interval)
+        self.frame_times = []  # Frame times (ms) since the last 'frames' event
+
+        header = {'version': VERSION, 'seed': seed, 'randomizer': randomizer,
+                  'columns': game.board.columns, 'rows': game.board.rows}
+        self.push(('session', 0, header))
+        self.game_started()
+        game.telemetry = self
+
+    def now(self):
+        """Game time in ms since the session started."""
+        return int(self.game.clock() - self.start)
+
+    def push(self, event):
+        """Hands an event to the writer thread without waiting for it."""
+        ring = self.ring
+        ring.push(event)
+        if ring.head - ring.tail == ring.size // 2:
+            self.writer.wake.set()  # Busy session: flush before the ring fills up
+
+    # --- Events (game thread) ---
+    def game_started(self):
+        """Called by Game.reset: a new game starts (the first one or a restart)."""
+        t = self.now()
+        self.piece_start = t  # The first piece spawns right away
+        self.level_start = t
+        self.keys = 0         # Key presses during the current piece
+        self.push(('game', t))
+
+    def pressed(self):
+        """Called by the game's controls for every key press."""
+        self.keys += 1
+
+    def placed(self, shape, lines):
+        """Called when a piece locked, with the number of lines it cleared."""
+        t = self.now()
+        self.push(('piece', t, shape, t - self.piece_start, self.keys, lines))
+        self.piece_start = t
+        self.keys = 0
+
+    def level_up(self, level):
+        """Called when a new level is reached."""
+        t = self.now()
+        self.push(('level', t, level, t - self.level_start))
+        self.level_start = t
+
+    def game_over(self):
+        """Called when the game ends."""
+        game = self.game
+        self.push(('over', self.now(), game.current_score, game.current_lines, game.current_level))
+
+    def frame(self, frame_ms):
+        """Called by Main once per frame with its frame time (ms)."""
+        self.frame_times.append(frame_ms)
+        if len(self.frame_times) == FRAME_WINDOW:
+            self.push(('frames', self.now(), self.frame_times))  # Summarized by the writer
+            self.frame_times = []
+
+    def close(self):
+        """Writes the remaining events and stops the writer thread."""
+        if self.frame_times:
+            self.push(('frames', self.now(), self.frame_times))
+            self.frame_times = []
+        self.writer.stop()
+        self.game.telemetry = None
+
+
+def session_path(path, seed=None):
+    """Returns `path`, or a new timestamped log file name when it is a directory."""
+    if os.path.isdir(path):
+        name = time.strftime('%Y%m%d-%H%M%S') + (f'-{seed}' if seed is not None else '')
+        return os.path.join(path, name + EXTENSION)
+    return path
+
+
+# --- Offline Aggregation ---
+def read_chunks(path):
+    """Streams the decompressed chunks of a session log, one at a time.
+
+    A chunk cut off at the end (a session still being written, or killed)
+    is ignored.
+    """
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path}: not a telemetry log')
+        while True:
+            head = file.read(CHUNK_HEADER.size)
+            if len(head) < CHUNK_HEADER.size:
+                return
+            (length,) = CHUNK_HEADER.unpack(head)
+            payload = file.read(length)
+            if len(payload) < length:
+                return
+            yield zlib.decompress(payload)
+
+
+def read_events(path):
+    """Streams the events of a session log."""
+    for chunk in read_chunks(path):
+        # One JSON array per chunk parses much faster than one loads() per line
+        yield from json.loads(b'[' + chunk.replace(b'\n', b',') + b']')
+
+
+def percentile(histogram, p, bucket=1):
+    """Nearest-rank percentile of a {value: count} histogram (values scaled by `bucket`)."""
+    total = sum(histogram.values())
+    if not total:
+        return 0
+    rank = min(total - 1, total * p // 100)
+    count = 0
+    for value in sorted(histogram):
+        count += histogram[value]
+        if count > rank:
+            return value * bucket
+
+
+class Summary:
+    """Totals over any number of session logs.
+
+    Everything is a sum or a histogram, so summaries of separate files (or
+    worker processes) merge exactly.
+    """
+
+    def __init__(self):
+        self.sessions = 0
+        self.games = 0
+        self.pieces = 0
+        self.keys = 0
+        self.play_ms = 0            # Game time from the start to the end of every game
+        self.finished = 0           # Games that ended (not closed mid-game)
+        self.score = 0              # Final scores of finished games
+        self.best_score = 0
+        self.lost_events = 0
+        self.decisions = Counter()  # Decision time bucket -> pieces
+        self.clears = Counter()     # Lines cleared at once -> pieces
+        self.level_ms = Counter()   # Level -> ms spent on it (levels that were completed)
+        self.levels = Counter()     # Level -> times it was completed
+        self.frames = Counter()     # Whole ms -> frames
+        self.dropped_frames = 0
+
+    def add_file(self, path):
+        """Adds the events of one session log, streamed chunk by chunk."""
+        self.sessions += 1
+        game_start = None  # Time the current game started (None between games)
+        t = 0
+        for event in read_events(path):
+            kind, t = event[0], event[1]
+            if kind == 'piece':
+                self.pieces += 1
+                self.decisions[event[3] // DECISION_BUCKET] += 1
+                self.keys += event[4]
+                if event[5]:
+                    self.clears[event[5]] += 1
+            elif kind == 'frames':
+                self.dropped_frames += event[3]
+                for ms, count in event[4]:
+                    self.frames[ms] += count
+            elif kind == 'game':
+                self.games += 1
+                game_start = t
+            elif kind == 'level':
+                self.level_ms[event[2] - 1] += event[3]
+                self.levels[event[2] - 1] += 1
+            elif kind == 'over':
+                self.play_ms += t - game_start
+                game_start = None
+                self.finished += 1
+                self.score += event[2]
+                self.best_score = max(self.best_score, event[2])
+            elif kind == 'lost':
+                self.lost_events += event[2]
+        if game_start is not None:
+            self.play_ms += t - game_start  # Session closed during a game
+
+    def merge(self, other):
+        """Adds the totals of another Summary."""
+        for name, value in vars(other).items():
+            if name == 'best_score':
+                self.best_score = max(self.best_score, value)
+            elif isinstance(value, Counter):
+                getattr(self, name).update(value)
+            else:
+                setattr(self, name, getattr(self, name) + value)
+
+    def report(self):
+        """Returns the aggregated statistics as a JSON-friendly dict."""
+        pieces = self.pieces or 1
+        frames = sum(self.frames.values())
+        return {
+            'sessions': self.sessions,
+            'games': self.games,
+            'pieces': self.pieces,
+            'play_minutes': round(self.play_ms / 60000, 2),
+            'pieces_per_minute': round(self.pieces / (self.play_ms / 60000), 2) if self.play_ms else 0,
+            'keys_per_piece': round(self.keys / pieces, 2),
+            'decision_ms': {f'p{p}': percentile(self.decisions, p, DECISION_BUCKET) for p in (50, 95, 99)},
+            'clears': {CLEAR_NAMES.get(lines, lines): self.clears[lines] for lines in SCORE_DATA},
+            'clears_per_100_pieces': {CLEAR_NAMES.get(lines, lines): round(100 * self.clears[lines] / pieces, 2)
+                                      for lines in SCORE_DATA},
+            'seconds_per_level': {level: round(self.level_ms[level] / self.levels[level] / 1000, 2)
+                                  for level in sorted(self.levels)},
+            'mean_score': round(self.score / self.finished, 1) if self.finished else 0,
+            'best_score': self.best_score,
+            'frame_ms': {f'p{p}': percentile(self.frames, p) for p in (50, 95, 99)},
+            'frames': frames,
+            'dropped_frames': self.dropped_frames,
+            'lost_events': self.lost_events,
+        }
+
+
+def summarize_file(path):
+    """Worker entry point: the Summary of one session log."""
+    summary = Summary()
+    summary.add_file(path)
+    return summary
+
+
+def log_files(paths):
+    """Expands directories into the session logs they contain."""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(EXTENSION):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def summarize(paths, workers=1):
+    """Aggregates session logs (files or directories), in a process pool when workers > 1."""
+    files = list(log_files(paths))
+    total = Summary()
+    if workers > 1:
+        from multiprocessing import Pool
+        with Pool(workers) as pool:
+            for summary in pool.imap_unordered(summarize_file, files, chunksize=16):
+                total.merge(summary)
+    else:
+        for path in files:
+            total.add_file(path)
+    return total
+
+
+if __name__ == "__main__":
+    # Offline aggregation of any number of session logs
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Summarize telemetry session logs.')
+    parser.add_argument('paths', nargs='+', help=f'session logs, or directories of {EXTENSION} files')
+    parser.add_argument('--workers', type=int, default=1, help='processes reading the logs')
+    parser.add_argument('--json', action='store_true', help='print the summary as JSON')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = summarize(args.paths, args.workers).report()
+    seconds = time.perf_counter() - start
+    if args.json:
+        print(json.dumps(report, indent=1))
+    else:
+        for key, value in report.items():
+            if isinstance(value, dict):
+                value = ', '.join(f'{name} {item}' for name, item in value.items())
+            print(f'{key:>18}  {value}')
+        print(f'{report["sessions"]} sessions in {seconds:.2f} s')
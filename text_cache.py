@@ -0,0 +1,62 @@
+import pygame
+from collections import OrderedDict  # Keeps entries in least-recently-used order
+
+
+# --- Font Cache ---
+# Fonts are loaded once per (name, size, bold) and then shared; SysFont lookups
+# scan every installed font, so they must never happen inside the frame loop
+FONTS = {}
+
+
+def get_font(name, size, bold=False, sysfont=False):
+    """Returns a loaded font, loading it on first use only."""
+    key = (name, size, bold, sysfont)
+    font = FONTS.get(key)
+    if font is None:
+        if sysfont:
+            font = pygame.font.SysFont(name, size, bold=bold)
+        else:
+            font = pygame.font.Font(name, size)
+            font.set_bold(bold)
+        FONTS[key] = font
+    return font
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces keyed by (font, text, color)."""
+
+    def __init__(self, max_size=128):
+        self.max_size = max_size      # Oldest entries are evicted past this size
+        self.surfaces = OrderedDict()
+        self.hits = 0                 # Renders served from the cache
+        self.misses = 0               # Renders that had to call font.render
+
+    def render(self, font, text, color, antialias=True):
+        """Returns the rendered text, only calling font.render on a cache miss."""
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)  # Mark as most recently used
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)  # Evict the least recently used
+        return surface
+
+    def stats(self):
+        """Returns the hit/miss counters and current size of the cache."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.surfaces),
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+# Shared cache used by every UI component
+TEXT_CACHE = TextCache()
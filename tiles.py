@@ -0,0 +1,71 @@
+import pygame
+from setting import *  # Imports CELL_SIZE
+from board import SHAPE_NAMES, SHAPE_COLORS
+
+
+# --- Tile States ---
+# normal:    solid block color (falling piece and locked stack)
+# ghost:     2px outline with a transparent center (landing preview)
+# flash:     solid white (line clear flash)
+# highlight: block color mixed with white (selected / hinted cells)
+TILE_STATES = ('normal', 'ghost', 'flash', 'highlight')
+TRANSPARENT = (0, 0, 0)  # Colorkey of the atlas, no tile uses pure black
+
+
+class TileAtlas:
+    """One surface holding a pre-rendered tile for every shape and state."""
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        # Atlas layout: one row per state, one column per shape id (column 0 unused)
+        self.surface = pygame.Surface((cell_size * len(SHAPE_NAMES), cell_size * len(TILE_STATES)))
+        self.surface.fill(TRANSPARENT)
+        self.surface.set_colorkey(TRANSPARENT)
+
+        # areas[state][shape_id] is the Rect of that tile inside the atlas
+        self.areas = {}
+        # tiles[state][shape_id] is a subsurface sharing the atlas pixels (no copy)
+        self.tiles = {}
+        for row, state in enumerate(TILE_STATES):
+            self.areas[state] = [None]
+            self.tiles[state] = [None]
+            for shape_id in range(1, len(SHAPE_NAMES)):
+                area = pygame.Rect(shape_id * cell_size, row * cell_size, cell_size, cell_size)
+                self.draw_tile(area, SHAPE_COLORS[shape_id], state)
+                self.areas[state].append(area)
+                self.tiles[state].append(self.surface.subsurface(area))
+
+    def draw_tile(self, area, color, state):
+        """Renders one tile into its area of the atlas."""
+        if state == 'normal':
+            self.surface.fill(color, area)
+        elif state == 'ghost':
+            pygame.draw.rect(self.surface, color,
+                             (area.x + 1, area.y + 1, self.cell_size - 1, self.cell_size - 1), 2)
+        elif state == 'flash':
+            self.surface.fill('white', area)
+        elif state == 'highlight':
+            self.surface.fill(pygame.Color(color).lerp('white', 0.4), area)
+
+    def tile(self, shape_id, state='normal'):
+        """Returns the shared tile surface of a shape id."""
+        return self.tiles[state][shape_id]
+
+    def blits_for(self, cells, shape_ids, state='normal'):
+        """Builds a Surface.blits() sequence drawing tiles at the given grid cells."""
+        size = self.cell_size
+        areas = self.areas[state]
+        return [(self.surface, (x * size, y * size), areas[shape_id])
+                for (x, y), shape_id in zip(cells, shape_ids)]
+
+
+# One atlas per cell size, built the first time it is needed
+ATLASES = {}
+
+
+def get_atlas(cell_size=CELL_SIZE):
+    """Returns the shared tile atlas for a cell size."""
+    atlas = ATLASES.get(cell_size)
+    if atlas is None:
+        atlas = ATLASES[cell_size] = TileAtlas(cell_size)
+    return atlas
@@ -1,8 +1,80 @@
 import pygame
+from heapq import heappush, heappop  # Min-heap of timer deadlines
+from itertools import count
+
+
+class VirtualClock:
+    """A millisecond clock that only moves when told to (for headless runs)."""
+
+    def __init__(self):
+        self.ticks = 0  # Milliseconds of simulated time
+
+    def __call__(self):
+        return self.ticks
+
+    def advance(self, ms):
+        """Moves simulated time forward by `ms` milliseconds."""
+        self.ticks += ms
+
+
+class FrameClock:
+    """Reads a source clock once per frame so every timer sees the same time."""
+
+    def __init__(self, source=None):
+        # Source clock in ms: pygame's clock unless a VirtualClock is given
+        self.source = source or pygame.time.get_ticks
+        self.ticks = self.source()
+
+    def __call__(self):
+        return self.ticks
+
+    def tick(self):
+        """Samples the source clock at the start of a frame."""
+        self.ticks = self.source()
+        return self.ticks
+
+
+class Scheduler:
+    """Min-heap of pending timer deadlines, checked with one clock read per frame.
+
+    Instead of asking every timer each frame, only the timers whose deadline
+    has passed are touched, and the time until the next deadline tells the
+    main loop how long it may sleep.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or pygame.time.get_ticks
+        # Entries are (deadline, order, timer, generation); `order` keeps equal
+        # deadlines in activation order and `generation` marks stale entries
+        self.heap = []
+        self.order = count()
+
+    def schedule(self, timer):
+        """Adds the deadline of a freshly (re)started timer."""
+        heappush(self.heap, (timer.start_time + timer.duration, next(self.order), timer, timer.generation))
+
+    def next_deadline(self):
+        """Returns the earliest live deadline in ms, or None when nothing is pending."""
+        heap = self.heap
+        while heap:
+            deadline, order, timer, generation = heap[0]
+            if generation == timer.generation:
+                return deadline
+            heappop(heap)  # Timer was stopped or restarted since: drop the old entry
+        return None
+
+    def run_due(self, now=None):
+        """Fires every timer whose deadline is at or before `now` (one clock read)."""
+        now = self.clock() if now is None else now
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            deadline, order, timer, generation = heappop(heap)
+            if generation == timer.generation:
+                timer.expire(deadline, now)
 
 
 class Timer:
-    def __init__(self, duration, repeated=False, func=None):
+    def __init__(self, duration, repeated=False, func=None, clock=None, scheduler=None):
         """Sets up the timer's properties."""
         self.repeated = repeated  # If True, the timer restarts automatically (like gravity)
         # The function to run when time is up (e.g., move_down)
@@ -10,34 +82,55 @@ class Timer:
         # How long to wait in milliseconds (e.g., 500ms)
         self.duration = duration
 
+        # Clock returning the current time in ms (pygame's clock unless a VirtualClock is given)
+        self.clock = clock or pygame.time.get_ticks
+        # Optional Scheduler: when set it fires the timer, update() is not needed
+        self.scheduler = scheduler
+
         self.start_time = 0      # Stores the exact millisecond the timer was turned on
         self.active = False      # Tracks if the timer is currently 'ticking'
+        self.generation = 0      # Bumped on every start/stop, invalidates old deadlines
 
-    def activate(self):
-        """Starts the timer by recording the current game time."""
+    def activate(self, start_time=None):
+        """Starts the timer at the current game time (or at `start_time`)."""
         self.active = True
-        # pygame.time.get_ticks() returns how many milliseconds have passed since the game started
-        self.start_time = pygame.time.get_ticks()
+        # The clock returns how many milliseconds have passed since the game started
+        self.start_time = self.clock() if start_time is None else start_time
+        self.generation += 1
+        if self.scheduler:
+            self.scheduler.schedule(self)
 
     def deactivate(self):
         """Stops the timer and clears the start time."""
         self.active = False
         self.start_time = 0
+        self.generation += 1
 
-    def update(self):
-        """Constantly checks if enough time has passed to trigger the timer."""
-        current_time = pygame.time.get_ticks()
+    def set_duration(self, duration):
+        """Changes the duration, moving the deadline of a running timer."""
+        self.duration = duration
+        if self.active:
+            self.activate(self.start_time)
 
-        # Check: Is the difference between 'now' and 'start' greater than the duration?
-        if current_time - self.start_time >= self.duration and self.active:
+    def expire(self, deadline, now):
+        """Runs the timer's function and restarts it if it repeats."""
+        # 1. Trigger the Function: If a function was assigned, run it now.
+        if self.func:
+            self.func()
+
+        # 2. Stop: Turn the timer off once the event has happened
+        self.deactivate()
 
-            # 1. Trigger the Function: If a function was assigned, run it now.
-            if self.func and self.start_time != 0:
-                self.func()
+        # 3. Repeat: start again from the deadline (not from the frame that
+        # noticed it), so frame jitter does not slow the timer down. After a
+        # stall longer than one period it restarts from now instead of bursting.
+        if self.repeated:
+            self.activate(deadline if now - deadline < self.duration else now)
 
-            # 2. Stop: Turn the timer off once the event has happened
-            self.deactivate()
+    def update(self):
+        """Checks if enough time has passed to trigger the timer (when not scheduled)."""
+        current_time = self.clock()
 
-            # 3. Repeat: If it's a repeating timer (like gravity), start it again immediately
-            if self.repeated:
-                self.activate()
+        # Check: Is the difference between 'now' and 'start' greater than the duration?
+        if current_time - self.start_time >= self.duration and self.active:
+            self.expire(self.start_time + self.duration, current_time)
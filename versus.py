@@ -0,0 +1,515 @@
+from setting import *  # Imports GARBAGE_LINES, VERSUS_PORT, FPS and the grid size
+import asyncio
+import json
+import zlib  # Board checksums
+from random import Random
+from time import perf_counter
+from board import Board
+
+
+# --- Protocol ---
+# One compact JSON message per line. Boards never travel over the network:
+# every client plays its own game locally and only sends its placements (piece,
+# garbage that rose under it and a checksum of the result). The other clients
+# replay them on local copies of that player's board.
+#
+#   client -> server
+#   hello   {'t': 'hello', 'name': name}
+#   place   {'t': 'place', 'p': [shape, rotation, x, y], 'g': [[lines, hole], ...],
+#            'a': garbage lines sent, 'c': board checksum}
+#   over    {'t': 'over'}          the player topped out (or stopped playing)
+#   pong    {'t': 'pong', 'id': n}
+#
+#   server -> client
+#   start   {'t': 'start', 'you': id, 'players': {id: name}, 'seed': seed,
+#            'size': [columns, rows]}
+#   batch   {'t': 'batch', 'e': [event, ...]}, everything queued since the last batch:
+#           ['place', player, p, g, c] / ['garbage', lines, hole, sender] /
+#           ['over', player] / ['end', winner]
+#   ping    {'t': 'ping', 'id': n}  sent (and answered) right away, never batched
+BATCH_INTERVAL = 1 / FPS  # Seconds between two batches sent to each client
+PING_INTERVAL = 0.5       # Seconds between two round-trip measurements
+
+
+def encode(message):
+    """Returns the wire form of a message (compact JSON plus newline)."""
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+def board_checksum(board):
+    """CRC of the board's cells, compared by clients to detect diverged copies."""
+    return zlib.crc32(board.colors)
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list (0 when empty)."""
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, len(values) * p // 100)]
+
+
+# --- Server ---
+class Player:
+    """Server side of one connection: outgoing batch, liveness and traffic stats."""
+
+    def __init__(self, player_id, name, writer):
+        self.id = player_id
+        self.name = name
+        self.writer = writer
+        self.outbox = []      # Events waiting for the next batch
+        self.alive = True
+        self.attacks = 0      # Attacks sent so far (picks the next target)
+        self.garbage_sent = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.pings = {}       # Ping id -> perf_counter() when it was sent
+        self.rtts = []        # Round-trip times in ms
+
+    def send(self, message):
+        """Writes one message right away."""
+        data = encode(message)
+        self.bytes_out += len(data)
+        self.writer.write(data)
+
+
+class VersusServer:
+    """Runs one match: relays placements, routes garbage and measures every connection.
+
+    Attacks go to the alive opponents in turn, and the hole column of every
+    garbage row comes from the match seed, so a seeded match is reproducible.
+    Every player plays on a `columns` x `rows` board.
+    """
+
+    def __init__(self, players=2, host='127.0.0.1', port=VERSUS_PORT, seed=None,
+                 columns=COLUMNS, rows=ROWS):
+        self.expected = players
+        self.columns = columns
+        self.rows = rows
+        self.host = host
+        self.port = port  # 0 picks a free port (see `ready`)
+        # Every client deals its pieces from the same seed, so the match is fair
+        self.seed = Random().getrandbits(32) if seed is None else seed
+        self.random = Random(self.seed)  # Hole columns of the garbage rows
+        self.players = []
+        self.winner = None
+        self.ready = asyncio.Event()     # Set once the server listens
+        self.finished = asyncio.Event()  # Set when the match is decided
+        self.start_time = self.end_time = None
+        self.tasks = []
+
+    async def serve(self):
+        """Accepts the players, runs the match and returns the per-player report."""
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self.ready.set()
+        async with server:
+            await self.finished.wait()
+        for task in self.tasks:
+            task.cancel()
+        for player in self.players:
+            await player.writer.drain()
+            player.writer.close()
+        return self.report()
+
+    async def handle(self, reader, writer):
+        """Reads the messages of one client until it disconnects."""
+        hello = json.loads(await reader.readline() or b'{}')
+        if hello.get('t') != 'hello' or len(self.players) == self.expected:
+            writer.close()  # Not a client, or the match is full
+            return
+        player = Player(len(self.players), hello.get('name', ''), writer)
+        self.players.append(player)
+        if len(self.players) == self.expected:
+            self.start()
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            player.bytes_in += len(line)
+            self.receive(player, json.loads(line))
+        self.eliminate(player)  # A disconnect counts as topping out
+
+    def start(self):
+        """Tells every client its id, the seed and the board size, then starts batching and pinging."""
+        names = {player.id: player.name for player in self.players}
+        for player in self.players:
+            player.send({'t': 'start', 'you': player.id, 'players': names, 'seed': self.seed,
+                         'size': [self.columns, self.rows]})
+        self.start_time = perf_counter()
+        self.tasks = [asyncio.create_task(self.flush_loop()), asyncio.create_task(self.ping_loop())]
+
+    def receive(self, player, message):
+        """Handles one message of a client."""
+        kind = message['t']
+        if kind == 'place':
+            event = ['place', player.id, message['p'], message['g'], message['c']]
+            for other in self.players:
+                if other is not player:
+                    other.outbox.append(event)
+            if message['a']:
+                self.route_attack(player, message['a'])
+        elif kind == 'pong':
+            sent = player.pings.pop(message['id'], None)
+            if sent is not None:
+                player.rtts.append((perf_counter() - sent) * 1000)
+        elif kind == 'over':
+            self.eliminate(player)
+
+    def route_attack(self, player, lines):
+        """Queues garbage for the next alive opponent of `player`."""
+        targets = [other for other in self.players if other.alive and other is not player]
+        if not targets or self.finished.is_set():
+            return
+        target = targets[player.attacks % len(targets)]
+        player.attacks += 1
+        player.garbage_sent += lines
+        target.outbox.append(['garbage', lines, self.random.randrange(self.columns), player.id])
+
+    def eliminate(self, player):
+        """Marks a player as out; ends the match when at most one is left."""
+        if not player.alive or self.finished.is_set():
+            return
+        player.alive = False
+        self.broadcast(['over', player.id])
+        alive = [other for other in self.players if other.alive]
+        if len(alive) <= 1 and len(self.players) == self.expected:
+            self.winner = alive[0].id if alive else None
+            self.broadcast(['end', self.winner])
+            self.flush()  # The last batch goes out before the connections close
+            self.end_time = perf_counter()
+            self.finished.set()
+
+    def broadcast(self, event):
+        """Queues an event for every player."""
+        for player in self.players:
+            player.outbox.append(event)
+
+    def flush(self):
+        """Sends every player its queued events as one batch."""
+        for player in self.players:
+            if player.outbox:
+                player.send({'t': 'batch', 'e': player.outbox})
+                player.outbox = []
+
+    async def flush_loop(self):
+        """Batches the queued events once per BATCH_INTERVAL."""
+        while True:
+            await asyncio.sleep(BATCH_INTERVAL)
+            self.flush()
+
+    async def ping_loop(self):
+        """Measures the round trip to every client once per PING_INTERVAL."""
+        ping_id = 0
+        while True:
+            ping_id += 1
+            for player in self.players:
+                player.pings[ping_id] = perf_counter()
+                player.send({'t': 'ping', 'id': ping_id})
+            await asyncio.sleep(PING_INTERVAL)
+
+    def report(self):
+        """Returns round-trip latency and bandwidth per player."""
+        seconds = max((self.end_time or perf_counter()) - (self.start_time or 0), 1e-9)
+        return [{
+            'player': player.id,
+            'name': player.name,
+            'rtt_p50_ms': percentile(player.rtts, 50),
+            'rtt_p95_ms': percentile(player.rtts, 95),
+            'pings': len(player.rtts),
+            'up_bytes_per_sec': player.bytes_in / seconds,
+            'down_bytes_per_sec': player.bytes_out / seconds,
+            'garbage_sent': player.garbage_sent,
+        } for player in self.players]
+
+
+# --- Client ---
+class Opponent:
+    """Local copy of an opponent's board, rebuilt from its placements."""
+
+    def __init__(self, name, columns=COLUMNS, rows=ROWS):
+        self.name = name
+        self.board = Board(columns, rows)
+        self.alive = True
+        self.pieces = 0
+        self.lines = 0
+
+    def place(self, piece, garbage, checksum):
+        """Replays one placement, returns False when the copy no longer matches."""
+        self.board.lock(*piece)
+        self.lines += len(self.board.clear_rows())
+        for lines, hole in garbage:
+            self.board.add_garbage(lines, hole)
+        self.pieces += 1
+        return board_checksum(self.board) == checksum
+
+
+class VersusClient:
+    """Connects a local Game to a versus server (set as the game's `versus` hook).
+
+    The own game never waits for the network: moves, locks and incoming
+    garbage are applied locally right away, and opponents are predicted on
+    local boards from their placements instead of receiving full boards.
+    """
+
+    def __init__(self, host='127.0.0.1', port=VERSUS_PORT, name=''):
+        self.host = host
+        self.port = port
+        self.name = name
+        self.game = None
+        self.player_id = None
+        self.seed = None
+        self.columns, self.rows = COLUMNS, ROWS  # Board size of the match (sent by the server)
+        self.opponents = {}      # Player id -> Opponent
+        self.attack_lines = 0    # Garbage to send with the next placement
+        self.placements = 0      # Placements sent so far
+        self.garbage_received = 0
+        self.desyncs = 0         # Placements whose checksum did not match the local copy
+        self.over_sent = False
+        self.winner = None
+        self.ended = asyncio.Event()
+        self.bytes_in = self.bytes_out = 0
+
+    async def connect(self):
+        """Joins the match and waits until every player is there."""
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.send({'t': 'hello', 'name': self.name})
+        start = json.loads(await self.reader.readline())
+        self.player_id = start['you']
+        self.seed = start['seed']
+        self.columns, self.rows = start['size']
+        self.opponents = {int(player_id): Opponent(name, self.columns, self.rows)
+                          for player_id, name in start['players'].items() if int(player_id) != self.player_id}
+        self.reader_task = asyncio.create_task(self.read_loop())
+
+    def attach(self, game):
+        """Reports the game's attacks and placements to the server from now on."""
+        self.game = game
+        game.versus = self
+
+    def send(self, message):
+        data = encode(message)
+        self.bytes_out += len(data)
+        self.writer.write(data)
+
+    # --- Game Hooks ---
+    def attack(self, lines):
+        """Called by Game.calculate_scores with the garbage lines a clear sends."""
+        self.attack_lines += lines
+
+    def placed(self, piece, garbage):
+        """Called by Game.create_new_tetromino after every lock."""
+        self.send({'t': 'place', 'p': [piece.shape, piece.rotation, piece.x, piece.y],
+                   'g': garbage, 'a': self.attack_lines, 'c': board_checksum(self.game.board)})
+        self.attack_lines = 0
+        self.placements += 1
+
+    # --- Network ---
+    async def read_loop(self):
+        """Answers pings and applies the batched events of the server."""
+        while True:
+            try:
+                line = await self.reader.readline()
+            except ConnectionResetError:
+                break
+            if not line:
+                break
+            self.bytes_in += len(line)
+            message = json.loads(line)
+            if message['t'] == 'ping':
+                self.send({'t': 'pong', 'id': message['id']})
+            elif message['t'] == 'batch':
+                for event in message['e']:
+                    self.apply(event)
+        self.ended.set()  # Server gone
+
+    def apply(self, event):
+        """Applies one event of a batch."""
+        kind = event[0]
+        if kind == 'place':
+            player_id, piece, garbage, checksum = event[1:]
+            if not self.opponents[player_id].place(piece, garbage, checksum):
+                self.desyncs += 1
+        elif kind == 'garbage':
+            lines, hole = event[1], event[2]
+            self.garbage_received += lines
+            self.game.receive_garbage(lines, hole)
+        elif kind == 'over':
+            if event[1] in self.opponents:
+                self.opponents[event[1]].alive = False
+        elif kind == 'end':
+            self.winner = event[1]
+            self.ended.set()
+
+    async def play(self, step, frame_delay=1 / FPS, max_frames=None, idle=None):
+        """Calls `step()` once per frame until the match ends.
+
+        `frame_delay` 0 runs a headless game as fast as possible. Reaching
+        `max_frames` counts as topping out. From then on `idle()` (if given)
+        is called every 1 / FPS until the server ends the match, so a window
+        keeps handling its events and redrawing.
+        """
+        frames = 0
+        start = perf_counter()
+        while not self.ended.is_set():
+            if self.game.game_active and not (max_frames and frames >= max_frames):
+                step()
+                frames += 1
+                # Sleep until the next frame is due (at least yield to the reader)
+                delay = start + frames * frame_delay - perf_counter()
+            else:
+                if not self.over_sent:
+                    self.over_sent = True
+                    self.send({'t': 'over'})
+                if idle:
+                    idle()
+                delay = 1 / FPS  # Only waiting for the end of the match: never spin
+            await self.writer.drain()
+            await asyncio.sleep(max(0, delay))
+        self.reader_task.cancel()  # Nothing left to read once the match ended
+        self.writer.close()
+        return frames
+
+
+# --- Runners ---
+async def play_headless(client, depth=1, max_frames=None, frame_delay=0):
+    """Lets the AI play a headless game for `client` (as fast as possible by default)."""
+    from headless import Simulation
+    from ai import AIPlayer
+    await client.connect()
+    simulation = Simulation(client.seed, columns=client.columns, rows=client.rows)
+    client.attach(simulation.game)
+    ai = AIPlayer(depth, moves_per_frame=4)
+
+    def step():
+        ai.update(simulation.game, simulation.next_shapes)
+        simulation.step(())
+
+    await client.play(step, frame_delay, max_frames)
+    return simulation
+
+
+def draw_garbage_meter(main, lines):
+    """Shows the pending garbage as a red bar left of the game area."""
+    layout = main.layout
+    area = pygame.Rect(layout.game_rect.left - layout.padding * 3 // 4, layout.game_rect.top,
+                       layout.padding // 2, layout.game_height)
+    main.display_surface.fill(GRAY, area)
+    height = min(lines, layout.rows) * layout.cell_size
+    main.display_surface.fill(RED, (area.x, area.bottom - height, area.width, height))
+    pygame.display.update(area)
+
+
+async def play_window(client, depth=None):
+    """Plays in a window with the keyboard (or the AI when a depth is given)."""
+    from main import Main
+    from ai import AIPlayer
+    await client.connect()
+    main = Main(client.seed, columns=client.columns, rows=client.rows)
+    client.attach(main.game)
+    main.game.controls.allow_restart = False  # Restarting is up to the server
+    ai = AIPlayer(depth) if depth else None
+    shown = [None, None]  # Pending garbage and caption currently on screen
+
+    def step():
+        main.handle_events()
+        if ai:
+            ai.update(main.game, main.next_shapes)
+        main.draw_frame()
+        pending = sum(lines for lines, hole in main.game.pending_garbage)
+        if (pending, main.layout) != shown[0]:  # Also redrawn after a window resize
+            shown[0] = (pending, main.layout)
+            draw_garbage_meter(main, pending)
+        caption = 'Tetris versus - ' + ', '.join(
+            f'{opponent.name or player_id}: {opponent.lines} lines' + ('' if opponent.alive else ' (out)')
+            for player_id, opponent in client.opponents.items())
+        if caption != shown[1]:
+            shown[1] = caption
+            pygame.display.set_caption(caption)
+
+    await client.play(step, idle=step)  # The game over screen stays responsive until the match ends
+    print('You win!' if client.winner == client.player_id else f'Winner: player {client.winner}')
+
+
+async def loopback(players=2, depth=1, max_frames=7200, seed=0, frame_delay=0, columns=COLUMNS, rows=ROWS):
+    """Plays a match between headless AI clients over loopback.
+
+    With `frame_delay` 1 / FPS the clients play in real time, which gives
+    realistic bandwidth numbers (as fast as possible by default).
+
+    Checks that every client's copy of every opponent matches the real board
+    and that all garbage arrived, then returns the server's report.
+    """
+    server = VersusServer(players, port=0, seed=seed, columns=columns, rows=rows)
+    server_task = asyncio.create_task(server.serve())
+    await server.ready.wait()
+    clients = [VersusClient('127.0.0.1', server.port, f'bot{i}') for i in range(players)]
+    simulations = await asyncio.gather(*(play_headless(client, depth, max_frames, frame_delay)
+                                         for client in clients))
+    report = await server_task
+
+    # Player ids follow the connection order, not the order of `clients`
+    by_id = {client.player_id: (client, simulation) for client, simulation in zip(clients, simulations)}
+    for client in clients:
+        assert client.desyncs == 0, f'{client.name}: {client.desyncs} placements diverged'
+        for player_id, opponent in client.opponents.items():
+            owner, simulation = by_id[player_id]
+            # Placements sent after the match was decided are never relayed
+            if opponent.pieces == owner.placements:
+                assert opponent.board.row_bits == simulation.game.board.row_bits, 'opponent copy diverged'
+    assert sum(client.garbage_received for client in clients) == sum(row['garbage_sent'] for row in report)
+    for row in report:
+        client, simulation = by_id[row['player']]
+        row['pieces'] = client.placements
+        row['garbage_received'] = client.garbage_received
+    return server.winner, report
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Versus mode over a local network.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('server', help='host one match')
+    serve.add_argument('--players', type=int, default=2)
+    serve.add_argument('--host', default='0.0.0.0')
+    serve.add_argument('--port', type=int, default=VERSUS_PORT)
+    serve.add_argument('--seed', type=int)
+    serve.add_argument('--board', default='classic',
+                       help=f'board size: {", ".join(BOARD_SIZES)} or COLUMNSxROWS (e.g. 20x40)')
+    join = commands.add_parser('client', help='join a match in a window')
+    join.add_argument('host')
+    join.add_argument('--port', type=int, default=VERSUS_PORT)
+    join.add_argument('--name', default='')
+    join.add_argument('--ai', type=int, metavar='DEPTH', help='let the AI play')
+    test = commands.add_parser('test', help='headless AI match over loopback')
+    test.add_argument('--players', type=int, default=3)
+    test.add_argument('--depth', type=int, default=1)
+    test.add_argument('--frames', type=int, default=7200, help='frames per player before giving up')
+    test.add_argument('--realtime', action='store_true', help='play at 60 fps instead of full speed')
+    test.add_argument('--board', default='classic', help='board size (like server --board)')
+    args = parser.parse_args()
+    if args.command != 'client':
+        columns, rows = BOARD_SIZES.get(args.board) or (int(n) for n in args.board.split('x'))
+
+    def print_report(report):
+        for row in report:
+            print(f"player {row['player']} {row['name']:>8}: rtt p50 {row['rtt_p50_ms']:.2f} ms "
+                  f"p95 {row['rtt_p95_ms']:.2f} ms ({row['pings']} pings), "
+                  f"up {row['up_bytes_per_sec']:.0f} B/s, down {row['down_bytes_per_sec']:.0f} B/s, "
+                  f"garbage sent {row['garbage_sent']}"
+                  + (f", received {row['garbage_received']}, pieces {row['pieces']}" if 'pieces' in row else ''))
+
+    if args.command == 'server':
+        server = VersusServer(args.players, args.host, args.port, args.seed, columns, rows)
+        print(f'Waiting for {args.players} players on port {args.port} (seed {server.seed})')
+        print_report(asyncio.run(server.serve()))
+        print(f'Winner: player {server.winner}')
+    elif args.command == 'client':
+        asyncio.run(play_window(VersusClient(args.host, args.port, args.name), args.ai))
+    else:
+        winner, report = asyncio.run(loopback(args.players, args.depth, args.frames,
+                                              frame_delay=1 / FPS if args.realtime else 0,
+                                              columns=columns, rows=rows))
+        print_report(report)
+        print(f'Winner: player {winner}, all opponent boards and garbage matched')